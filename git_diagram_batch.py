@@ -0,0 +1,176 @@
+# git_diagram_batch.py
+# - rendert alle Befehle aus git_diagram_commands_phase1.json × alle Config-Varianten
+# - parallel über ProcessPoolExecutor; Fonts + Metrik-Cache einmal je Worker
+# - Config-Matrix: mehrere Config-Dateien und/oder eine Matrix-Datei
+#     {"base": "git_diagram_config.json", "variants": {"name": {Overrides...}}}
+# - Zeit-Übersicht je Diagramm am Ende
+# - inkrementell: Jobs mit unveränderten Eingaben (Build-Manifest) werden übersprungen
+# - mehrere Formate je Lauf (--format svg png pdf): ein Job je Format, Raster über den Cache
+# - --width: Zielbreite für alle Varianten (Config "TargetWidth")
+# - --report: Messbericht je Diagramm (git_diagram_instrument) und Summe, gruppiert je Variante/Befehl
+# - --canonical: kanonische SVGs (Tabellen-Metriken), vergleichbar mit dem Golden-Korpus
+# - --watch: danach Eingaben beobachten und betroffene Diagramme warm neu rendern (git_diagram_watch)
+
+import argparse, os, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import render_clone_svg as r
+import git_diagram_instrument as instrument
+from git_diagram_manifest import Manifest, combined_hash
+from git_diagram_metrics import get_backend, set_backend
+
+# ---------- Varianten ----------
+def config_variants(config_paths: List[str] = None, matrix_path: str = None) -> List[Tuple[str, Dict]]:
+    """[(Variantenname, Config-Dict)]; Name "" = Standard-Config, Ausgabe direkt in out/."""
+    variants: List[Tuple[str, Dict]] = []
+    for p in (config_paths or []):
+        name = os.path.splitext(os.path.basename(p))[0]
+        variants.append(("" if os.path.abspath(p) == os.path.abspath(r.CFG) else name, r.load_json(p)))
+    if matrix_path:
+        matrix = r.load_json(matrix_path)
+        base_path = os.path.join(os.path.dirname(matrix_path), matrix.get("base", r.CFG))
+        base = r.load_json(base_path)
+        for name, overrides in matrix.get("variants", {}).items():
+            variants.append((name, {**base, **overrides}))
+    if not variants:
+        variants.append(("", r.load_json(r.CFG)))
+    return variants
+
+def plan_jobs(command_ids: List[str], variants: List[Tuple[str, Dict]], out_dir: str = r.OUT_DIR,
+              output: Dict = None) -> List[Dict]:
+    """Ein Job je (Befehl, Variante) mit fertig aufgelöster Szene und Zielpfad (Endung je output["format"])."""
+    commands = r.load_json(r.COMMANDS)
+    scenes = r.load_json(r.SCENES)
+    fmt = (output or {}).get("format", "svg")
+    jobs = []
+    for vname, cfg in variants:
+        for cid in command_ids:
+            jobs.append({
+                "name": f"{vname}/{cid}" if vname else cid,
+                "cfg": cfg,
+                "scene": r.scene_for(cid, commands, scenes),
+                "out": r.out_path_for(cid, os.path.join(out_dir, vname) if vname else out_dir, fmt),
+                "output": output or {},
+            })
+    return jobs
+
+# ---------- Worker ----------
+_WORKER_FONTS: Optional[Dict] = None
+
+def _init_worker(backend: str, instrumented: bool = False):
+    """Einmal je Worker: Backend wählen, Metrik-Cache laden, Fonts laden (mit Messpunkten, falls gewünscht)."""
+    global _WORKER_FONTS
+    if instrumented:
+        instrument.install()
+    set_backend(backend)
+    r.load_metrics_cache()
+    _WORKER_FONTS = r.load_fonts()
+
+def worker_fonts() -> Dict:
+    """Fonts dieses Prozesses; beim ersten Aufruf wie ein Worker initialisiert (Layout-Cache bleibt daran gebunden)."""
+    if _WORKER_FONTS is None:
+        _init_worker(get_backend().name)
+    return _WORKER_FONTS
+
+def render_job(job: Dict) -> Dict:
+    """Rendert einen Job im aktuellen Prozess; liefert Ergebnis + Zeit."""
+    fonts = worker_fonts()
+    t0 = time.perf_counter()
+    with instrument.record(job["name"]) as rep:
+        w, h = r.write_output_file(job["out"], job["cfg"], job["scene"], fonts, job.get("output"))
+    result = {"name": job["name"], "out": job["out"], "w": w, "h": h,
+              "seconds": time.perf_counter() - t0, "pid": os.getpid()}
+    if instrument.enabled():
+        result["report"] = rep.to_dict()
+        setup = instrument.take_setup()   # Font-Laden beim Worker-Start: mit dem ersten Job zurück
+        if setup:
+            result["setup"] = setup
+    return result
+
+def render_batch(jobs: List[Dict], workers: int = None, instrumented: bool = False) -> List[Dict]:
+    """Rendert alle Jobs; workers=1 rendert seriell im eigenen Prozess."""
+    workers = workers or os.cpu_count() or 1
+    backend = get_backend().name
+    if workers <= 1 or len(jobs) <= 1:
+        _init_worker(backend, instrumented)
+        return [render_job(j) for j in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                             initializer=_init_worker, initargs=(backend, instrumented)) as ex:
+        return list(ex.map(render_job, jobs, chunksize=max(1, len(jobs) // (4*workers))))
+
+def filter_unchanged(jobs: List[Dict], force: bool = False) -> Tuple[List[Dict], List[Dict], Dict[str, Manifest]]:
+    """Teilt Jobs in (zu rendern, übersprungen); Manifeste je Ausgabeordner."""
+    manifests: Dict[str, Manifest] = {}
+    todo, skipped = [], []
+    for job in jobs:
+        d = os.path.dirname(job["out"])
+        m = manifests.get(d) or manifests.setdefault(d, Manifest.for_dir(d))
+        job["inputs"] = r.diagram_inputs(m, job["cfg"], job["scene"], job.get("output"))
+        job["digest"] = combined_hash(job["inputs"])
+        (skipped if not force and m.is_current(job["out"], job["digest"]) else todo).append(job)
+    return todo, skipped, manifests
+
+def record_results(jobs: List[Dict], manifests: Dict[str, Manifest]):
+    for job in jobs:
+        manifests[os.path.dirname(job["out"])].record(job["out"], job["digest"], job["inputs"])
+    for m in manifests.values():
+        m.save()
+
+def print_summary(results: List[Dict], wall: float, out=None):
+    out = out or sys.stdout   # erst beim Aufruf, damit redirect_stdout greift
+    width = max([len(x["name"]) for x in results] + [4])
+    for x in sorted(results, key=lambda x: -x["seconds"]):
+        print(f"  {x['name']:<{width}}  {x['seconds']*1000:8.1f} ms  {x['w']}x{x['h']} px  -> {x['out']}", file=out)
+    cpu = sum(x["seconds"] for x in results)
+    print(f"{len(results)} Diagramme in {wall:.2f} s (Renderzeit Summe {cpu:.2f} s, "
+          f"{len({x['pid'] for x in results})} Prozess(e))", file=out)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Alle Befehle × Config-Varianten parallel rendern")
+    ap.add_argument("--commands", nargs="*", help="Befehls-IDs (Standard: alle aus dem Katalog)")
+    ap.add_argument("--config", nargs="*", default=[], help="Config-Dateien (je Datei eine Variante)")
+    ap.add_argument("--matrix", help="Matrix-Datei mit base + variants")
+    ap.add_argument("--jobs", "-j", type=int, default=None, help="Anzahl Worker-Prozesse (Standard: CPU-Kerne)")
+    ap.add_argument("--out", default=r.OUT_DIR, help="Ausgabeverzeichnis")
+    ap.add_argument("--metrics", choices=["pillow", "ttf", "table"], help="Metrik-Backend")
+    ap.add_argument("--force", action="store_true", help="auch unveränderte Diagramme neu rendern")
+    ap.add_argument("--width", type=int, help="Zielbreite in px für alle Varianten (Config \"TargetWidth\")")
+    ap.add_argument("--report", metavar="JSON", help="Messbericht je Diagramm + Summe schreiben")
+    ap.add_argument("--watch", action="store_true", help="danach Eingabedateien beobachten und betroffene Diagramme neu rendern")
+    ap.add_argument("--interval", type=float, help="Poll-Intervall in s bei --watch (Standard: 0.05)")
+    r.add_output_args(ap)
+    args = ap.parse_args(argv)
+
+    if r.metrics_backend(args):
+        set_backend(r.metrics_backend(args))
+
+    def plan() -> List[Dict]:
+        command_ids = args.commands or [c["id"] for c in r.load_json(r.COMMANDS)]
+        variants = [(name, r.with_target_width(cfg, args.width)) for name, cfg in config_variants(args.config, args.matrix)]
+        return [j for output in r.output_variants(args) for j in plan_jobs(command_ids, variants, args.out, output)]
+    try:
+        jobs = plan()
+    except KeyError as e:   # unbekannter Befehl (scene_for)
+        raise SystemExit(e.args[0])
+    t0 = time.perf_counter()
+    todo, skipped, manifests = filter_unchanged(jobs, args.force)
+    results = render_batch(todo, args.jobs, bool(args.report)) if todo else []
+    record_results(todo, manifests)
+    print_summary(results, time.perf_counter() - t0)
+    if skipped:
+        print(f"{len(skipped)} unverändert übersprungen")
+    if args.report:
+        reports = [x[k] for x in results for k in ("setup", "report") if k in x]
+        instrument.write_report(args.report, reports, skipped=[j["name"] for j in skipped],
+                                by_variant=instrument.group_ms(reports, lambda n: n.rpartition("/")[0] or "(Standard)"),
+                                by_command=instrument.group_ms(reports, lambda n: n.rpartition("/")[2]))
+        print(instrument.summary(instrument.aggregate(reports)))
+        print(f"Wrote {args.report}")
+    if args.watch:
+        from git_diagram_watch import DEFAULT_INTERVAL, Watcher, watched_files
+        return Watcher(plan, watched_files(args.config, args.matrix), args.interval or DEFAULT_INTERVAL).run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
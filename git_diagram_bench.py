@@ -0,0 +1,324 @@
+# git_diagram_bench.py
+# - Benchmarks der heißen Pfade in render_clone_svg:
+#     measure_text (kalt/warm), wrap_text auf langen Windows-Pfaden, shorten_middle,
+#     measure_repo_block, Layout + Zeichnen, render() inkl. Manifest und Datei,
+#     PNG-Rasterung ohne/mit Raster-Cache
+# - synthetische Szenen: viele Commits (DAG), viele Branches, viele Repos
+# - Startzeit: Import und kompletter CLI-Lauf je Backend in einem frischen Prozess (startup/*)
+# - Ergebnis als JSON (--save), Vergleich mit gespeicherter Baseline (--baseline);
+#   Exit-Code 1, wenn ein Fall um mehr als --max-regression langsamer ist – nur Fälle mit mindestens
+#   --min-samples Messungen (number × repeat); langsame Fälle mit einem Aufruf je Runde (startup/*,
+#   große *-cold) werden sonst nur angezeigt, mit höherem --repeat auch bewertet
+# - --profile: cProfile/pstats je Szene + Wandzeit je Phase (font load, measure, draw, write)
+
+import argparse, contextlib, cProfile, io, json, os, platform, pstats, random, shutil, statistics, subprocess, sys, tempfile, time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import render_clone_svg as r
+from git_diagram_dag import synthetic_history
+from git_diagram_metrics import METRICS_CACHE, get_backend, pillow_available, set_backend
+
+BENCH_VERSION = 1
+MIN_GATE_SAMPLES = 10   # weniger Messungen je Fall: Rauschen > --max-regression, kein Regressions-Urteil
+
+LONG_PATHS = [
+    r"c:\Users\fd2024\Documents\Projekte\Kunden\Messsysteme\Firmware\libs\datarecorder-lib\src\drivers\adc\calibration\tables\generated\ads1256_gain_offset_table_rev7.c",
+    r"\\fileserver01.corp.example.org\Entwicklung\Archiv\2019\Messkampagnen\Prüfstand_3\Rohdaten\Kanal_12\export\datarecorder-lib-backup.git",
+    r"c:\a\git\libs\datarecorder-lib\build\x64-windows-msvc-relwithdebinfo\CMakeFiles\datarecorder.dir\src\protocol\framing\crc32_slice_by_8.c.obj",
+]
+
+# ---------- Szenen ----------
+def _clear_caches():
+    """Kalter Start: Text-Metriken und Layout-Cache leeren (Fonts bleiben geladen)."""
+    METRICS_CACHE.clear()
+    r._ENGINES.clear()
+
+def synthetic_scene(name: str, commits: int = 0, branches: int = 1, repos: int = 0,
+                    collapse: int = 0) -> Tuple[Dict, Dict, Dict]:
+    """(cfg, scene, ast) für fetch mit zusätzlichen Repos; commits>0 -> DAG-Historie im ersten Zusatz-Repo."""
+    cfg = r.load_json(r.CFG)
+    scene = r.scene_for("fetch", r.load_json(r.COMMANDS), r.load_json(r.SCENES))
+    ast = json.loads(json.dumps(r.load_ast()))
+    names = [f"feature/{name}-{i:02d}" for i in range(branches - 1)]
+    extra = {}
+    for k in range(repos):
+        pid = "repo3" if k == 0 else f"repo{k+3}"
+        if not any(p.get("id") == pid for p in ast["parts"]):
+            ast["parts"].append({"type": "repo", "id": pid})
+        spec = {"title": f"Fork {k+1}", "repo_name": cfg["RemoteRepoName"], "commits": 3,
+                "branches": [cfg["RemoteDefBranch"]] + names}
+        if k == 0 and commits:
+            spec.update(commits=synthetic_history(commits, max(branches, 2), 7), collapse=collapse)
+        extra[pid] = spec
+    cfg["Repos"] = extra
+    return cfg, scene, ast
+
+def scenes() -> Dict[str, Tuple[Dict, Dict, Dict]]:
+    clone_cfg = r.load_json(r.CFG)
+    clone = r.scene_for("clone", r.load_json(r.COMMANDS), r.load_json(r.SCENES))
+    return {
+        "clone": (clone_cfg, clone, r.load_ast()),
+        "dag-1k": synthetic_scene("dag", commits=1000, branches=4, repos=1),
+        "dag-10k-collapsed": synthetic_scene("dag", commits=10000, branches=4, repos=1, collapse=6),
+        "branches-40": synthetic_scene("br", branches=40, repos=1),
+        "repos-12": synthetic_scene("rp", repos=12),
+    }
+
+# ---------- Fälle ----------
+# Ein Fall: Name -> (Vorbereitung, Funktion, Einheiten je Aufruf); die Funktion wird wiederholt gemessen.
+Case = Tuple[Callable[[], None], Callable[[], object], int]
+
+@contextlib.contextmanager
+def _env(name: str, value: str):
+    """Umgebungsvariable nur für die Dauer des Blocks setzen (danach alter Wert bzw. entfernt)."""
+    old = os.environ.get(name)
+    os.environ[name] = value
+    try:
+        yield
+    finally:
+        if old is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = old
+
+def cases(fonts: Dict, selected: Dict[str, Tuple[Dict, Dict, Dict]], tmp: str) -> Dict[str, Case]:
+    """Alle Fälle; Dateien (Config, SVG/PNG, Raster-Cache) landen in tmp, das der Aufrufer aufräumt."""
+    rnd = random.Random(7)
+    labels = ["".join(rnd.choice("abcdefghijklmnopqrstuvwxyz0123456789_-./") for _ in range(rnd.randrange(4, 40)))
+              for _ in range(200)]
+    desc_font, cmd_font, row_font = fonts["desc"], fonts["cmd"], fonts["row"]
+    nothing = lambda: None
+
+    def measure_all():
+        for s in labels:
+            r.measure_text(s, row_font, pad_right=True)
+
+    def cold(fn):
+        def run():
+            _clear_caches()
+            return fn()
+        return run
+
+    def wrap_paths():
+        for p in LONG_PATHS:
+            r.wrap_text(p, 600, desc_font)
+
+    def shorten_paths():
+        for p in LONG_PATHS:
+            r.shorten_middle(p, 420, cmd_font)
+
+    commits = r.fake_commits(12, random.Random(1))
+
+    def repo_block():
+        return r.measure_repo_block(
+            title="Lokal: " + LONG_PATHS[0], repo_name="datarecorder-lib", is_local=True,
+            branches=["main", "develop"], commits=commits,
+            font_title_repo=fonts["repo_title"], font_table_title=fonts["table_title"], font_row=row_font,
+            font_branch=fonts["branch"], font_hdr=fonts["hdr"], font_hash=fonts["hash"])
+
+    out = {
+        "measure_text/cold": (nothing, cold(measure_all), len(labels)),
+        "measure_text/warm": (measure_all, measure_all, len(labels)),
+        "wrap_text/winpath-cold": (nothing, cold(wrap_paths), len(LONG_PATHS)),
+        "wrap_text/winpath-warm": (wrap_paths, wrap_paths, len(LONG_PATHS)),
+        "shorten_middle/winpath-cold": (nothing, cold(shorten_paths), len(LONG_PATHS)),
+        "measure_repo_block/cold": (nothing, cold(repo_block), 1),
+    }
+    for name, (cfg, scene, ast) in selected.items():
+        def diagram(cfg=cfg, scene=scene, ast=ast):
+            return r.write_diagram(cfg, scene, fonts, io.StringIO(), ast)
+        out[f"diagram/{name}-cold"] = (nothing, cold(diagram), 1)
+        out[f"diagram/{name}-warm"] = (diagram, diagram, 1)
+    if "clone" in selected:
+        cfg_path = os.path.join(tmp, "config.json")
+        with open(cfg_path, "w", encoding="utf-8") as f:
+            json.dump(selected["clone"][0], f)
+        target = os.path.join(tmp, "git_clone_diagram.svg")
+        def full_render():
+            with contextlib.redirect_stdout(io.StringIO()):
+                r.render("clone", cfg_path, target, fonts=fonts, force=True)
+        out["render/clone-force"] = (full_render, full_render, 1)
+        if pillow_available():
+            png = os.path.join(tmp, "git_clone_diagram.png")
+            def raster(cache):
+                root = os.path.join(tmp, "raster", cache)
+                def run():
+                    if cache == "cold":
+                        shutil.rmtree(root, ignore_errors=True)
+                    with _env("GIT_DIAGRAM_RASTER_CACHE", root):
+                        r.write_output_file(png, selected["clone"][0], selected["clone"][1], fonts, {"format": "png"})
+                return run
+            out["raster/clone-png-cold"] = (nothing, raster("cold"), 1)
+            out["raster/clone-png-cached"] = (raster("warm"), raster("warm"), 1)
+
+    # Startzeit: frischer Interpreter je Aufruf (Import, Font-Laden, kalte Messung, Schreiben);
+    # -m nutzt den Bytecode-Cache, ein Skriptaufruf würde render_clone_svg.py jedes Mal neu kompilieren
+    here = os.path.dirname(os.path.abspath(__file__))
+    def process(*argv):
+        def run():
+            subprocess.run([sys.executable, *argv], cwd=here, check=True, stdout=subprocess.DEVNULL)
+        return run
+    out["startup/import"] = (nothing, process("-c", "import render_clone_svg"), 1)
+    for backend in ("pillow", "ttf", "table"):
+        if backend == "pillow" and not pillow_available():
+            continue
+        out[f"startup/render-{backend}"] = (nothing, process(
+            "-m", "render_clone_svg", "clone", "--force", "--metrics", backend,
+            "--out", os.path.join(tmp, f"startup-{backend}.svg")), 1)
+    return out
+
+def time_case(case: Case, repeat: int, min_time: float) -> Dict:
+    """Kalibriert die Schleifenzahl auf ~min_time je Runde; bester Wert + Median in µs je Einheit."""
+    setup, fn, units = case
+    setup()
+    number, t = 1, 0.0
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        t = time.perf_counter() - t0
+        if t >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if t == 0 else max(2, min(10, int(min_time / t) + 1))
+    rounds = [t]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append(time.perf_counter() - t0)
+    per = [x / number / units * 1e6 for x in rounds]
+    return {"best_us": min(per), "median_us": statistics.median(per), "number": number,
+            "repeat": repeat, "units": units}
+
+# ---------- Phasen / Profil ----------
+def phase_times(cfg: Dict, scene: Dict, ast: Dict, path: str) -> Tuple[Dict[str, float], Dict]:
+    """Wandzeit je Phase eines kalten Renders in ms: font load, measure, draw, write."""
+    _clear_caches()
+    t0 = time.perf_counter()
+    fonts = r.load_fonts()
+    t1 = time.perf_counter()
+    eng = r.layout_engine(fonts)
+    lay = r.layout_diagram(eng, r.bind_ast(ast, cfg, scene))
+    t2 = time.perf_counter()
+    buf = io.StringIO()
+    r.draw_diagram(eng, lay, r.SvgWriter(buf))
+    svg = buf.getvalue()
+    t3 = time.perf_counter()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(svg)
+    t4 = time.perf_counter()
+    return ({"font_load": (t1-t0)*1e3, "measure": (t2-t1)*1e3, "draw": (t3-t2)*1e3, "write": (t4-t3)*1e3},
+            {"w": int(lay.w), "h": int(lay.h), "bytes": len(svg)})
+
+def profile(selected: Dict[str, Tuple[Dict, Dict, Dict]], prof_dir: Optional[str], top: int, out=sys.stdout) -> Dict:
+    """Phasenzeiten + cProfile je Szene; .prof-Dateien nach prof_dir (für snakeviz/pstats)."""
+    result = {}
+    with tempfile.TemporaryDirectory(prefix="git_diagram_prof_") as tmp:
+        for name, (cfg, scene, ast) in selected.items():
+            path = os.path.join(tmp, f"{name}.svg")
+            phases, size = phase_times(cfg, scene, ast, path)
+            result[name] = {"phases_ms": phases, **size}
+            print(f"{name:<20} " + "  ".join(f"{k} {v:8.2f} ms" for k, v in phases.items())
+                  + f"  ({size['w']}x{size['h']} px, {size['bytes']} B)", file=out)
+            prof = cProfile.Profile()
+            prof.runcall(phase_times, cfg, scene, ast, path)
+            if prof_dir:
+                os.makedirs(prof_dir, exist_ok=True)
+                prof.dump_stats(os.path.join(prof_dir, f"{name}.prof"))
+            pstats.Stats(prof, stream=out).strip_dirs().sort_stats("cumulative").print_stats(top)
+    return result
+
+# ---------- Baseline ----------
+def samples(res: Dict) -> int:
+    """Anzahl der Messungen eines Falls (Aufrufe je Runde × Runden)."""
+    return res.get("number", 1) * res.get("repeat", 1)
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], max_regression: float,
+            report_missing: bool = True, out=sys.stdout, min_samples: int = MIN_GATE_SAMPLES) -> List[str]:
+    """Vergleicht best_us je Fall; liefert die Namen der Regressionen über max_regression.
+    Fälle mit weniger als min_samples Messungen (hier oder in der Baseline) werden nur angezeigt."""
+    regressions = []
+    width = max([len(k) for k in results] + [4])
+    for name, res in results.items():
+        old = baseline.get(name)
+        if not old:
+            print(f"  {name:<{width}}  {res['best_us']:12.2f} µs  (neu)", file=out)
+            continue
+        ratio = res["best_us"] / old["best_us"] if old["best_us"] else float("inf")
+        flag = ""
+        n = min(samples(res), samples(old))
+        if n < min_samples:
+            flag = f"  (nicht bewertet: {n} Messungen)"
+        elif ratio > 1 + max_regression:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<{width}}  {old['best_us']:12.2f} -> {res['best_us']:12.2f} µs  {ratio:6.2f}x{flag}", file=out)
+    for name in baseline:
+        if report_missing and name not in results:
+            print(f"  {name:<{width}}  (nicht gelaufen)", file=out)
+    return regressions
+
+def environment() -> Dict:
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "backend": get_backend().name, "bench_version": BENCH_VERSION,
+            "renderer_version": r.RENDERER_VERSION}
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmarks und Profil für den Diagramm-Renderer")
+    ap.add_argument("--filter", "-k", default="", help="nur Fälle, deren Name diesen Text enthält")
+    ap.add_argument("--scenes", nargs="*", help="Szenen (Standard: alle)")
+    ap.add_argument("--metrics", choices=["pillow", "ttf", "table"], help="Metrik-Backend")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--min-time", type=float, default=0.05, help="Mindestdauer je Runde in s")
+    ap.add_argument("--save", help="Ergebnisse als JSON schreiben (z.B. als neue Baseline)")
+    ap.add_argument("--baseline", help="gespeicherte Ergebnisse zum Vergleich")
+    ap.add_argument("--max-regression", type=float, default=0.15, help="erlaubte Verlangsamung (0.15 = 15 %%)")
+    ap.add_argument("--min-samples", type=int, default=MIN_GATE_SAMPLES,
+                    help="Fälle mit weniger Messungen (number × repeat) nicht als Regression werten")
+    ap.add_argument("--profile", action="store_true", help="Phasenzeiten + cProfile je Szene statt Benchmarks")
+    ap.add_argument("--profile-dir", help="cProfile-Dumps (.prof) hierhin schreiben")
+    ap.add_argument("--top", type=int, default=20, help="Zeilen der pstats-Ausgabe")
+    args = ap.parse_args(argv)
+
+    if args.metrics:
+        set_backend(args.metrics)
+    all_scenes = scenes()
+    unknown = set(args.scenes or ()) - set(all_scenes)
+    if unknown:
+        ap.error(f"unbekannte Szene(n): {', '.join(sorted(unknown))}")
+    selected = {k: v for k, v in all_scenes.items() if not args.scenes or k in args.scenes}
+
+    if args.profile:
+        report = {"env": environment(), "profile": profile(selected, args.profile_dir, args.top)}
+        if args.save:
+            with open(args.save, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=1)
+        return 0
+
+    fonts = r.load_fonts()
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="git_diagram_bench_") as tmp:
+        for name, case in cases(fonts, selected, tmp).items():
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = res = time_case(case, args.repeat, args.min_time)
+            print(f"  {name:<32} {res['best_us']:12.2f} µs  (Median {res['median_us']:.2f}, "
+                  f"{res['number']}x{res['repeat']})", flush=True)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"env": environment(), "results": results}, f, ensure_ascii=False, indent=1)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        if base.get("env", {}).get("backend") not in (None, get_backend().name):
+            print(f"Hinweis: Baseline mit Backend '{base['env']['backend']}' gemessen")
+        print(f"Vergleich mit {args.baseline}:")
+        regressions = compare(results, base.get("results", {}), args.max_regression,
+                              report_missing=not (args.filter or args.scenes), min_samples=args.min_samples)
+        if regressions:
+            print(f"{len(regressions)} Regression(en) über {args.max_regression:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+# git_diagram_dag.py
+# - Commit-DAG-Layout für draw_history/measure_history
+# - Eingabe: Commits (git_diagram_model.Commit, Dicts werden umgewandelt) mit parents = [ids],
+#   Reihenfolge alt -> neu (wie git log --reverse --topo-order); sonst topologisch sortiert
+# - Spurzuweisung (lanes) wie git log --graph, neu -> alt, O(n log n) über Heap freier Spuren
+# - optional: lange lineare Strecken zu einem "… N commits"-Knoten zusammenfassen
+# - Koordinaten array-basiert (lane/row je Knoten), Kanten mit eigener Spur
+
+import argparse, heapq, random, sys, time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from git_diagram_model import Commit, as_commits
+
+class DagLayout:
+    """Ergebnis: nodes (alt -> neu), lane[i], row[i] (0 = ältester, unten),
+    edges [(kind, elter, spur)] als Knotenindizes, num_lanes, collapsed (ausgeblendete Commits)."""
+    __slots__ = ("nodes", "lane", "row", "edges", "num_lanes", "collapsed")
+
+    def __init__(self, nodes, lane, row, edges, num_lanes, collapsed):
+        self.nodes = nodes
+        self.lane = lane
+        self.row = row
+        self.edges = edges
+        self.num_lanes = num_lanes
+        self.collapsed = collapsed
+
+def has_parents(commits: List[Commit]) -> bool:
+    return any(c.parents is not None for c in commits)
+
+def topo_order(commits: List[Commit]) -> List[Commit]:
+    """Alt -> neu; Eingabe bleibt unverändert, wenn sie schon topologisch sortiert ist."""
+    pos = {c.id: i for i, c in enumerate(commits)}
+    if all(pos.get(p, -1) < i for i, c in enumerate(commits) for p in c.parents or ()):
+        return commits
+    # Kahn: Eltern vor Kindern, stabil zur Eingabereihenfolge
+    indeg = [0]*len(commits)
+    children: List[List[int]] = [[] for _ in commits]
+    for i, c in enumerate(commits):
+        for p in c.parents or ():
+            j = pos.get(p)
+            if j is not None:
+                indeg[i] += 1
+                children[j].append(i)
+    ready = [i for i, d in enumerate(indeg) if d == 0]
+    heapq.heapify(ready)
+    out = []
+    while ready:
+        i = heapq.heappop(ready)
+        out.append(commits[i])
+        for k in children[i]:
+            indeg[k] -= 1
+            if indeg[k] == 0:
+                heapq.heappush(ready, k)
+    if len(out) != len(commits):
+        raise ValueError("Commit-Graph enthält einen Zyklus")
+    return out
+
+def collapse_linear(commits: List[Commit], min_run: int) -> Tuple[List[Commit], int]:
+    """Ersetzt lineare Strecken (1 Elter, 1 Kind, keine Refs) ab min_run Commits
+    durch einen Knoten Commit(id="", type="… N commits", collapsed=N)."""
+    if min_run <= 1:
+        return commits, 0
+    pos = {c.id: i for i, c in enumerate(commits)}
+    nchild = [0]*len(commits)
+    child_of = [-1]*len(commits)
+    for i, c in enumerate(commits):
+        for p in c.parents or ():
+            j = pos.get(p)
+            if j is not None:
+                nchild[j] += 1
+                child_of[j] = i
+    linear = [c.parents is not None and len(c.parents) == 1 and pos.get(c.parents[0]) is not None
+              and nchild[i] == 1 and not c.refs and not c.keep
+              for i, c in enumerate(commits)]
+    replace: Dict[int, Commit] = {}   # oberster Index der Strecke -> Ersatzknoten
+    drop = set()
+    for top in range(len(commits)):
+        if not linear[top] or linear[child_of[top]]:
+            continue
+        run = [top]
+        j = pos[commits[top].parents[0]]
+        while linear[j]:
+            run.append(j)
+            j = pos[commits[j].parents[0]]
+        if len(run) >= min_run:
+            bottom = commits[run[-1]]
+            replace[top] = Commit("", f"… {len(run)} commits", list(bottom.parents), collapsed=len(run),
+                                  key=f"…{commits[top].id}")
+            drop.update(run[1:])
+    if not replace:
+        return commits, 0
+    # Kind der Strecke zeigt auf den Ersatzknoten
+    new_id = {commits[top].id: node.key for top, node in replace.items()}
+    out = []
+    for i, c in enumerate(commits):
+        if i in drop:
+            continue
+        c = replace.get(i, c)
+        ps = c.parents or ()
+        if any(p in new_id for p in ps):
+            c = c.with_parents([new_id.get(p, p) for p in ps])
+        out.append(c)
+    return out, sum(n.collapsed for n in replace.values()) - len(replace)
+
+def layout_dag(commits: List[Commit], collapse_min: int = 0) -> DagLayout:
+    """Spurzuweisung neu -> alt. Jede Spur erwartet genau einen Commit; das erste Elter
+    erbt die Spur des Kindes, weitere Eltern bekommen die kleinste freie Spur."""
+    nodes = topo_order(as_commits(commits))
+    nodes, hidden = collapse_linear(nodes, collapse_min)
+    n = len(nodes)
+    index = {c.key or c.id: i for i, c in enumerate(nodes)}
+    lane = array("i", [0])*n
+    row = array("i", range(n))
+    edges: List[Tuple[int, int, int]] = []
+    expecting: Dict[str, int] = {}   # Commit-ID -> Spur, die ihn erwartet
+    free: List[int] = []
+    num_lanes = 0
+
+    def alloc() -> int:
+        nonlocal num_lanes
+        if free:
+            return heapq.heappop(free)
+        num_lanes += 1
+        return num_lanes - 1
+
+    for i in range(n - 1, -1, -1):
+        c = nodes[i]
+        my = expecting.pop(c.key or c.id, None)
+        if my is None:
+            my = alloc()   # Branch-Spitze
+        lane[i] = my
+        keep = False
+        for k, p in enumerate(c.parents or ()):
+            j = index.get(p)
+            if j is None:
+                continue   # Elter außerhalb des Ausschnitts
+            l = expecting.get(p)
+            if l is None:
+                if k == 0:
+                    l, keep = my, True   # erstes Elter erbt die Spur
+                else:
+                    l = alloc()
+                expecting[p] = l
+            edges.append((i, j, l))   # sonst: Kante läuft in die bestehende Spur ein
+        if not keep:
+            heapq.heappush(free, my)
+    return DagLayout(nodes, lane, row, edges, max(num_lanes, 1), hidden)
+
+# ---------- Synthetische Historien (Benchmarks, Tests von Hand) ----------
+def synthetic_history(n: int, branches: int = 4, merge_every: int = 25, seed: int = 42) -> List[Dict]:
+    """n Commits alt -> neu auf mehreren Branches mit regelmäßigen Merges nach main."""
+    rnd = random.Random(seed)
+    heads: List[Optional[str]] = [None]*max(1, branches)
+    out = []
+    for i in range(n):
+        b = 0 if i % 3 == 0 else rnd.randrange(len(heads))
+        cid = f"{(i*2654435761 + 0x5bd1e99) & 0xFFFFFFF:07x}"   # eindeutig für i < 2**28
+        parents = [heads[b]] if heads[b] else ([heads[0]] if heads[0] else [])
+        if b == 0 and i % merge_every == 0 and len(heads) > 1:
+            other = rnd.randrange(1, len(heads))
+            if heads[other] and heads[other] not in parents:
+                parents.append(heads[other])
+                heads[other] = None
+        heads[b] = cid
+        out.append({"id": cid, "type": "merge" if len(parents) > 1 else "commit", "parents": parents})
+    return out
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark der DAG-Spurzuweisung")
+    ap.add_argument("--commits", type=int, nargs="*", default=[1000, 10000])
+    ap.add_argument("--branches", type=int, default=4)
+    ap.add_argument("--collapse", type=int, default=0, help="lineare Strecken ab N Commits zusammenfassen")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+    for n in args.commits:
+        hist = synthetic_history(n, args.branches)
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            lay = layout_dag(hist, args.collapse)
+            best = min(best, time.perf_counter() - t0)
+        print(f"{n:7d} commits  {best*1000:8.1f} ms  ({best/n*1e6:.2f} µs/commit)  "
+              f"lanes={lay.num_lanes}  nodes={len(lay.nodes)}  edges={len(lay.edges)}  collapsed={lay.collapsed}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
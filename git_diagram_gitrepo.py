@@ -0,0 +1,247 @@
+# git_diagram_gitrepo.py
+# - Eingabe-Adapter: echter Repo-Zustand (Commits, Branches, Dateibaum) aus einem lokalen
+#   Git-Repository (bare oder mit Working Tree) statt Beispiel-Commits
+# - liest nur, was das Diagramm braucht:
+#     git log -n N (gestreamt, Datum-Reihenfolge: git läuft nur N Commits ab),
+#     Branches über for-each-ref, Baum bis Tiefe D über einen cat-file --batch-Prozess
+#     (nur besuchte Verzeichnisse, Abbruch nach max_rows Zeilen)
+# - Cache je (Repo, Ref -> OID, Branch-OIDs, Optionen): im Prozess (LRU) und optional als
+#   JSON-Dateien (GIT_DIAGRAM_GIT_CACHE=<Verzeichnis>); ein Treffer kostet zwei git-Aufrufe
+# - Ergebnis passt direkt in eine Repo-Spec der Config ("commits", "branches", "tree")
+
+import argparse, json, os, subprocess, sys, time
+from collections import Counter, OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from git_diagram_manifest import canonical_hash
+
+GIT_CACHE_VERSION = 1
+DEFAULT_COMMITS = 20
+DEFAULT_DEPTH = 2
+DEFAULT_MAX_ROWS = 12
+DEFAULT_MAX_BRANCHES = 6
+SHORT_ID = 7
+_MEMORY_MAX = 64
+
+TreeRow = Tuple[int, str, int]   # (Tiefe, Anzeige, Versionen) wie in measure_repo_block
+
+class GitError(RuntimeError):
+    pass
+
+class GitRepoReader:
+    """git-Aufrufe gegen ein Repository (Pfad zum Working Tree oder bare Repo)."""
+
+    def __init__(self, path: str, git: str = "git"):
+        self.path = os.path.abspath(path)
+        self.git = git
+
+    def _cmd(self, *args) -> List[str]:
+        return [self.git, "-C", self.path, "-c", "core.quotepath=off", *args]
+
+    def run(self, *args) -> str:
+        try:
+            return subprocess.run(self._cmd(*args), check=True, capture_output=True, text=True,
+                                  encoding="utf-8").stdout
+        except FileNotFoundError:
+            raise GitError(f"git nicht gefunden ({self.git})") from None
+        except subprocess.CalledProcessError as e:
+            raise GitError(f"git {' '.join(args)} in {self.path}: {e.stderr.strip()}") from None
+
+    def stream(self, *args) -> Iterator[str]:
+        """Ausgabe zeilenweise, ohne sie ganz zu puffern; Abbruch beendet git."""
+        proc = subprocess.Popen(self._cmd(*args), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                text=True, encoding="utf-8")
+        try:
+            for line in proc.stdout:
+                yield line.rstrip("\n")
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+            err = proc.stderr.read()
+            proc.stderr.close()
+            if proc.wait() not in (0, -9) and err:
+                raise GitError(f"git {' '.join(args)} in {self.path}: {err.strip()}")
+
+    # ---------- Refs ----------
+    def refs(self, ref: str = "HEAD") -> Tuple[str, Optional[str], Dict[str, str]]:
+        """(OID von ref, Branch von ref oder None, {Branch: OID}) – zwei git-Aufrufe."""
+        try:
+            oid = self.run("rev-parse", "--verify", "-q", ref + "^{commit}").strip()
+        except GitError:
+            oid = ""
+        if not oid:
+            raise GitError(f"Ref '{ref}' nicht gefunden in {self.path}")
+        heads, current = {}, None
+        for line in self.run("for-each-ref", "--format=%(HEAD)%(objectname) %(refname:short)",
+                             "refs/heads").splitlines():
+            o, name = line[1:].split(" ", 1)
+            heads[name] = o
+            if line[0] == "*":
+                current = name
+        branch = current if ref == "HEAD" else (ref if ref in heads else None)
+        return oid, branch, heads
+
+    # ---------- Commits ----------
+    def log(self, oid: str, n: int) -> Tuple[List[Tuple[str, List[str]]], Counter]:
+        """Letzte n Commits ab oid (neu -> alt) als (OID, Eltern-OIDs) + Anzahl Änderungen je Pfad."""
+        commits: List[Tuple[str, List[str]]] = []
+        touched: Counter = Counter()
+        for line in self.stream("log", f"-n{n}", "--format=\x01%H %P", "--name-only", oid, "--"):
+            if line.startswith("\x01"):
+                ids = line[1:].split()
+                commits.append((ids[0], ids[1:]))
+            elif line:
+                touched[line] += 1
+        return commits, touched
+
+    # ---------- Baum ----------
+    def tree_rows(self, oid: str, depth: int, max_rows: int, touched: Counter) -> List[TreeRow]:
+        """Dateibaum von oid bis Tiefe depth (Verzeichnisse zuerst), höchstens max_rows Zeilen.
+        Geschwister haben Vorrang vor Unterverzeichnissen (Rest-Budget wird nach unten gereicht),
+        abgeschnittene Ebenen enden mit "… +N". Versionen einer Datei = Änderungen in den
+        gelesenen Commits (mind. 1)."""
+        proc = subprocess.Popen(self._cmd("cat-file", "--batch"), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+        oid_len = len(oid) // 2   # SHA-1: 20 Bytes, SHA-256: 32 Bytes
+
+        def read_tree(spec: str) -> List[Tuple[bool, str, str]]:
+            proc.stdin.write(spec.encode("utf-8") + b"\n")
+            proc.stdin.flush()
+            header = proc.stdout.readline().split()
+            if len(header) < 3 or header[1] != b"tree":
+                raise GitError(f"kein Baum: {spec} ({b' '.join(header).decode(errors='replace')})")
+            data = proc.stdout.read(int(header[2]))
+            proc.stdout.read(1)   # abschließendes LF
+            entries, i = [], 0
+            while i < len(data):
+                sp = data.index(b" ", i)
+                nul = data.index(b"\0", sp)
+                mode = data[i:sp]
+                name = data[sp+1:nul].decode("utf-8", errors="replace")
+                entries.append((mode == b"40000", name, data[nul+1:nul+1+oid_len].hex()))
+                i = nul + 1 + oid_len
+            entries.sort(key=lambda e: (not e[0], e[1].lower()))
+            return entries
+
+        def walk(spec: str, d: int, prefix: str, budget: int) -> List[TreeRow]:
+            entries = read_tree(spec)
+            more = 0
+            if len(entries) > budget:
+                more = len(entries) - (budget - 1)
+                entries = entries[:budget - 1]
+            rows: List[TreeRow] = []
+            spare = budget - len(entries) - (1 if more else 0)
+            for is_dir, name, child in entries:
+                if is_dir:
+                    rows.append((d, name + "/", 0))
+                    if d < depth and spare > 0:
+                        sub = walk(child, d + 1, prefix + name + "/", spare)
+                        rows.extend(sub)
+                        spare -= len(sub)
+                else:
+                    rows.append((d, name, max(1, touched.get(prefix + name, 0))))
+            if more:
+                rows.append((d, f"… +{more}", 0))
+            return rows
+        try:
+            rows = walk(f"{oid}^{{tree}}", 1, "", max(1, max_rows))
+        finally:
+            proc.stdin.close()
+            proc.stdout.close()
+            proc.stderr.close()
+            proc.wait()
+        return rows
+
+# ---------- Zustand + Cache ----------
+_MEMORY: "OrderedDict[str, Dict]" = OrderedDict()
+
+def _cache_dir() -> Optional[str]:
+    return os.environ.get("GIT_DIAGRAM_GIT_CACHE") or None
+
+def state_key(path: str, oid: str, branch: Optional[str], heads: Dict[str, str], opts: Dict) -> str:
+    return canonical_hash([GIT_CACHE_VERSION, os.path.abspath(path), oid, branch, heads, opts])
+
+def repo_fingerprint(path: str, ref: str = "HEAD", git: str = "git") -> str:
+    """Hash über ref -> OID und alle Branch-OIDs (für Build-Manifeste, ohne Commits zu lesen)."""
+    oid, branch, heads = GitRepoReader(path, git).refs(ref)
+    return canonical_hash([oid, branch, heads])
+
+def read_repo(path: str, commits: int = DEFAULT_COMMITS, depth: int = DEFAULT_DEPTH, ref: str = "HEAD",
+              max_rows: int = DEFAULT_MAX_ROWS, max_branches: int = DEFAULT_MAX_BRANCHES,
+              git: str = "git") -> Dict:
+    """{"commits": [alt -> neu, mit "parents"/"refs"], "branches": [aktueller zuerst], "tree": [[Tiefe, Name, Versionen]],
+    "head": OID}; gecacht je Ref-Stand, ohne die ganze Historie zu laden."""
+    reader = GitRepoReader(path, git)
+    oid, branch, heads = reader.refs(ref)
+    opts = {"commits": commits, "depth": depth, "max_rows": max_rows, "max_branches": max_branches}
+    key = state_key(path, oid, branch, heads, opts)
+    state = _MEMORY.get(key)
+    if state is not None:
+        _MEMORY.move_to_end(key)
+        return state
+    cdir = _cache_dir()
+    cfile = os.path.join(cdir, f"{key}.json") if cdir else None
+    if cfile and os.path.exists(cfile):
+        try:
+            with open(cfile, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+    if state is None:
+        state = _read_state(reader, oid, branch, heads, opts)
+        if cfile:
+            os.makedirs(cdir, exist_ok=True)
+            with open(cfile + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(cfile + ".tmp", cfile)
+    _MEMORY[key] = state
+    if len(_MEMORY) > _MEMORY_MAX:
+        _MEMORY.popitem(last=False)
+    return state
+
+def _read_state(reader: GitRepoReader, oid: str, branch: Optional[str], heads: Dict[str, str], opts: Dict) -> Dict:
+    log, touched = reader.log(oid, opts["commits"])
+    window = {c for c, _ in log}
+    refs_at: Dict[str, List[str]] = {}
+    for name, o in heads.items():
+        refs_at.setdefault(o, []).append(name)
+    if branch is None:
+        refs_at.setdefault(oid, []).append("HEAD")
+    commits = []
+    for c, parents in reversed(log):   # alt -> neu
+        entry = {"id": c[:SHORT_ID], "type": "merge" if len(parents) > 1 else "commit",
+                 "parents": [p[:SHORT_ID] for p in parents if p in window]}
+        if c in refs_at:
+            entry["refs"] = sorted(refs_at[c])
+        commits.append(entry)
+    names = sorted(heads, key=lambda b: (b != branch, b))
+    return {"head": oid, "commits": commits, "branches": names[:opts["max_branches"]] or ["HEAD"],
+            "tree": [list(r) for r in reader.tree_rows(oid, opts["depth"], opts["max_rows"], touched)]}
+
+def spec_state(spec: Dict) -> Dict:
+    """Repo-Spec der Config mit "git": Pfad -> Zustand (Optionen "ref", "commits", "depth", "max_rows")."""
+    return read_repo(spec["git"], commits=spec.get("commits", DEFAULT_COMMITS) if isinstance(spec.get("commits"), int)
+                     else DEFAULT_COMMITS, depth=spec.get("depth", DEFAULT_DEPTH), ref=spec.get("ref", "HEAD"),
+                     max_rows=spec.get("max_rows", DEFAULT_MAX_ROWS),
+                     max_branches=spec.get("max_branches", DEFAULT_MAX_BRANCHES))
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Repo-Zustand für Diagramme aus einem lokalen Git-Repository lesen")
+    ap.add_argument("path", help="Working Tree oder bare Repository")
+    ap.add_argument("--ref", default="HEAD")
+    ap.add_argument("--commits", type=int, default=DEFAULT_COMMITS, help="letzte N Commits")
+    ap.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="Baumtiefe")
+    ap.add_argument("--max-rows", type=int, default=DEFAULT_MAX_ROWS)
+    ap.add_argument("--repeat", type=int, default=1, help="mehrfach lesen (zeigt Cache-Treffer)")
+    args = ap.parse_args(argv)
+    for i in range(args.repeat):
+        t0 = time.perf_counter()
+        state = read_repo(args.path, args.commits, args.depth, args.ref, args.max_rows)
+        print(f"Lauf {i+1}: {(time.perf_counter()-t0)*1000:.1f} ms", file=sys.stderr)
+    json.dump(state, sys.stdout, ensure_ascii=False, indent=1)
+    print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# git_diagram_golden.py
+# - Golden-Prüfung: alle Befehle × Config-Varianten (wie batch), optimierte Ausgabe, Zielbreiten,
+#   synthetische DAG-Historien und eine Schrittfolge; SHA-256 je SVG in git_diagram_golden.json
+# - immer mit dem Tabellen-Backend (Metriken ohne Pillow/Fonts, auf jeder Maschine gleich)
+# - Refactorings am Renderer müssen byte-identische SVGs liefern: python git_diagram_golden.py
+# - bewusste Ausgabeänderung: --update (und RENDERER_VERSION erhöhen)
+# - Golden-Korpus: kanonische SVGs (--canonical) aller Befehle × Config-Varianten als Dateien in
+#   git_diagram_golden/ (Layout wie batch --out); Abweichungen mit Struktur-Diff (git_diagram_svgdiff)
+# - --batch N: Korpus zusätzlich über git_diagram_batch (N Worker, gestreamte Dateiausgabe) rendern
+#   und byte-genau vergleichen – prüft Caches, Parallelität und Streaming gegen denselben Korpus
+
+import argparse, contextlib, copy, glob, hashlib, io, json, os, sys, tempfile
+from typing import Callable, Dict, List
+
+import render_clone_svg as r
+from git_diagram_batch import config_variants, plan_jobs
+from git_diagram_dag import synthetic_history
+from git_diagram_metrics import set_backend
+from git_diagram_svg import DEFAULT_PRECISION
+from git_diagram_svgdiff import format_diff, structural_diff
+
+GOLDEN = "git_diagram_golden.json"
+GOLDEN_VERSION = 1
+MATRIX = "git_diagram_config_matrix.json"
+CORPUS = "git_diagram_golden"
+CANONICAL = {"canonical": True}
+DIFF_LIMIT = 8   # Struktur-Diff-Zeilen je abweichendem Fall
+SEQUENCE = ["clone", "commit", "push", "fetch"]
+WIDTHS = {"": 1600, "longpath": 1400, "three-repos": 2000}   # Variante -> TargetWidth
+
+# ---------- Fälle ----------
+def cases(fonts: Dict) -> Dict[str, Callable[[], str]]:
+    """Name -> Funktion, die das SVG als String liefert."""
+    out: Dict[str, Callable[[], str]] = {}
+    variants = config_variants([r.CFG], MATRIX)
+    for job in plan_jobs([c["id"] for c in r.load_json(r.COMMANDS)], variants):
+        out[job["name"]] = lambda job=job: r.build_diagram(job["cfg"], job["scene"], fonts)[0]
+    widths = [(f"width{WIDTHS[name]}" + (f"-{name}" if name else ""), r.with_target_width(cfg, WIDTHS[name]))
+              for name, cfg in variants if name in WIDTHS]
+    for job in plan_jobs(["clone", "fetch"], widths):
+        out[job["name"]] = lambda job=job: r.build_diagram(job["cfg"], job["scene"], fonts)[0]
+    cfg = r.load_json(r.CFG)
+    scenes = {cid: r.scene_for(cid, r.load_json(r.COMMANDS), r.load_json(r.SCENES)) for cid in ("clone", "fetch")}
+    optimized = {"optimize": True, "precision": DEFAULT_PRECISION}
+    out["optimize/clone"] = lambda: r.build_diagram(cfg, scenes["clone"], fonts, output=optimized)[0]
+    for n, collapse in ((40, 0), (1000, 0), (10000, 6)):
+        dag_cfg = copy.deepcopy(cfg)
+        dag_cfg["ThirdRepo"] = {"title": "History", "commits": synthetic_history(n, 4, 7), "collapse": collapse}
+        out[f"dag/{n}" + (f"-collapse{collapse}" if collapse else "")] = \
+            lambda c=dag_cfg: r.build_diagram(c, scenes["fetch"], fonts)[0]
+
+    def sequence():
+        import git_diagram_sequence as seq
+        buf = io.StringIO()
+        seq.write_animated_svg(buf, seq.build_sequence(SEQUENCE, cfg, fonts)[1], seq.DEFAULT_STEP_SECONDS)
+        return buf.getvalue()
+    out["sequence/" + "_".join(SEQUENCE)] = sequence
+    return out
+
+def corpus_jobs(out_dir: str = CORPUS) -> List[Dict]:
+    """Kanonische Jobs aller Befehle × Config-Varianten; "out" ist die Korpus-Datei."""
+    variants = config_variants([r.CFG], MATRIX)
+    return plan_jobs([c["id"] for c in r.load_json(r.COMMANDS)], variants, out_dir, CANONICAL)
+
+def digest(svg: str) -> str:
+    return hashlib.sha256(svg.encode("utf-8")).hexdigest()
+
+def read_text(path: str):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+def write_text(path: str, text: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+def report_diff(name: str, expected, actual) -> str:
+    """Zustand eines abweichenden Korpus-Falls plus die ersten Zeilen des Struktur-Diffs."""
+    if expected is None or actual is None:
+        return f"{'neu' if expected is None else 'fehlt':9s} {name}"
+    return f"{'geändert':9s} {name}\n" + format_diff(["    " + x for x in structural_diff(expected, actual)], DIFF_LIMIT)
+
+# ---------- Korpus ----------
+def check_corpus(fonts: Dict, update: bool = False) -> List[str]:
+    """Kanonische SVGs gegen die Korpus-Dateien; --update schreibt sie neu (veraltete Dateien entfallen).
+    Liefert die Namen abweichender Fälle."""
+    jobs = corpus_jobs()
+    failed = []
+    for job in jobs:
+        svg = r.build_diagram(job["cfg"], job["scene"], fonts, output=CANONICAL)[0]
+        expected = read_text(job["out"])
+        if update:
+            if svg != expected:
+                write_text(job["out"], svg)
+        elif svg != expected:
+            failed.append(job["name"])
+            print(report_diff("canonical/" + job["name"], expected, svg))
+    if update:
+        keep = {os.path.normpath(j["out"]) for j in jobs}
+        for path in glob.glob(os.path.join(CORPUS, "**", "*.svg"), recursive=True):
+            if os.path.normpath(path) not in keep:
+                os.remove(path)
+        print(f"Wrote {CORPUS}/  ({len(jobs)} Dateien)")
+    return failed
+
+def check_batch(workers: int) -> List[str]:
+    """Korpus über git_diagram_batch (Prozess-Pool, Dateiausgabe) in ein Temp-Verzeichnis rendern
+    und byte-genau mit den Korpus-Dateien vergleichen."""
+    import git_diagram_batch as batch
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        argv = ["--canonical", "--config", r.CFG, "--matrix", MATRIX, "--out", tmp, "-j", str(workers)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            batch.main(argv)
+        for job, ref in zip(corpus_jobs(tmp), corpus_jobs()):
+            actual, expected = read_text(job["out"]), read_text(ref["out"])
+            if actual != expected:
+                failed.append(job["name"])
+                print(report_diff(f"batch-j{workers}/" + job["name"], expected, actual))
+    return failed
+
+# ---------- Ablauf ----------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="SVG-Ausgabe gegen die Golden-Hashes prüfen")
+    ap.add_argument("--update", action="store_true", help="Golden-Hashes neu schreiben")
+    ap.add_argument("--dump", metavar="DIR", help="abweichende SVGs nach DIR schreiben")
+    ap.add_argument("--golden", default=GOLDEN, help="Golden-Datei")
+    ap.add_argument("--batch", type=int, metavar="N", help="Korpus zusätzlich über batch mit N Workern prüfen")
+    args = ap.parse_args(argv)
+    set_backend("table")
+    fonts = r.load_fonts()
+    corpus_failed = check_corpus(fonts, args.update)
+    corpus_n = len(corpus_jobs())
+    actual = {}
+    svgs = {}
+    for name, build in cases(fonts).items():
+        svgs[name] = build()
+        actual[name] = digest(svgs[name])
+
+    if args.update:
+        with open(args.golden, "w", encoding="utf-8") as f:
+            json.dump({"version": GOLDEN_VERSION, "metrics": "table", "cases": actual}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Wrote {args.golden}  ({len(actual)} Fälle)")
+        return 0
+    batch_failed = check_batch(args.batch) if args.batch else []
+
+    expected = r.load_json(args.golden)["cases"]
+    failed = sorted(n for n in actual.keys() | expected.keys() if actual.get(n) != expected.get(n))
+    for name in failed:
+        state = "fehlt" if name not in actual else ("neu" if name not in expected else "geändert")
+        print(f"{state:9s} {name}")
+        if args.dump and name in svgs:
+            path = os.path.join(args.dump, name.replace("/", "__") + ".svg")
+            os.makedirs(args.dump, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(svgs[name])
+    print(f"{len(actual) - len(failed)}/{len(actual)} Fälle identisch, "
+          f"Korpus {corpus_n - len(corpus_failed)}/{corpus_n}"
+          + (f", batch -j{args.batch} {corpus_n - len(batch_failed)}/{corpus_n}" if args.batch else ""))
+    return 1 if failed or corpus_failed or batch_failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+# git_diagram_html.py
+# - HTML-Ausgabe (--format html) für sehr große Diagramme: interaktiver Viewer in einer Datei
+# - SceneWriter: nimmt die Zeichenprimitiven der draw_*-Funktionen entgegen (Markup + Bounding-Box je
+#   Element) und die Trefferflächen aus region() (repo, panel, file, ref, commit, arrow) – Geometrie aus
+#   measure/place, kein SVG-Parse
+# - GridIndex: gleichmäßiges Raster (Zellen à GRID_CELL px) über Elemente und Trefferflächen;
+#   Python-seitig für Abfragen/Prüfungen, im Viewer dieselbe Struktur als JSON
+# - Viewer: nur Elemente der sichtbaren Zellen (plus Rand) im DOM, beim Scrollen/Zoomen nachgeladen bzw.
+#   entfernt (Zeichenreihenfolge bleibt erhalten); Klick auf Commit/Datei/Ref zeigt die Details
+
+import json, os, re
+from typing import Dict, List, Optional, Tuple
+
+from git_diagram_svg import SvgWriter, format_element
+
+GRID_CELL = 256          # Zellgröße des Rasters in SVG-px
+TEXT_ADVANCE = 0.62      # geschätzte Zeichenbreite je font-size (nur Sichtbarkeit, großzügig gerundet)
+_NUM = re.compile(r"-?\d+(?:\.\d+)?")
+
+Bounds = Tuple[float, float, float, float]   # x0, y0, x1, y1
+
+# ---------- Geometrie ----------
+def element_bounds(tag: str, a: Dict, text: Optional[str]) -> Bounds:
+    """Bounding-Box eines Elements aus seinen Attributen (Strichbreite eingerechnet)."""
+    sw = float(a.get("stroke-width") or 0) / 2
+    if tag == "rect":
+        x, y = float(a["x"]), float(a["y"])
+        return x - sw, y - sw, x + float(a["width"]) + sw, y + float(a["height"]) + sw
+    if tag == "circle":
+        cx, cy, r = float(a["cx"]), float(a["cy"]), float(a["r"]) + sw
+        return cx - r, cy - r, cx + r, cy + r
+    if tag == "line":
+        x1, y1, x2, y2 = (float(a[k]) for k in ("x1", "y1", "x2", "y2"))
+        return min(x1, x2) - sw, min(y1, y2) - sw, max(x1, x2) + sw, max(y1, y2) + sw
+    if tag == "text":
+        x, y, fs = float(a["x"]), float(a["y"]), float(a.get("font-size", 16))
+        tw = len(text or "") * fs * TEXT_ADVANCE
+        x0 = x - {"middle": tw / 2, "end": tw}.get(a.get("text-anchor"), 0)
+        return x0, y - fs, x0 + tw, y + fs * 0.3
+    nums = [float(v) for v in _NUM.findall(a.get("d", ""))]
+    if len(nums) >= 2:
+        xs, ys = nums[0::2], nums[1::2]
+        return min(xs) - sw, min(ys) - sw, max(xs) + sw, max(ys) + sw
+    x, y = float(a.get("x", 0)), float(a.get("y", 0))
+    return x, y, x, y
+
+class GridIndex:
+    """Raster-Index: Zelle (cx, cy) -> Indizes aller Einträge, deren Box die Zelle berührt."""
+    __slots__ = ("cell", "cells")
+
+    def __init__(self, cell: int = GRID_CELL):
+        self.cell = cell
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+    def _span(self, x0, y0, x1, y1):
+        c = self.cell
+        return range(int(x0 // c), int(x1 // c) + 1), range(int(y0 // c), int(y1 // c) + 1)
+
+    def insert(self, i: int, box: Bounds):
+        cols, rows = self._span(*box)
+        cells = self.cells
+        for cx in cols:
+            for cy in rows:
+                cells.setdefault((cx, cy), []).append(i)
+
+    def query(self, x0, y0, x1, y1) -> List[int]:
+        """Einträge in den Zellen, die das Rechteck berührt (Kandidaten, aufsteigend)."""
+        cols, rows = self._span(x0, y0, x1, y1)
+        found = set()
+        for cx in cols:
+            for cy in rows:
+                found.update(self.cells.get((cx, cy), ()))
+        return sorted(found)
+
+    def to_json(self) -> Dict:
+        return {"cell": self.cell, "cells": {f"{cx},{cy}": ids for (cx, cy), ids in sorted(self.cells.items())}}
+
+def _data(data) -> Dict:
+    """Details einer Trefferfläche als JSON-Dict (Commit & Co. über __slots__, leere Werte entfallen)."""
+    if data is None:
+        return {}
+    if isinstance(data, dict):
+        return data
+    return {k: getattr(data, k) for k in type(data).__slots__ if getattr(data, k)}
+
+# ---------- Szene ----------
+class SceneWriter(SvgWriter):
+    """Sammelt statt zu schreiben: Elemente (Markup + Box) in Zeichenreihenfolge, Defs aus raw(),
+    Trefferflächen aus region(). Größe aus open("svg", ...)."""
+    regions = True
+
+    def __init__(self):
+        self.markup: List[str] = []
+        super().__init__(self)
+        self.bounds: List[Bounds] = []
+        self.defs: List[str] = []
+        self.hits: List[Tuple[str, Bounds, Dict]] = []
+        self.w = self.h = 0
+        self._depth = 0
+
+    def write(self, s: str):   # Senke für SvgWriter.element: ein Eintrag je Element, ohne Trenner
+        self.markup.append(s.lstrip("\n"))
+
+    def raw(self, markup: str):
+        self.defs.append(markup.strip())
+
+    def element(self, tag: str, attrs, text: Optional[str] = None):
+        attrs = tuple(attrs)
+        self.bounds.append(element_bounds(tag, {k: v for k, v in attrs if v is not None}, text))
+        super().element(tag, attrs, text)
+
+    def open(self, tag: str, attrs=()):
+        self._depth += 1
+        if tag == "svg" and self._depth == 1:
+            a = dict(attrs)
+            self.w, self.h = int(a["width"]), int(a["height"])
+        else:
+            raise ValueError(f"SceneWriter: nur ein <svg> auf oberster Ebene, nicht <{tag}>")
+
+    def close(self, tag: str):
+        self._depth -= 1
+
+    def region(self, kind: str, x, y, w, h, data=None):
+        self.hits.append((kind, (x, y, x + w, y + h), _data(data)))
+
+    def index(self, cell: int = GRID_CELL) -> Tuple[GridIndex, GridIndex]:
+        """(Index der Elemente, Index der Trefferflächen)."""
+        elements, hits = GridIndex(cell), GridIndex(cell)
+        for i, box in enumerate(self.bounds):
+            elements.insert(i, box)
+        for i, (_, box, _) in enumerate(self.hits):
+            hits.insert(i, box)
+        return elements, hits
+
+    def hit(self, x, y, hits: GridIndex = None) -> List[Tuple[str, Bounds, Dict]]:
+        """Trefferflächen unter (x, y), kleinste (spezifischste) zuerst – wie der Klick im Viewer."""
+        ids = (hits or self.index()[1]).query(x, y, x, y)
+        found = [self.hits[i] for i in ids
+                 if self.hits[i][1][0] <= x <= self.hits[i][1][2] and self.hits[i][1][1] <= y <= self.hits[i][1][3]]
+        return sorted(found, key=lambda h: (h[1][2] - h[1][0]) * (h[1][3] - h[1][1]))
+
+    def scene_json(self, cell: int = GRID_CELL) -> Dict:
+        elements, hits = self.index(cell)
+        r2 = lambda v: round(v, 2)
+        return {"w": self.w, "h": self.h, "defs": "\n".join(self.defs), "markup": self.markup,
+                "bounds": [list(map(r2, b)) for b in self.bounds], "grid": elements.to_json(),
+                "hits": [[kind, list(map(r2, box)), data] for kind, box, data in self.hits],
+                "hitGrid": hits.to_json()}
+
+# ---------- HTML ----------
+def _script_json(data: Dict) -> str:
+    """JSON für <script type="application/json">: "</" maskiert, damit kein </script> entsteht."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+def write_html(sink, scene: SceneWriter, title: str = "Git-Diagramm"):
+    """Viewer-Seite mit eingebetteter Szene nach sink (.write(str))."""
+    sink.write(HTML_TEMPLATE.replace("__TITLE__", format_element("title", (), title)).replace("__SCENE__", _script_json(scene.scene_json())))
+
+def write_html_file(path: str, scene: SceneWriter, title: str):
+    """Atomar über path.tmp wie write_svg_file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            write_html(f, scene, title)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="de">
+<head>
+<meta charset="utf-8">
+__TITLE__
+<style>
+html, body { margin: 0; height: 100%; font: 13px Segoe UI, Arial, sans-serif; }
+#bar { position: absolute; top: 0; left: 0; right: 320px; height: 32px; display: flex; gap: 6px;
+       align-items: center; padding: 0 8px; border-bottom: 1px solid #ddd; background: #fafafa; }
+#view { position: absolute; top: 33px; left: 0; right: 320px; bottom: 0; overflow: auto; background: #fff; }
+#info { position: absolute; top: 0; right: 0; width: 319px; bottom: 0; overflow: auto; border-left: 1px solid #ddd;
+        padding: 8px; box-sizing: border-box; background: #fcfcfc; }
+#info h3 { margin: 4px 0; font-size: 14px; }
+#info table { border-collapse: collapse; margin-bottom: 10px; }
+#info td { padding: 1px 6px 1px 0; vertical-align: top; }
+#info td:first-child { color: #666; }
+#status { margin-left: auto; color: #666; }
+#sel { fill: rgba(30, 120, 255, 0.08); stroke: #1E78FF; stroke-width: 2; pointer-events: none; }
+</style>
+</head>
+<body>
+<div id="bar"><button id="zout">−</button><button id="zin">+</button><button id="zfit">Einpassen</button>
+<span id="zoom"></span><span id="status"></span></div>
+<div id="view"><svg id="canvas" xmlns="http://www.w3.org/2000/svg"><g id="defs"></g><g id="layer"></g><rect id="sel" width="0" height="0"/></svg></div>
+<div id="info"><p>Commit, Datei oder Branch anklicken.</p></div>
+<script type="application/json" id="scene">__SCENE__</script>
+<script>
+"use strict";
+const S = JSON.parse(document.getElementById("scene").textContent);
+const view = document.getElementById("view"), svg = document.getElementById("canvas");
+const layer = document.getElementById("layer"), sel = document.getElementById("sel");
+const NS = "http://www.w3.org/2000/svg";
+document.getElementById("defs").innerHTML = S.defs;
+svg.setAttribute("viewBox", `0 0 ${S.w} ${S.h}`);
+let zoom = 1;
+const mounted = new Map();   // Element-Index -> DOM-Knoten
+let order = [];              // eingehängte Indizes, aufsteigend (= Zeichenreihenfolge)
+
+function query(grid, x0, y0, x1, y1) {
+  const c = grid.cell, out = new Set();
+  for (let cx = Math.floor(x0 / c); cx <= Math.floor(x1 / c); cx++)
+    for (let cy = Math.floor(y0 / c); cy <= Math.floor(y1 / c); cy++)
+      for (const i of grid.cells[cx + "," + cy] || []) out.add(i);
+  return out;
+}
+function lowerBound(a, v) {
+  let lo = 0, hi = a.length;
+  while (lo < hi) { const m = (lo + hi) >> 1; if (a[m] < v) lo = m + 1; else hi = m; }
+  return lo;
+}
+function visibleRect() {
+  const m = S.grid.cell / 2;   // Rand: beim Scrollen schon geladen
+  return [view.scrollLeft / zoom - m, view.scrollTop / zoom - m,
+          (view.scrollLeft + view.clientWidth) / zoom + m, (view.scrollTop + view.clientHeight) / zoom + m];
+}
+function update() {
+  const [x0, y0, x1, y1] = visibleRect();
+  const want = new Set();
+  for (const i of query(S.grid, x0, y0, x1, y1)) {
+    const b = S.bounds[i];
+    if (b[2] >= x0 && b[0] <= x1 && b[3] >= y0 && b[1] <= y1) want.add(i);
+  }
+  for (const [i, node] of mounted) if (!want.has(i)) { node.remove(); mounted.delete(i); }
+  order = order.filter(i => mounted.has(i));
+  const add = [...want].filter(i => !mounted.has(i)).sort((a, b) => a - b);
+  if (add.length) {
+    const tmp = document.createElementNS(NS, "g");
+    tmp.innerHTML = add.map(i => S.markup[i]).join("");
+    const nodes = [...tmp.children];
+    add.forEach((i, k) => {
+      const pos = lowerBound(order, i);
+      layer.insertBefore(nodes[k], pos < order.length ? mounted.get(order[pos]) : null);
+      order.splice(pos, 0, i);
+      mounted.set(i, nodes[k]);
+    });
+  }
+  document.getElementById("status").textContent = `${mounted.size} / ${S.markup.length} Elemente im DOM`;
+}
+let pending = false;
+function schedule() { if (!pending) { pending = true; requestAnimationFrame(() => { pending = false; update(); }); } }
+function setZoom(z, cx, cy) {
+  cx = cx ?? view.clientWidth / 2; cy = cy ?? view.clientHeight / 2;
+  const px = (view.scrollLeft + cx) / zoom, py = (view.scrollTop + cy) / zoom;
+  zoom = Math.min(8, Math.max(0.02, z));
+  svg.setAttribute("width", S.w * zoom); svg.setAttribute("height", S.h * zoom);
+  view.scrollLeft = px * zoom - cx; view.scrollTop = py * zoom - cy;
+  document.getElementById("zoom").textContent = Math.round(zoom * 100) + " %";
+  schedule();
+}
+function fit() { setZoom(Math.min(1, view.clientWidth / S.w)); }
+function show(hit) {
+  const [kind, b, data] = hit;
+  const rows = Object.entries(data).map(([k, v]) =>
+    `<tr><td>${k}</td><td>${String(Array.isArray(v) ? v.join(", ") : v).replace(/[&<>]/g, c => ({"&": "&amp;", "<": "&lt;", ">": "&gt;"})[c])}</td></tr>`);
+  return `<h3>${kind}</h3><table>${rows.join("")}</table>`;
+}
+svg.addEventListener("click", e => {
+  const r = svg.getBoundingClientRect(), x = (e.clientX - r.left) / zoom, y = (e.clientY - r.top) / zoom;
+  const hits = [...query(S.hitGrid, x, y, x, y)].map(i => S.hits[i])
+    .filter(h => h[1][0] <= x && x <= h[1][2] && h[1][1] <= y && y <= h[1][3])
+    .sort((a, b) => (a[1][2] - a[1][0]) * (a[1][3] - a[1][1]) - (b[1][2] - b[1][0]) * (b[1][3] - b[1][1]));
+  const info = document.getElementById("info");
+  if (!hits.length) { info.innerHTML = "<p>Nichts getroffen.</p>"; sel.setAttribute("width", 0); return; }
+  const b = hits[0][1];
+  sel.setAttribute("x", b[0]); sel.setAttribute("y", b[1]);
+  sel.setAttribute("width", b[2] - b[0]); sel.setAttribute("height", b[3] - b[1]);
+  info.innerHTML = hits.map(show).join("");   // spezifischste zuerst, dann umgebende Panels/Repos
+});
+view.addEventListener("scroll", schedule);
+window.addEventListener("resize", schedule);
+view.addEventListener("wheel", e => {
+  if (!e.ctrlKey) return;
+  e.preventDefault();
+  const r = view.getBoundingClientRect();
+  setZoom(zoom * (e.deltaY < 0 ? 1.25 : 0.8), e.clientX - r.left, e.clientY - r.top);
+}, {passive: false});
+document.getElementById("zin").onclick = () => setZoom(zoom * 1.25);
+document.getElementById("zout").onclick = () => setZoom(zoom * 0.8);
+document.getElementById("zfit").onclick = fit;
+setZoom(1);
+</script>
+</body>
+</html>
+"""
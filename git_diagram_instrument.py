@@ -0,0 +1,194 @@
+# git_diagram_instrument.py
+# - Messpunkte für den Renderer: Zähler, Zeiten je Funktion (gesamt + ohne Unteraufrufe),
+#   Cache-Treffer (Text-Metriken, Layout-Engine), Elemente je Diagramm (gesamt und je Tag)
+# - ausgeschaltet kein Overhead: install() ersetzt die Funktionen im Modul erst beim Einschalten
+#   durch Hüllen (Aufrufe im Renderer gehen über Modul-Globals), uninstall() stellt sie wieder her
+# - record(name): Bericht je Render (JSON-fähig); aggregate() fasst Berichte eines Batches zusammen
+# - Aufrufe außerhalb von record() (z.B. Fonts beim Worker-Start) landen im Setup-Bericht (take_setup)
+
+import json, os, time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+REPORT_VERSION = 1
+
+# Zeitmessung je Funktion im Renderer (Name im Modul render_clone_svg)
+TIMED = [
+    "load_font", "measure_text", "wrap_text", "break_lines", "shorten_middle",
+    "measure_table", "measure_history", "measure_repo_block", "measure_cmd_panel", "layout_dag",
+    "bind_ast", "git_repo_data", "layout_diagram", "diagram_inputs",
+    "draw_table", "draw_history", "draw_dag", "draw_repo_block", "draw_cmd_panel", "draw_diagram",
+    "write_svg_file", "write_raster_file", "raster_file", "copy_atomic",
+]
+
+class Report:
+    """Zeiten [Aufrufe, gesamt s, ohne Unteraufrufe s] je Name und Zähler eines Renders."""
+    __slots__ = ("name", "timers", "counters", "seconds")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timers: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.seconds = 0.0
+
+    def count(self, key: str, n: int = 1):
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "ms": round(self.seconds*1e3, 3),
+                "timers": {k: {"calls": int(c), "ms": round(t*1e3, 3), "self_ms": round(s*1e3, 3)}
+                           for k, (c, t, s) in sorted(self.timers.items(), key=lambda kv: -kv[1][2])},
+                "counters": dict(sorted(self.counters.items()))}
+
+_setup = Report("setup")
+_current = _setup
+_stack: List[List[float]] = []   # je offenem Aufruf: Zeit der Unteraufrufe
+_saved: Dict[tuple, object] = {}
+_renderer = None   # Renderer-Modul mit Messpunkten (als Skript gestartet: __main__)
+
+def enabled() -> bool:
+    return bool(_saved)
+
+# ---------- Hüllen ----------
+def _timed(name: str, fn):
+    clock = time.perf_counter
+
+    def wrapper(*args, **kw):
+        _stack.append([0.0])
+        t0 = clock()
+        try:
+            return fn(*args, **kw)
+        finally:
+            dt = clock() - t0
+            child = _stack.pop()[0]
+            if _stack:
+                _stack[-1][0] += dt
+            t = _current.timers.get(name)
+            if t is None:
+                t = _current.timers[name] = [0, 0.0, 0.0]
+            t[0] += 1
+            t[1] += dt
+            t[2] += dt - child
+    wrapper.__wrapped__ = fn
+    wrapper.__name__ = getattr(fn, "__name__", name)
+    return wrapper
+
+def _counting_element(fn):
+    def element(self, tag, attrs, text=None):
+        _current.count("elements." + tag)
+        return fn(self, tag, attrs, text)
+    return element
+
+def _patch(owner, attr: str, value):
+    _saved.setdefault((owner, attr), getattr(owner, attr))
+    setattr(owner, attr, value)
+
+def install(renderer=None):
+    """Messpunkte einsetzen (idempotent); renderer: Modul, falls render_clone_svg als Skript läuft."""
+    global _renderer
+    if _saved:
+        return
+    if renderer is None:
+        import render_clone_svg as renderer
+    r = _renderer = renderer
+    from git_diagram_raster import RasterWriter
+    from git_diagram_svg import SvgWriter
+    for name in TIMED:
+        _patch(r, name, _timed(name, getattr(r, name)))
+    _patch(RasterWriter, "save", _timed("raster_save", RasterWriter.save))
+    _patch(SvgWriter, "element", _counting_element(SvgWriter.element))
+
+def uninstall():
+    for (owner, attr), value in _saved.items():
+        setattr(owner, attr, value)
+    _saved.clear()
+
+# ---------- Berichte ----------
+def _cache_counters() -> Dict[str, int]:
+    from git_diagram_metrics import METRICS_CACHE
+    engines = list(_renderer._ENGINES.values())
+    return {"metrics_cache.hits": METRICS_CACHE.hits, "metrics_cache.misses": METRICS_CACHE.misses,
+            "layout_cache.hits": sum(e.hits for e in engines), "layout_cache.misses": sum(e.misses for e in engines)}
+
+@contextmanager
+def record(name: str):
+    """Bericht für alles, was im Block passiert; ohne install() ein leerer Bericht (nur Gesamtzeit)."""
+    global _current
+    rep, prev = Report(name), _current
+    before = _cache_counters() if _saved else {}
+    _current = rep
+    t0 = time.perf_counter()
+    try:
+        yield rep
+    finally:
+        rep.seconds = time.perf_counter() - t0
+        _current = prev
+        if _saved:
+            for k, v in _cache_counters().items():
+                rep.count(k, v - before.get(k, 0))
+            rep.count("elements", sum(v for k, v in rep.counters.items() if k.startswith("elements.")))
+            calls = rep.timers.get("measure_text")
+            if calls:
+                rep.count("measure_text.calls", int(calls[0]))
+
+def take_setup() -> Optional[Dict]:
+    """Bisheriger Setup-Bericht (Aufrufe außerhalb von record) oder None; setzt ihn zurück."""
+    global _setup, _current
+    if not _setup.timers and not _setup.counters:
+        return None
+    rep = _setup.to_dict()
+    fresh = Report("setup")
+    if _current is _setup:
+        _current = fresh
+    _setup = fresh
+    return rep
+
+def aggregate(reports: List[Dict]) -> Dict:
+    """Summe über Berichte (Zeiten, Aufrufe, Zähler) plus die langsamsten Renders."""
+    timers: Dict[str, Dict[str, float]] = {}
+    counters: Dict[str, int] = {}
+    for rep in reports:
+        for k, t in rep.get("timers", {}).items():
+            acc = timers.setdefault(k, {"calls": 0, "ms": 0.0, "self_ms": 0.0})
+            for f in acc:
+                acc[f] += t[f]
+        for k, v in rep.get("counters", {}).items():
+            counters[k] = counters.get(k, 0) + v
+    renders = [rep for rep in reports if rep.get("name") != "setup"]
+    return {"renders": len(renders), "ms": round(sum(rep["ms"] for rep in reports), 3),
+            "timers": {k: {f: round(v, 3) if f != "calls" else int(v) for f, v in t.items()}
+                       for k, t in sorted(timers.items(), key=lambda kv: -kv[1]["self_ms"])},
+            "counters": dict(sorted(counters.items())),
+            "slowest": [{"name": rep["name"], "ms": rep["ms"]} for rep in sorted(renders, key=lambda x: -x["ms"])[:10]]}
+
+def group_ms(reports: List[Dict], key) -> Dict[str, float]:
+    """Renderzeit summiert je key(name), z.B. je Config-Variante oder je Befehl; teuerste zuerst."""
+    out: Dict[str, float] = {}
+    for rep in reports:
+        if rep.get("name") != "setup":
+            k = key(rep["name"])
+            out[k] = out.get(k, 0.0) + rep["ms"]
+    return {k: round(v, 3) for k, v in sorted(out.items(), key=lambda kv: -kv[1])}
+
+def write_report(path: str, reports: List[Dict], **extra):
+    """JSON-Bericht: einzelne Renders + Summe (atomar via .tmp); extra z.B. Gruppierungen aus group_ms."""
+    data = {"version": REPORT_VERSION, "reports": reports, "total": aggregate(reports), **extra}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, ensure_ascii=False)
+        f.write("\n")
+    os.replace(path + ".tmp", path)
+
+def summary(total: Dict, top: int = 8) -> str:
+    """Kurzübersicht für die Konsole: teuerste Funktionen (ohne Unteraufrufe) und Cache-Quoten."""
+    lines = [f"{'Funktion':<20} {'Aufrufe':>8} {'gesamt ms':>10} {'selbst ms':>10}"]
+    for k, t in list(total["timers"].items())[:top]:
+        lines.append(f"{k:<20} {t['calls']:>8} {t['ms']:>10.1f} {t['self_ms']:>10.1f}")
+    c = total["counters"]
+    for cache in ("metrics_cache", "layout_cache"):
+        hits, misses = c.get(cache + ".hits", 0), c.get(cache + ".misses", 0)
+        if hits + misses:
+            lines.append(f"{cache}: {hits} Treffer, {misses} Fehlschläge ({hits/(hits+misses):.0%})")
+    if "elements" in c:
+        lines.append(f"Elemente: {c['elements']}")
+    return "\n".join(lines)
@@ -0,0 +1,133 @@
+# git_diagram_manifest.py
+# - inkrementeller Build: je Ausgabe ein Hash über alle Eingaben
+#     config, scene (Katalog-Eintrag + Szene), style library, AST-Template,
+#     Renderer-Version (+ Quelltext), Metrik-Backend (pillow: + Pillow-Version), Font-Dateien, Ausgabe-Optionen,
+#     Stand gelesener Git-Repositories (Ref -> OID)
+# - Manifest als JSON neben den Ausgaben (out/.build_manifest.json)
+# - Datei-Hashes werden per (Größe, mtime) im Manifest zwischengespeichert,
+#   ein No-op-Lauf liest also keine Font-Dateien erneut
+
+import hashlib, json, os
+from typing import Dict, List, Optional
+
+MANIFEST_NAME = ".build_manifest.json"
+MANIFEST_VERSION = 1
+
+STYLE_LIBRARY = "git_diagram_style_library.json"
+AST_TEMPLATE  = "git_diagram_ast_template.json"
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+# alle git_diagram_*-Module, die render_clone_svg (auch in Funktionen) importiert – geprüft von
+# test_git_diagram_manifest.py
+RENDERER_SOURCES = ["render_clone_svg.py", "git_diagram_model.py", "git_diagram_metrics.py", "git_diagram_svg.py",
+                    "git_diagram_dag.py", "git_diagram_raster.py", "git_diagram_gitrepo.py", "git_diagram_html.py",
+                    "git_diagram_instrument.py", "git_diagram_manifest.py"]
+
+def canonical_hash(obj) -> str:
+    """Stabiler Hash eines JSON-fähigen Objekts (sortierte Keys)."""
+    data = json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+class Manifest:
+    """Ausgabe -> Eingabe-Hash; dazu ein Cache der Datei-Hashes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.outputs: Dict[str, Dict] = {}
+        self.files: Dict[str, List] = {}
+        self.dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.outputs = data.get("outputs", {})
+                self.files = data.get("files", {})
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def for_dir(cls, out_dir: str) -> "Manifest":
+        return cls(os.path.join(out_dir or ".", MANIFEST_NAME))
+
+    def file_hash(self, path: Optional[str]) -> str:
+        """SHA-256 einer Datei; '' wenn sie fehlt. Wiederverwendet, solange Größe+mtime gleich sind."""
+        if not path:
+            return ""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return ""
+        cached = self.files.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.files[path] = [st.st_size, st.st_mtime_ns, digest]
+        self.dirty = True
+        return digest
+
+    @staticmethod
+    def _stamp(out: str):
+        try:
+            st = os.stat(out)
+        except OSError:
+            return None
+        return [st.st_size, st.st_mtime_ns]
+
+    def is_current(self, out: str, digest: str) -> bool:
+        """True, wenn out existiert, unverändert ist und mit denselben Eingaben gebaut wurde."""
+        rec = self.outputs.get(out)
+        return bool(rec) and rec.get("hash") == digest and rec.get("stamp") == self._stamp(out)
+
+    def record(self, out: str, digest: str, inputs: Dict[str, str]):
+        self.outputs[out] = {"hash": digest, "inputs": inputs, "stamp": self._stamp(out)}
+        self.dirty = True
+
+    def changed_inputs(self, out: str, inputs: Dict[str, str]) -> List[str]:
+        """Namen der Eingaben, die sich seit dem letzten Build geändert haben (für Logausgaben)."""
+        old = self.outputs.get(out, {}).get("inputs", {})
+        return sorted(k for k in set(old) | set(inputs) if old.get(k) != inputs.get(k))
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "outputs": self.outputs, "files": self.files},
+                      f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+def input_hashes(manifest: Manifest, cfg: Dict, scene: Dict, renderer_version: str,
+                 backend: str, font_files: List[str], output: Dict = None) -> Dict[str, str]:
+    """Einzel-Hashes aller Eingaben eines Diagramms; output (Ausgabe-Optionen) nur, wenn gesetzt."""
+    hashes = {
+        "config": canonical_hash(cfg),
+        "scene": canonical_hash(scene),
+        "style_library": manifest.file_hash(STYLE_LIBRARY),
+        "ast_template": manifest.file_hash(AST_TEMPLATE),
+        "renderer": canonical_hash([renderer_version] +
+                                   [manifest.file_hash(os.path.join(_HERE, s)) for s in RENDERER_SOURCES]),
+        "metrics_backend": canonical_hash(backend),
+        "fonts": canonical_hash([[p, manifest.file_hash(p)] for p in font_files]),
+    }
+    if backend == "pillow":   # Textmaße hängen an der Pillow-/FreeType-Version
+        hashes["pillow"] = canonical_hash(pillow_version())
+    if output:
+        hashes["output"] = canonical_hash(output)
+    return hashes
+
+def pillow_version() -> Optional[str]:
+    """PIL.__version__ (nur das Paket, ohne ImageFont zu laden); None ohne Pillow."""
+    try:
+        from PIL import __version__
+    except ImportError:
+        return None
+    return __version__
+
+def combined_hash(inputs: Dict[str, str]) -> str:
+    return canonical_hash(inputs)
@@ -0,0 +1,657 @@
+# git_diagram_metrics.py
+# - begrenzter LRU-Cache für Textmaße (Breite/Höhe) und Glyph-Advances
+# - Schlüssel: (Font-Pfad, Größe, Text, pad_right)
+# - optional als JSON auf Platte gespeichert, damit der Cache Läufe überlebt
+# - veraltete Einträge (Font-Datei geändert) werden beim Laden verworfen
+# - austauschbare Mess-Backends hinter measure_text:
+#     pillow : Referenz (FreeType via Pillow, optional)
+#     ttf    : reines Python, liest hmtx/glyf/kern einer TTF einmalig
+#     table  : vorberechnete Advance-/BBox-Tabelle (array-basiert, je Font+Größe)
+# - Pillow wird erst beim ersten Messen bzw. Cache-Schlüssel (geladene Datei) importiert (table/ttf nie);
+#   Fonts über eine Registry je (Backend, Kandidaten, Größe) nur einmal geladen
+
+import argparse, importlib.util, json, os, random, struct, sys, weakref
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Protocol, Tuple
+
+_IMAGEFONT = None
+
+def pillow_available() -> bool:
+    """Pillow installiert? (ohne es zu importieren)"""
+    return _IMAGEFONT is not None or importlib.util.find_spec("PIL") is not None
+
+def _imagefont():
+    """PIL.ImageFont beim ersten Bedarf importieren (Pillow ist nur noch Referenz-Backend)."""
+    global _IMAGEFONT
+    if _IMAGEFONT is None:
+        try:
+            from PIL import ImageFont
+        except ImportError:
+            raise RuntimeError("Backend 'pillow' benötigt Pillow (pip install pillow)") from None
+        _IMAGEFONT = ImageFont
+    return _IMAGEFONT
+
+DEFAULT_MAX_ENTRIES = 65536
+CACHE_FORMAT_VERSION = 1
+
+FontKey = Tuple[str, int]
+
+_FONT_KEYS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+def font_key(font) -> FontKey:
+    """(Pfad, Größe) eines Fonts; In-Memory-Fonts (load_default) bekommen einen Pseudo-Pfad."""
+    try:
+        return _FONT_KEYS[font]
+    except (KeyError, TypeError):
+        pass
+    path = getattr(font, "cache_path", None) or getattr(font, "path", None)
+    if not isinstance(path, str):
+        path = f"<{type(font).__name__}>"
+    key = (path, int(getattr(font, "size", 0) or 0))
+    try:
+        _FONT_KEYS[font] = key
+    except TypeError:
+        pass
+    return key
+
+def _font_fingerprint(path: str):
+    """Größe + mtime der Font-Datei; None für Pseudo-Pfade/fehlende Dateien.
+    Schlüssel: Pillow "<font>", ttf "ttf|<font>", table "table|<tabelle>|<font-name>" (-> Tabellendatei)."""
+    if path.startswith("<"):
+        return None
+    parts = path.split("|")
+    path = parts[1] if len(parts) > 1 else parts[0]   # Backend-Präfix und Font-Name entfernen
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+class TextMetricsCache:
+    """LRU-Cache für measure_text-Ergebnisse und einzelne Glyph-Advances."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._sizes: "OrderedDict[tuple, Tuple[int,int]]" = OrderedDict()
+        self._advances: "OrderedDict[tuple, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._sizes) + len(self._advances)
+
+    def clear(self):
+        self._sizes.clear()
+        self._advances.clear()
+        self.hits = self.misses = 0
+
+    def _lookup(self, table: OrderedDict, key, compute: Callable):
+        try:
+            val = table[key]
+        except KeyError:
+            self.misses += 1
+            val = compute()
+            table[key] = val
+            if len(table) > self.max_entries:
+                table.popitem(last=False)
+            return val
+        self.hits += 1
+        table.move_to_end(key)
+        return val
+
+    def text_size(self, font, text: str, pad_right: bool,
+                  compute: Callable[[], Tuple[int,int]]) -> Tuple[int,int]:
+        path, size = font_key(font)
+        return self._lookup(self._sizes, (path, size, text, bool(pad_right)), compute)
+
+    def advance(self, font, ch: str, compute: Callable[[], float]) -> float:
+        path, size = font_key(font)
+        return self._lookup(self._advances, (path, size, ch), compute)
+
+    # ---------- Persistenz ----------
+    def save(self, filename: str):
+        """Schreibt alle Einträge mit echtem Font-Pfad als JSON (atomar via .tmp)."""
+        fonts: Dict[str, list] = {}
+        def usable(path):
+            if path not in fonts:
+                fonts[path] = _font_fingerprint(path)
+            return fonts[path] is not None
+        sizes = [[p, s, t, int(pad), w, h] for (p, s, t, pad), (w, h) in self._sizes.items() if usable(p)]
+        advances = [[p, s, ch, a] for (p, s, ch), a in self._advances.items() if usable(p)]
+        data = {"version": CACHE_FORMAT_VERSION,
+                "fonts": {p: fp for p, fp in fonts.items() if fp is not None},
+                "sizes": sizes, "advances": advances}
+        d = os.path.dirname(filename)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = filename + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, filename)
+
+    def load(self, filename: str) -> int:
+        """Lädt einen gespeicherten Cache; gibt die Anzahl übernommener Einträge zurück."""
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if data.get("version") != CACHE_FORMAT_VERSION:
+            return 0
+        valid = {p for p, fp in data.get("fonts", {}).items() if _font_fingerprint(p) == fp}
+        n = 0
+        for p, s, t, pad, w, h in data.get("sizes", []):
+            if p in valid:
+                self._sizes[(p, s, t, bool(pad))] = (w, h)
+                n += 1
+        for p, s, ch, a in data.get("advances", []):
+            if p in valid:
+                self._advances[(p, s, ch)] = a
+                n += 1
+        for table in (self._sizes, self._advances):
+            while len(table) > self.max_entries:
+                table.popitem(last=False)
+        return n
+
+METRICS_CACHE = TextMetricsCache()
+
+def cache_file_from_env() -> Optional[str]:
+    """Pfad des persistenten Caches aus GIT_DIAGRAM_METRICS_CACHE (oder None)."""
+    return os.environ.get("GIT_DIAGRAM_METRICS_CACHE") or None
+
+# ---------- Arithmetische Fonts ----------
+# Nachbau von Pillows Basic-Layout (ohne raqm):
+#   Stift in 26.6-Einheiten, Glyph an round(pen) gesetzt,
+#   x-Bereich umfasst 0 und das Stiftende, y-Bereich umfasst die Grundlinie.
+# Glyph-Metriken je Zeichen in Pixeln relativ zum Anker 'la':
+#   (advance_26_6, x0, y0, x1, y1) – wie font.getbbox(ch) zusammen mit getlength(ch).
+
+Glyph = Tuple[int, int, int, int, int]
+
+class Font(Protocol):
+    """Was der Renderer von einem Font braucht – erfüllt von MetricsFont, LazyPillowFont und Pillow-Fonts."""
+    path: Optional[str]
+    size: int
+
+    def getbbox(self, text: str, *args, **kwargs) -> Tuple[int,int,int,int]: ...
+
+    def getlength(self, text: str, *args, **kwargs) -> float: ...
+
+    def getmetrics(self) -> Tuple[int,int]: ...
+
+class MetricsFont:
+    """Font-Handle mit Pillow-kompatibler Teil-API (path, size, getbbox, getlength, getmetrics)."""
+    backend = ""
+
+    def __init__(self, path: str, size: int, ascent: int, descent: int):
+        self.path = path
+        self.size = size
+        self.cache_path = f"{self.backend}|{path}"
+        self.ascent = ascent
+        self.descent = descent
+
+    def glyph(self, ch: str) -> Glyph:
+        raise NotImplementedError
+
+    def kern(self, left: str, right: str) -> int:
+        return 0
+
+    def getmetrics(self) -> Tuple[int,int]:
+        return (self.ascent, self.descent)
+
+    def getlength(self, text: str, *args, **kwargs) -> float:
+        pen, prev = 0, None
+        for ch in text:
+            if prev is not None:
+                pen += self.kern(prev, ch)
+            pen += self.glyph(ch)[0]
+            prev = ch
+        return pen / 64
+
+    def getbbox(self, text: str, *args, **kwargs) -> Tuple[int,int,int,int]:
+        if not text:
+            return (0, 0, 0, 0)
+        glyph, kern = self.glyph, self.kern
+        pen, prev = 0, None
+        x0 = x1 = 0
+        top = bottom = self.ascent
+        for ch in text:
+            adv, gx0, gy0, gx1, gy1 = glyph(ch)
+            if prev is not None:
+                pen += kern(prev, ch)
+            px = (pen + 32) >> 6
+            if px + gx0 < x0: x0 = px + gx0
+            if px + gx1 > x1: x1 = px + gx1
+            if gy0 < top: top = gy0
+            if gy1 > bottom: bottom = gy1
+            pen += adv
+            prev = ch
+        end = (pen + 63) >> 6
+        return (x0, top, max(x1, end), bottom)
+
+# ---------- TTF-Parser (hmtx/cmap/glyf/kern) ----------
+class TTFFile:
+    """Liest die für Breiten nötigen Tabellen einer TrueType-Datei einmalig ein."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            data = f.read()
+        self.path = path
+        num_tables = struct.unpack_from(">H", data, 4)[0]
+        tables = {}
+        for i in range(num_tables):
+            tag, _chk, off, length = struct.unpack_from(">4sIII", data, 12 + 16*i)
+            tables[tag.decode("latin-1")] = (off, length)
+        for req in ("head", "hhea", "hmtx", "maxp", "cmap"):
+            if req not in tables:
+                raise ValueError(f"{path}: Tabelle '{req}' fehlt (kein TrueType?)")
+        head = tables["head"][0]
+        self.units_per_em = struct.unpack_from(">H", data, head + 18)[0]
+        loca_format = struct.unpack_from(">h", data, head + 50)[0]
+        hhea = tables["hhea"][0]
+        self.ascender, self.descender = struct.unpack_from(">hh", data, hhea + 4)
+        num_hmetrics = struct.unpack_from(">H", data, hhea + 34)[0]
+        num_glyphs = struct.unpack_from(">H", data, tables["maxp"][0] + 4)[0]
+
+        hmtx = tables["hmtx"][0]
+        adv = array("H", [0]) * num_glyphs
+        for g in range(num_hmetrics):
+            adv[g] = struct.unpack_from(">H", data, hmtx + 4*g)[0]
+        for g in range(num_hmetrics, num_glyphs):
+            adv[g] = adv[num_hmetrics - 1]
+        self.advances = adv
+
+        # Glyph-BBoxen aus glyf (nur Header je Glyph, Konturen werden nicht gelesen)
+        self.bboxes: Dict[int, Tuple[int,int,int,int]] = {}
+        if "loca" in tables and "glyf" in tables:
+            loca, glyf = tables["loca"][0], tables["glyf"][0]
+            if loca_format == 0:
+                offs = [2*o for o in struct.unpack_from(f">{num_glyphs+1}H", data, loca)]
+            else:
+                offs = list(struct.unpack_from(f">{num_glyphs+1}I", data, loca))
+            for g in range(num_glyphs):
+                if offs[g+1] > offs[g]:
+                    self.bboxes[g] = struct.unpack_from(">hhhh", data, glyf + offs[g] + 2)
+
+        self.cmap = self._read_cmap(data, tables["cmap"][0])
+        self.kerning = self._read_kern(data, tables["kern"][0]) if "kern" in tables else {}
+
+    @staticmethod
+    def _read_cmap(data: bytes, base: int) -> Dict[int,int]:
+        num = struct.unpack_from(">H", data, base + 2)[0]
+        subs = {}
+        for i in range(num):
+            plat, enc, off = struct.unpack_from(">HHI", data, base + 4 + 8*i)
+            subs[(plat, enc)] = base + off
+        cmap: Dict[int,int] = {}
+        for key in ((3, 10), (0, 4), (3, 1), (0, 3), (0, 1), (0, 0)):
+            if key not in subs:
+                continue
+            off = subs[key]
+            fmt = struct.unpack_from(">H", data, off)[0]
+            if fmt == 12:
+                n = struct.unpack_from(">I", data, off + 12)[0]
+                for i in range(n):
+                    start, end, gid = struct.unpack_from(">III", data, off + 16 + 12*i)
+                    for cp in range(start, end + 1):
+                        cmap[cp] = gid + cp - start
+                return cmap
+            if fmt == 4:
+                seg2 = struct.unpack_from(">H", data, off + 6)[0]
+                segs = seg2 // 2
+                ends = struct.unpack_from(f">{segs}H", data, off + 14)
+                starts = struct.unpack_from(f">{segs}H", data, off + 16 + seg2)
+                deltas = struct.unpack_from(f">{segs}h", data, off + 16 + 2*seg2)
+                ro_base = off + 16 + 3*seg2
+                ranges = struct.unpack_from(f">{segs}H", data, ro_base)
+                for i in range(segs):
+                    for cp in range(starts[i], ends[i] + 1):
+                        if cp == 0xFFFF:
+                            continue
+                        if ranges[i] == 0:
+                            gid = (cp + deltas[i]) & 0xFFFF
+                        else:
+                            pos = ro_base + 2*i + ranges[i] + 2*(cp - starts[i])
+                            gid = struct.unpack_from(">H", data, pos)[0]
+                            if gid:
+                                gid = (gid + deltas[i]) & 0xFFFF
+                        if gid:
+                            cmap[cp] = gid
+                return cmap
+        return cmap
+
+    @staticmethod
+    def _read_kern(data: bytes, base: int) -> Dict[int,int]:
+        """Klassische 'kern'-Tabelle (Version 0, Format 0) -> {(links<<16)|rechts: Wert}."""
+        version, num = struct.unpack_from(">HH", data, base)
+        pairs: Dict[int,int] = {}
+        if version != 0:
+            return pairs
+        off = base + 4
+        for _ in range(num):
+            _v, length, coverage = struct.unpack_from(">HHH", data, off)
+            if coverage >> 8 == 0 and coverage & 1:  # Format 0, horizontal
+                n = struct.unpack_from(">H", data, off + 6)[0]
+                for i in range(n):
+                    l, r, v = struct.unpack_from(">HHh", data, off + 14 + 6*i)
+                    pairs[(l << 16) | r] = v
+            off += length
+        return pairs
+
+_TTF_FILES: Dict[str, TTFFile] = {}
+
+def ttf_file(path: str) -> TTFFile:
+    tf = _TTF_FILES.get(path)
+    if tf is None:
+        tf = _TTF_FILES[path] = TTFFile(path)
+    return tf
+
+class TTFFont(MetricsFont):
+    """Reines Python: Breiten arithmetisch aus Font-Einheiten.
+    Skalierung/Rundung wie FreeType (16.16-Scale, 26.6-Werte), aber ohne Hinting-Bytecode."""
+    backend = "ttf"
+
+    def __init__(self, path: str, size: int):
+        self.file = tf = ttf_file(path)
+        self._scale = ((size << 22) + tf.units_per_em // 2) // tf.units_per_em  # FT_DivFix(size*64, upem)
+        super().__init__(path, size, (self._mul(tf.ascender) + 63) >> 6, (self._mul(-tf.descender) + 63) >> 6)
+        self._glyphs: Dict[str, Glyph] = {}
+        self._kerns: Dict[str, int] = {}
+
+    def _mul(self, v: int) -> int:
+        """Font-Einheiten -> 26.6 (FT_MulFix)."""
+        p = abs(v) * self._scale + 0x8000 >> 16
+        return -p if v < 0 else p
+
+    def glyph(self, ch: str) -> Glyph:
+        g = self._glyphs.get(ch)
+        if g is None:
+            tf, mul, asc = self.file, self._mul, self.ascent
+            gid = tf.cmap.get(ord(ch), 0)
+            adv = (mul(tf.advances[gid]) + 32) >> 6
+            bb = tf.bboxes.get(gid)
+            if bb is None:
+                g = (adv*64, 0, asc, adv, asc)
+            else:
+                xmin, ymin, xmax, ymax = bb
+                g = (adv*64, min(0, mul(xmin) >> 6), asc - max(0, (mul(ymax) + 32) >> 6),
+                     max(adv, (mul(xmax) + 63) >> 6), asc - min(0, mul(ymin) >> 6))
+            self._glyphs[ch] = g
+        return g
+
+    def kern(self, left: str, right: str) -> int:
+        tf = self.file
+        if not tf.kerning:
+            return 0
+        pair = left + right
+        k = self._kerns.get(pair)
+        if k is None:
+            v = tf.kerning.get((tf.cmap.get(ord(left), 0) << 16) | tf.cmap.get(ord(right), 0), 0)
+            k = self._mul(v)
+            if self.size < 25:  # FreeType dämpft Kerning bei kleinen ppem (FT_Get_Kerning)
+                k = (abs(k)*self.size + 12) // 25 * (-1 if k < 0 else 1)
+            # grid-fitted auf ganze Pixel; Pillows Basic-Layout addiert den Wert >> 6
+            k = ((k + 32) & -64) >> 6
+            self._kerns[pair] = k
+        return k
+
+# ---------- Vorberechnete Tabelle ----------
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "git_diagram_font_metrics.json")
+TABLE_FORMAT_VERSION = 1
+# Zeichensatz der Tabelle: druckbares ASCII, Latin-1, typografische Zeichen
+TABLE_CHARS = (
+    "".join(chr(c) for c in range(0x20, 0x7F)) +
+    "".join(chr(c) for c in range(0xA0, 0x100)) +
+    "…–—‘’‚“”„•€™←→↑↓"
+)
+KERN_CHARS = "".join(chr(c) for c in range(0x20, 0x7F))
+FALLBACK_CHAR = "\uFFFD"
+
+class TableFont(MetricsFont):
+    """Glyph-Metriken aus array-basierter Tabelle; braucht weder Font-Datei noch Pillow."""
+    backend = "table"
+
+    def __init__(self, name: str, size: int, entry: Dict, table_path: str):
+        super().__init__(name, size, entry["ascent"], entry["descent"])
+        self.cache_path = f"table|{table_path}|{name}"
+        chars = entry["chars"]
+        self._index = {ch: i for i, ch in enumerate(chars)}
+        self._adv = array("i", entry["adv"])
+        self._x0 = array("h", entry["x0"]); self._y0 = array("h", entry["y0"])
+        self._x1 = array("h", entry["x1"]); self._y1 = array("h", entry["y1"])
+        self._fallback = self._index.get(FALLBACK_CHAR, self._index.get("?", 0))
+        self._kern = entry.get("kern", {})
+
+    def glyph(self, ch: str) -> Glyph:
+        i = self._index.get(ch, self._fallback)
+        return (self._adv[i], self._x0[i], self._y0[i], self._x1[i], self._y1[i])
+
+    def kern(self, left: str, right: str) -> int:
+        return self._kern.get(left + right, 0) if self._kern else 0
+
+def build_table_entry(font, chars: str = TABLE_CHARS, kern_chars: str = KERN_CHARS) -> Dict:
+    """Misst einen Font (beliebiges Backend) einmalig aus und liefert den Tabelleneintrag."""
+    chars = "".join(dict.fromkeys(chars + FALLBACK_CHAR))
+    asc, desc = font.getmetrics()
+    entry = {"ascent": asc, "descent": desc, "chars": chars,
+             "adv": [], "x0": [], "y0": [], "x1": [], "y1": [], "kern": {}}
+    adv26 = {}
+    for ch in chars:
+        x0, y0, x1, y1 = font.getbbox(ch)
+        a = adv26[ch] = round(font.getlength(ch)*64)
+        entry["adv"].append(a)
+        entry["x0"].append(x0); entry["y0"].append(y0)
+        entry["x1"].append(x1); entry["y1"].append(y1)
+    for l in kern_chars:
+        for r in kern_chars:
+            k = round(font.getlength(l + r)*64) - adv26[l] - adv26[r]
+            if k:
+                entry["kern"][l + r] = k
+    return entry
+
+_TABLES: Dict[str, Dict] = {}
+
+def load_table(path: str = TABLE_FILE) -> Dict:
+    t = _TABLES.get(path)
+    if t is None:
+        with open(path, "r", encoding="utf-8") as f:
+            t = json.load(f)
+        if t.get("version") != TABLE_FORMAT_VERSION:
+            raise ValueError(f"{path}: unbekannte Tabellenversion {t.get('version')}")
+        _TABLES[path] = t
+    return t
+
+# ---------- Backends ----------
+class LazyPillowFont:
+    """Pillow-Font, der (samt PIL-Import) erst bei der ersten Messung bzw. beim ersten Zugriff auf
+    path geladen wird. path ist die tatsächlich geladene Datei (None = Pillow-Default), damit
+    Cache-Einträge nach einem Ausweichen auf einen späteren Kandidaten nicht unter dem falschen Font liegen."""
+
+    def __init__(self, candidates: List[str], size: int):
+        self._candidates = [p for p in candidates if os.path.exists(p)]
+        self._path: Optional[str] = None
+        self.size = size
+        self.font = None
+
+    @property
+    def path(self) -> Optional[str]:
+        if self.font is None:
+            self._load()
+        return self._path
+
+    def _load(self):
+        ImageFont = _imagefont()
+        for p in self._candidates:
+            try:
+                self.font = ImageFont.truetype(p, self.size)
+                self._path = p
+                break
+            except Exception:   # defekte Datei: nächster Kandidat
+                pass
+        else:
+            self.font = ImageFont.load_default()
+        # ab jetzt direkt an den echten Font binden
+        self.getbbox, self.getlength, self.getmetrics = self.font.getbbox, self.font.getlength, self.font.getmetrics
+        return self.font
+
+    def getbbox(self, text, *args, **kw):
+        return self._load().getbbox(text, *args, **kw)
+
+    def getlength(self, text, *args, **kw):
+        return self._load().getlength(text, *args, **kw)
+
+    def getmetrics(self):
+        return self._load().getmetrics()
+
+class PillowBackend:
+    """Referenz: FreeType via Pillow (ImageFont.truetype), geladen beim ersten Messen."""
+    name = "pillow"
+
+    def load_font(self, candidates: List[str], size: int) -> LazyPillowFont:
+        return LazyPillowFont(candidates, size)
+
+    def font_file(self, candidates: List[str]) -> Optional[str]:
+        """Datei, die load_font verwenden würde (für Build-Hashes); None = Pillow-Default."""
+        return next((p for p in candidates if os.path.exists(p)), None)
+
+class TTFBackend:
+    """Reines Python, liest die erste vorhandene TrueType-Datei."""
+    name = "ttf"
+
+    def load_font(self, candidates: List[str], size: int) -> TTFFont:
+        for p in candidates:
+            if os.path.exists(p):
+                try:
+                    return TTFFont(p, size)
+                except (OSError, ValueError, struct.error):
+                    pass
+        raise RuntimeError(f"Kein lesbarer TrueType-Font unter {candidates}")
+
+    def font_file(self, candidates: List[str]) -> Optional[str]:
+        return next((p for p in candidates if os.path.exists(p)), None)
+
+class TableBackend:
+    """Vorberechnete Tabelle; Auswahl über den Dateinamen der Kandidaten."""
+    name = "table"
+
+    def __init__(self, path: str = TABLE_FILE):
+        self.path = path
+        self._fonts: Dict[Tuple[str,int], TableFont] = {}
+
+    def load_font(self, candidates: List[str], size: int) -> TableFont:
+        fonts = load_table(self.path)["fonts"]
+        for p in candidates:
+            name = os.path.basename(p.replace("\\", "/"))
+            entry = fonts.get(name, {}).get(str(size))
+            if entry is not None:
+                key = (name, size)
+                if key not in self._fonts:
+                    self._fonts[key] = TableFont(name, size, entry, self.path)
+                return self._fonts[key]
+        raise RuntimeError(f"Keine Tabellenmetrik für {[os.path.basename(p) for p in candidates]} @ {size}px in {self.path}")
+
+    def font_file(self, candidates: List[str]) -> Optional[str]:
+        return self.path  # Metriken hängen nur an der Tabelle
+
+BACKENDS = {"pillow": PillowBackend, "ttf": TTFBackend, "table": TableBackend}
+_backend = None
+_FONT_REGISTRY: Dict[tuple, object] = {}
+
+def load_font(candidates: List[str], size: int, backend=None) -> Font:
+    """Font des aktiven (oder übergebenen) Backends; gleiche (Kandidaten, Größe) liefern dasselbe Objekt."""
+    backend = backend or get_backend()
+    key = (backend.name, getattr(backend, "path", None), tuple(candidates), size)
+    font = _FONT_REGISTRY.get(key)
+    if font is None:
+        font = _FONT_REGISTRY[key] = backend.load_font(candidates, size)
+    return font
+
+def set_backend(name: str):
+    """Aktives Mess-Backend setzen ('pillow' | 'ttf' | 'table')."""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unbekanntes Metrik-Backend '{name}' (erlaubt: {', '.join(BACKENDS)})")
+    _backend = BACKENDS[name]()
+    return _backend
+
+def get_backend():
+    """Aktives Backend; Standard aus GIT_DIAGRAM_METRICS, sonst pillow (falls installiert) bzw. ttf."""
+    if _backend is None:
+        set_backend(os.environ.get("GIT_DIAGRAM_METRICS") or ("pillow" if pillow_available() else "ttf"))
+    return _backend
+
+# ---------- CLI: Tabelle bauen / Backends vergleichen ----------
+def _sample_texts(n: int = 300, seed: int = 7) -> List[str]:
+    rnd = random.Random(seed)
+    alphabet = KERN_CHARS + "äöüÄÖÜß…"
+    texts = ["git clone <URL> [dir]", r"c:\a\git\libs\datarecorder-lib", ".git (Index & Staging Area)",
+             "Remote Repository github.com", "Hash", "Type", "main", "README.md", "AVATAR To Ty", "…"]
+    for _ in range(n):
+        texts.append("".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 40))))
+    return texts
+
+# erlaubte Abweichung gegen Pillow (px): Breiten bestimmen Umbruch und Layout, Höhen nur die Textbox
+WIDTH_TOLERANCE = 1
+HEIGHT_TOLERANCE = 2
+
+def compare_backends(candidate, reference, specs, texts=None) -> List[Tuple[str,int,int,int]]:
+    """Max. Breiten-/Höhenabweichung (px) je (Font, Größe): [(name, size, dw, dh), ...]."""
+    texts = texts or _sample_texts()
+    rows = []
+    for candidates, size in specs:
+        a = candidate.load_font(candidates, size)
+        b = reference.load_font(candidates, size)
+        dw = dh = 0
+        for t in texts:
+            for s in (t, t + "Z"):
+                ba, bb = a.getbbox(s), b.getbbox(s)
+                dw = max(dw, abs((ba[2]-ba[0]) - (bb[2]-bb[0])))
+                dh = max(dh, abs((ba[3]-ba[1]) - (bb[3]-bb[1])))
+        rows.append((os.path.basename(str(getattr(b, "path", "?"))), size, dw, dh))
+    return rows
+
+def _font_specs() -> List[Tuple[List[str], int]]:
+    from render_clone_svg import FONT_CANDIDATES_BODY, FONT_CANDIDATES_MONO
+    return [(FONT_CANDIDATES_BODY, s) for s in (12, 13, 14, 16, 20)] + \
+           [(FONT_CANDIDATES_MONO, s) for s in (12, 14)]
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Font-Metriken: Tabelle bauen bzw. Backends gegen Pillow prüfen")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build-table", help="Tabelle aus dem Referenz-Backend erzeugen")
+    b.add_argument("--out", default=TABLE_FILE)
+    b.add_argument("--backend", default="pillow")
+    c = sub.add_parser("compare", help="Breiten eines Backends gegen die Referenz prüfen")
+    c.add_argument("backend", choices=[n for n in BACKENDS if n != "pillow"])
+    c.add_argument("--tolerance", type=int, default=WIDTH_TOLERANCE, help="erlaubte Breitenabweichung in px")
+    c.add_argument("--height-tolerance", type=int, default=HEIGHT_TOLERANCE, help="erlaubte Höhenabweichung in px")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "build-table":
+        src = BACKENDS[args.backend]()
+        fonts: Dict[str, Dict] = {}
+        for candidates, size in _font_specs():
+            font = src.load_font(candidates, size)
+            path = getattr(font, "path", None)
+            if not isinstance(path, str):
+                print(f"übersprungen: kein Font-File für {candidates} @ {size}px", file=sys.stderr)
+                continue
+            fonts.setdefault(os.path.basename(path), {})[str(size)] = build_table_entry(font)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"version": TABLE_FORMAT_VERSION, "source": args.backend, "fonts": fonts},
+                      f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        print(f"Wrote {args.out}  ({sum(len(v) for v in fonts.values())} Font/Größen)")
+        return 0
+
+    rows = compare_backends(BACKENDS[args.backend](), PillowBackend(), _font_specs())
+    for name, size, dw, dh in rows:
+        print(f"{name:24s} {size:3d}px  Δw={dw}  Δh={dh}")
+    worst_w, worst_h = max(row[2] for row in rows), max(row[3] for row in rows)
+    errors = ([f"Breite {worst_w}px > {args.tolerance}px"] if worst_w > args.tolerance else []) + \
+             ([f"Höhe {worst_h}px > {args.height_tolerance}px"] if worst_h > args.height_tolerance else [])
+    print(f"FEHLER: {', '.join(errors)}" if errors else "OK")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+# git_diagram_model.py
+# - kompaktes Datenmodell mit __slots__ (kein __dict__ je Objekt, schneller Attributzugriff
+#   in den Zeichenschleifen): Commit, Repo, Messungen (Panel, HistoryPanel, RepoMeasurement, ...),
+#   Box (platzierter Knoten) und die Layout-Ergebnisse
+# - JSON-Eingaben bleiben Dicts wie bisher; umgewandelt wird einmal beim Binden (as_commits, Repo.from_dict)
+# - Pixel-Koordinaten der Commit-Knoten als array (coord_array), Typ wie die Rechnung (int oder float),
+#   damit die SVG-Ausgabe byte-identisch bleibt
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# ---------- Eingaben ----------
+class Commit:
+    """Ein Commit (bzw. "… N commits"-Ersatzknoten). parents=None: ohne Graph (ein Strang),
+    key: eindeutige Knoten-ID, falls id leer ist (zusammengefasste Strecken)."""
+    __slots__ = ("id", "type", "parents", "refs", "state", "keep", "collapsed", "key")
+
+    def __init__(self, id: str = "", type: str = "commit", parents: Optional[List[str]] = None, refs=None,
+                 state: Optional[str] = None, keep: bool = False, collapsed: int = 0, key: str = ""):
+        self.id = id
+        self.type = type
+        self.parents = parents
+        self.refs = refs
+        self.state = state
+        self.keep = keep
+        self.collapsed = collapsed
+        self.key = key
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "Commit":
+        return cls(d.get("id", ""), d.get("type", "commit"), d.get("parents"), d.get("refs"), d.get("state"),
+                   bool(d.get("keep")), d.get("collapsed", 0), d.get("_key", ""))
+
+    def with_parents(self, parents: List[str]) -> "Commit":
+        return Commit(self.id, self.type, parents, self.refs, self.state, self.keep, self.collapsed, self.key)
+
+    def signature(self) -> tuple:
+        """Alles, was Messung und Zeichnung beeinflusst (Teil von RepoNode.key)."""
+        return (self.id, self.type, tuple(self.parents or ()), bool(self.refs), self.state)
+
+def as_commits(commits: Iterable) -> List[Commit]:
+    """Commit-Dicts (JSON, Git, Schrittfolgen) -> Commit; bereits umgewandelte Listen unverändert."""
+    commits = commits if isinstance(commits, list) else list(commits)
+    if all(type(c) is Commit for c in commits):
+        return commits
+    return [c if type(c) is Commit else Commit.from_dict(c) for c in commits]
+
+class Repo:
+    """Daten eines Repo-Blocks; tree=None -> Beispiel-Dateibaum."""
+    __slots__ = ("title", "repo_name", "is_local", "branches", "commits", "collapse", "tree")
+
+    def __init__(self, title: str, repo_name: str, is_local: bool, branches: List[str], commits: List[Commit],
+                 collapse: int = 0, tree: Optional[List[Tuple[int, str, int]]] = None):
+        self.title = title
+        self.repo_name = repo_name
+        self.is_local = is_local
+        self.branches = branches
+        self.commits = commits
+        self.collapse = collapse
+        self.tree = tree
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "Repo":
+        return cls(d["title"], d["repo_name"], d["is_local"], d["branches"], as_commits(d["commits"]),
+                   d.get("collapse", 0), d.get("tree"))
+
+    def key(self) -> tuple:
+        return (self.title, self.repo_name, self.is_local, tuple(self.branches or ()), self.collapse,
+                tuple(map(tuple, self.tree or ())), tuple(c.signature() for c in self.commits))
+
+# ---------- Messungen ----------
+class Measurement:
+    """Größe eines gemessenen Knotens; Unterklassen tragen, was draw() zusätzlich braucht."""
+    __slots__ = ("w", "h")
+
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+
+class HeaderMeasurement(Measurement):
+    """Syntaxzeile + Kommandozeile (gekürzt: eine Zeile, ausgeglichen: ggf. mehrere)."""
+    __slots__ = ("syntax_h", "cmd_lines", "cmd_heights")
+
+    def __init__(self, w, h, syntax_h, cmd_lines: List[str], cmd_heights: List[int]):
+        super().__init__(w, h)
+        self.syntax_h = syntax_h
+        self.cmd_lines = cmd_lines
+        self.cmd_heights = cmd_heights
+
+class TextMeasurement(Measurement):
+    """Umbrochener Text: Zeilen und ihre Höhen."""
+    __slots__ = ("lines", "heights")
+
+    def __init__(self, w, h, lines: List[str], heights: List[int]):
+        super().__init__(w, h)
+        self.lines = lines
+        self.heights = heights
+
+class Panel(Measurement):
+    """Tabellen-Panel (Working Tree, Index) mit umbrochenem Titel."""
+    __slots__ = ("title_lines",)
+
+    def __init__(self, w, h, title_lines: List[str]):
+        super().__init__(w, h)
+        self.title_lines = title_lines
+
+class HistoryPanel(Measurement):
+    """History-Panel: Spaltenbreiten, Kopfhöhe und (mit "parents") das DAG-Layout."""
+    __slots__ = ("pill_w", "hdr_h", "branch_area_w", "hash_col_w", "type_col_w", "dag")
+
+    def __init__(self, w, h, pill_w, hdr_h, branch_area_w, hash_col_w, type_col_w, dag=None):
+        super().__init__(w, h)
+        self.pill_w = pill_w
+        self.hdr_h = hdr_h
+        self.branch_area_w = branch_area_w
+        self.hash_col_w = hash_col_w
+        self.type_col_w = type_col_w
+        self.dag = dag
+
+class RepoMeasurement(Measurement):
+    """Repo-Block: drei Panels nebeneinander unter dem Titel; title_lines=None: einzeiliger Titel
+    (Middle-Ellipsis beim Zeichnen), sonst umbrochen mit Höhen je Zeile."""
+    __slots__ = ("wt", "idx", "hist", "panel_h", "title_h", "title_lines", "title_heights")
+
+    def __init__(self, w, h, wt: Panel, idx: Panel, hist: HistoryPanel, panel_h, title_h,
+                 title_lines: Optional[List[str]] = None, title_heights: Optional[List[int]] = None):
+        super().__init__(w, h)
+        self.wt = wt
+        self.idx = idx
+        self.hist = hist
+        self.panel_h = panel_h
+        self.title_h = title_h
+        self.title_lines = title_lines
+        self.title_heights = title_heights
+
+# ---------- Layout ----------
+class Box:
+    """Platzierter Knoten in der Repo-Zeile (x, y relativ zur Zeile); reverse: Pfeil nach links."""
+    __slots__ = ("kind", "node", "m", "x", "y", "reverse")
+
+    def __init__(self, kind: str, node, m: Measurement, x, y=0, reverse: bool = False):
+        self.kind = kind
+        self.node = node
+        self.m = m
+        self.x = x
+        self.y = y
+        self.reverse = reverse
+
+class RowLayout:
+    """Repo-Zeile: Größe, Boxen in Zeichenreihenfolge, Breite je Lücke."""
+    __slots__ = ("w", "h", "items", "gap_w")
+
+    def __init__(self, w, h, items: List[Box], gap_w: List[int]):
+        self.w = w
+        self.h = h
+        self.items = items
+        self.gap_w = gap_w
+
+class DiagramLayout:
+    """Ganzes Diagramm: Größe, Header/Beschreibung [(Knoten, Messung)], Kopfhöhe, Repo-Zeile."""
+    __slots__ = ("w", "h", "head", "head_h", "row")
+
+    def __init__(self, w, h, head: List[tuple], head_h, row: RowLayout):
+        self.w = w
+        self.h = h
+        self.head = head
+        self.head_h = head_h
+        self.row = row
+
+def coord_array(values: Iterable, like) -> array:
+    """Koordinaten als array; "d" wenn like float ist, sonst "q" (int bleibt int, z.B. "124" statt "124.0")."""
+    return array("d" if isinstance(like, float) else "q", values)
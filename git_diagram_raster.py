@@ -0,0 +1,305 @@
+# git_diagram_raster.py
+# - RasterWriter: dieselben Zeichenprimitiven wie SvgWriter (rect/text/line/path/circle/symbol),
+#   gezeichnet direkt in ein Pillow-Bild – kein Umweg über SVG-Datei + externen Konverter
+# - Koordinaten in SVG-px (96 dpi), skaliert auf die gewünschte Auflösung;
+#   optional Supersampling (Kantenglättung für Flächen/Linien, Text glättet FreeType selbst)
+# - Pfeilspitze 'arrowThinOpen' wie der <marker> in draw_diagram als Linienzug
+# - PNG (mit dpi-Angabe) und PDF (eine Seite je Diagramm)
+# - inhaltsadressierter Cache: Schlüssel = Hash des Standard-SVG-Stroms + Raster-Optionen,
+#   unveränderte Diagramme werden nicht erneut gerastert
+# - Pillow wird erst beim Zeichnen importiert (Cache-Treffer brauchen nur PIL.__version__)
+
+import hashlib, math, os, re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from git_diagram_manifest import canonical_hash
+from git_diagram_svg import SVG_FONT_FAMILY_BODY
+
+RASTER_VERSION = "1"   # erhöhen, wenn sich die Rasterung bei gleichem SVG ändert
+RASTER_FORMATS = ("png", "pdf")
+SVG_DPI = 96
+DEFAULT_DPI = 192
+CACHE_DIR_NAME = ".raster_cache"
+PNG_COMPRESS_LEVEL = 3   # zlib: ~halbe Zeit ggü. Stufe 6 bei ~25 % größerer Datei
+
+# Marker aus draw_diagram: Linienzug in Marker-Einheiten, Referenzpunkt = Linienende
+MARKERS = {
+    "arrowThinOpen": {"points": ((1, 1), (11, 5), (1, 9)), "ref": (12, 5), "stroke": "#111", "sw": 2},
+}
+
+_PIL = None
+
+def _pil():
+    """(Image, ImageDraw, ImageFont, ImageColor) beim ersten Zeichnen importieren."""
+    global _PIL
+    if _PIL is None:
+        try:
+            from PIL import Image, ImageColor, ImageDraw, ImageFont
+        except ImportError:
+            raise RuntimeError("PNG/PDF-Ausgabe benötigt Pillow (pip install pillow)") from None
+        _PIL = (Image, ImageDraw, ImageFont, ImageColor)
+    return _PIL
+
+_FONTS: Dict[Tuple[str, int], object] = {}
+
+def _truetype(candidates: List[str], size: int):
+    """Erster ladbarer Kandidat in Pixelgröße size (je Prozess gecacht)."""
+    ImageFont = _pil()[2]
+    for p in candidates:
+        key = (p, size)
+        font = _FONTS.get(key)
+        if font is not None:
+            return font
+        if os.path.exists(p):
+            try:
+                font = _FONTS[key] = ImageFont.truetype(p, size)
+                return font
+            except OSError:
+                pass
+    return ImageFont.load_default(size)
+
+def _path_polylines(d: str) -> List[List[Tuple[float, float]]]:
+    """Pfaddaten mit M/L/H/V/Z (absolut) -> Linienzüge; mehr erzeugt der Renderer nicht."""
+    lines, cur = [], None
+    tokens = re.findall(r"[MLHVZmlhvz]|-?\d+(?:\.\d+)?(?:e-?\d+)?", d)
+    i, cmd = 0, None
+    def num():
+        nonlocal i
+        i += 1
+        return float(tokens[i - 1])
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            cmd = tokens[i]; i += 1
+            if cmd in "Zz" and cur:
+                cur.append(cur[0])
+                continue
+        if cmd == "M":
+            cur = [(num(), num())]
+            lines.append(cur)
+            cmd = "L"   # weitere Paare nach M sind Linien
+        elif cmd == "L":
+            cur.append((num(), num()))
+        elif cmd == "H":
+            cur.append((num(), cur[-1][1]))
+        elif cmd == "V":
+            cur.append((cur[-1][0], num()))
+        else:
+            raise ValueError(f"Pfadbefehl '{cmd}' wird beim Rastern nicht unterstützt: {d!r}")
+    return lines
+
+class RasterWriter:
+    """Zeichnet die SvgWriter-Primitiven in ein RGBA-Bild. Die Bildgröße kommt aus open("svg", ...)
+    (width/height in px); dpi skaliert, supersample zeichnet größer und verkleinert in close()."""
+    regions = False   # keine Trefferflächen (siehe SvgWriter.region)
+
+    def __init__(self, dpi: int = DEFAULT_DPI, fonts: Dict[Tuple[str, bool], List[str]] = None,
+                 supersample: int = 1):
+        self.dpi = dpi
+        self.supersample = max(1, int(supersample))
+        self.s = dpi / SVG_DPI * self.supersample
+        self.fonts = fonts or {}   # {(font_family, bold): Kandidaten}
+        self.image = None
+        self._draw = None
+        self._depth = 0
+        self.count = 0
+
+    # ---------- Dokument ----------
+    def raw(self, markup: str):
+        """Defs/Styles betreffen nur SVG (Marker sind in MARKERS nachgebaut)."""
+
+    def open(self, tag: str, attrs=()):
+        self._depth += 1
+        if tag == "svg" and self.image is None:
+            Image, ImageDraw = _pil()[:2]
+            a = dict(attrs)
+            size = (max(1, round(float(a["width"]) * self.s)), max(1, round(float(a["height"]) * self.s)))
+            self.image = Image.new("RGBA", size, (0, 0, 0, 0))
+            self._draw = ImageDraw.Draw(self.image, "RGBA")
+
+    def close(self, tag: str):
+        self._depth -= 1
+        if self._depth == 0 and self.supersample > 1:
+            self.image = self.image.reduce(self.supersample)
+            self._draw = None
+
+    def element(self, tag: str, attrs, text: Optional[str] = None):
+        raise ValueError(f"RasterWriter: <{tag}> nur über die Primitiven (rect/text/line/path/circle)")
+
+    # ---------- Hilfen ----------
+    def _color(self, c, opacity=None):
+        if c is None or c == "none":
+            return None
+        rgb = _pil()[3].getrgb(c)[:3]
+        return rgb + (round(255 * float(opacity)) if opacity is not None else 255,)
+
+    def _w(self, sw) -> int:
+        return max(1, round(float(sw) * self.s))
+
+    def _font(self, family: str, bold: bool, size: float):
+        cands = self.fonts.get((family, bold)) or self.fonts.get((family, False)) or []
+        return _truetype(cands, max(1, round(size * self.s)))
+
+    def _marker(self, name: str, x1, y1, x2, y2):
+        m = MARKERS.get(name)
+        if m is None:
+            return
+        ang = math.atan2(y2 - y1, x2 - x1)
+        ca, sa = math.cos(ang), math.sin(ang)
+        rx, ry = m["ref"]
+        pts = [((x2 + (px - rx) * ca - (py - ry) * sa) * self.s, (y2 + (px - rx) * sa + (py - ry) * ca) * self.s)
+               for px, py in m["points"]]
+        w = self._w(m["sw"])
+        self._draw.line(pts, fill=self._color(m["stroke"]), width=w, joint="curve")
+        self._caps(pts[0], pts[-1], w, self._color(m["stroke"]))
+
+    def _caps(self, p0, p1, w, color):
+        r = w / 2
+        for x, y in (p0, p1):
+            self._draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+
+    # ---------- Primitiven ----------
+    def rect(self, x,y,w,h,rx=None,ry=None,fill=None,stroke=None,sw=None,opacity=None):
+        s = self.s
+        half = float(sw) / 2 if (stroke and sw) else 0   # SVG-Kontur liegt mittig auf der Kante
+        box = ((x - half) * s, (y - half) * s, (x + w + half) * s, (y + h + half) * s)
+        fill_c = self._color("#000" if fill is None else fill, opacity)
+        outline = self._color(stroke, opacity) if stroke else None
+        width = self._w(sw) if outline else 0
+        radius = (float(rx or ry or 0) + half) * s
+        if radius > 0:
+            self._draw.rounded_rectangle(box, radius=radius, fill=fill_c, outline=outline, width=width)
+        else:
+            self._draw.rectangle(box, fill=fill_c, outline=outline, width=width)
+        self.count += 1
+
+    def text(self, x,y,s,fs=16,fw="normal",color="#111",anchor="start",font_family=SVG_FONT_FAMILY_BODY):
+        font = self._font(font_family, fw == "bold", float(fs))
+        a = {"middle": "ms", "end": "rs"}.get(anchor, "ls")   # y ist die Grundlinie wie in SVG
+        self._draw.text((x * self.s, y * self.s), s, font=font, fill=self._color(color), anchor=a)
+        self.count += 1
+
+    def line(self, x1,y1,x2,y2,stroke="#111",sw=2,marker=None):
+        s = self.s
+        self._draw.line(((x1 * s, y1 * s), (x2 * s, y2 * s)), fill=self._color(stroke), width=self._w(sw))
+        if marker:
+            self._marker(marker, x1, y1, x2, y2)
+        self.count += 1
+
+    def path(self, d, stroke="#111", sw=2, fill="none", marker_end=None, linecap="round", linejoin="round"):
+        s, w, color = self.s, self._w(sw), self._color(stroke)
+        for pts in _path_polylines(d):
+            xy = [(px * s, py * s) for px, py in pts]
+            if fill and fill != "none" and len(xy) > 2:
+                self._draw.polygon(xy, fill=self._color(fill))
+            self._draw.line(xy, fill=color, width=w, joint=("curve" if linejoin == "round" else None))
+            if linecap == "round":
+                self._caps(xy[0], xy[-1], w, color)
+            if marker_end and len(pts) > 1:
+                self._marker(marker_end, *pts[-2], *pts[-1])
+        self.count += 1
+
+    def circle(self, cx,cy,r,stroke="#111",fill="#fff",sw=3):
+        s = self.s
+        half = float(sw) / 2 if stroke else 0
+        rr = (r + half) * s
+        self._draw.ellipse((cx * s - rr, cy * s - rr, cx * s + rr, cy * s + rr), fill=self._color(fill),
+                           outline=self._color(stroke), width=self._w(sw) if stroke else 0)
+        self.count += 1
+
+    def symbol(self, key: tuple, x, y, draw: Callable[["RasterWriter", float, float], None]):
+        draw(self, x, y)
+
+    # ---------- Ausgabe ----------
+    def save(self, path: str, fmt: str, background: Optional[str] = "#fff"):
+        """Bild als PNG/PDF schreiben; background=None lässt PNG transparent (PDF immer weiß)."""
+        Image = _pil()[0]
+        img = self.image
+        if background or fmt == "pdf":
+            bg = Image.new("RGBA", img.size, self._color(background or "#fff"))
+            img = Image.alpha_composite(bg, img).convert("RGB")
+        if fmt == "png":
+            img.save(path, "PNG", dpi=(self.dpi, self.dpi), compress_level=PNG_COMPRESS_LEVEL)
+        elif fmt == "pdf":
+            img.save(path, "PDF", resolution=float(self.dpi))
+        else:
+            raise ValueError(f"Unbekanntes Rasterformat '{fmt}' (erlaubt: {', '.join(RASTER_FORMATS)})")
+
+# ---------- Inhaltsadressierter Cache ----------
+class HashSink:
+    """Senke für SvgWriter, die nur einen SHA-256 über das Markup bildet."""
+
+    def __init__(self):
+        self._h = hashlib.sha256()
+
+    def write(self, s: str):
+        self._h.update(s.encode("utf-8"))
+
+    def hexdigest(self) -> str:
+        return self._h.hexdigest()
+
+_SOURCE_HASH = None
+
+def _source_hash() -> str:
+    global _SOURCE_HASH
+    if _SOURCE_HASH is None:
+        with open(os.path.abspath(__file__), "rb") as f:
+            _SOURCE_HASH = hashlib.sha256(f.read()).hexdigest()
+    return _SOURCE_HASH
+
+def raster_key(svg_digest: str, output: Dict, font_files: List[str]) -> str:
+    """Cache-Schlüssel: Diagramm-Inhalt (Hash des Standard-SVG) + Format, dpi, Supersampling,
+    Hintergrund + Raster-Fonts + Rasterer (Version, Quelltext, Pillow)."""
+    from PIL import __version__ as pil_version
+    return canonical_hash([RASTER_VERSION, _source_hash(), pil_version, svg_digest, output, font_files])
+
+class RasterCache:
+    """Ablage <root>/<hh>/<key>.<fmt>; Einträge werden nie verändert, nur ersetzt."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.hits = self.misses = 0
+
+    @classmethod
+    def for_output(cls, out_path: str) -> "RasterCache":
+        """GIT_DIAGRAM_RASTER_CACHE oder <Ausgabeordner>/.raster_cache."""
+        root = os.environ.get("GIT_DIAGRAM_RASTER_CACHE") or os.path.join(os.path.dirname(out_path) or ".",
+                                                                          CACHE_DIR_NAME)
+        return cls(root)
+
+    def path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.{fmt}")
+
+    def get(self, key: str, fmt: str) -> Optional[str]:
+        p = self.path(key, fmt)
+        if os.path.exists(p):
+            self.hits += 1
+            return p
+        self.misses += 1
+        return None
+
+    def put(self, key: str, fmt: str, write: Callable[[str], None]) -> str:
+        """write(tmp_path) erzeugt die Datei; erst danach wird sie unter dem Schlüssel abgelegt."""
+        p = self.path(key, fmt)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = f"{p}.{os.getpid()}.tmp"
+        try:
+            write(tmp)
+            os.replace(tmp, p)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return p
+
+def copy_atomic(src: str, dst: str):
+    """Kopie über temporäre Datei + os.replace (kein halb geschriebenes Ziel)."""
+    import shutil   # erst hier: hält den CLI-Start schlank
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    tmp = dst + ".tmp"
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
@@ -0,0 +1,241 @@
+# git_diagram_sequence.py
+# - Schrittfolgen (z.B. clone -> commit -> push -> fetch) als Einzelbilder oder als ein animiertes SVG
+# - Repo-Zustand je Schritt aus "effect" der Szenen (copy von/nach: fehlende Commits ergänzen, commit),
+#   neue Commits im jeweiligen Schritt als change_new markiert
+# - je Schritt dieselbe LayoutEngine: unveränderte Knoten werden nicht neu gemessen,
+#   ihr Markup (je Knoten + Position + Messung) nicht neu erzeugt
+# - Header-Höhe und Pfeil-Lücken auf das Maximum aller Frames gepinnt, damit Repos
+#   zwischen den Schritten nicht verrutschen (sonst wäre jedes Element "geändert")
+# - Frame-Diff: die Elementfolgen aller Frames werden zu einer Folge zusammengeführt (difflib),
+#   je Element die Menge der Frames, in denen es sichtbar ist; Läufe gleicher Sichtbarkeit
+#   als <g> mit CSS-Schrittanimation (visibility, step-end) – gemeinsame Elemente nur einmal
+
+import argparse, difflib, os, random, sys, time
+from typing import Dict, List, Tuple
+
+import render_clone_svg as r
+from git_diagram_metrics import set_backend
+from git_diagram_svg import SvgWriter
+
+DEFAULT_STEP_SECONDS = 2.5
+
+# ---------- Repo-Zustand ----------
+def initial_state() -> Dict[str, List[Dict]]:
+    """Ausgangszustand: Remote mit den Beispiel-Commits aus bind_ast, lokal noch leer."""
+    return {"remote": r.fake_commits(3, random.Random(r.SAMPLE_SEED)), "local": []}
+
+def apply_effect(state: Dict[str, List[Dict]], effect: Dict, step: int) -> Dict[str, List[Dict]]:
+    """Neuer Zustand nach einem Schritt; Commits, die dabei hinzukommen, tragen state="new"."""
+    new = {repo: [{k: v for k, v in c.items() if k != "state"} for c in commits]
+           for repo, commits in state.items()}
+    if "copy" in effect:
+        src, dst = effect["copy"]["from"], effect["copy"]["to"]
+        # Ziel behält eigene Commits (z.B. lokaler Commit vor fetch), nur fehlende kommen hinzu
+        known = {c["id"] for c in new.get(dst, [])}
+        new[dst] = new.get(dst, []) + [{**c, "state": "new"} for c in new.get(src, []) if c["id"] not in known]
+    if "commit" in effect:
+        rng = random.Random(f"step-{step}")
+        new.setdefault(effect["commit"], []).append(
+            {"id": "".join(rng.choice("0123456789abcdef") for _ in range(7)), "type": "commit", "state": "new"})
+    return new
+
+def sequence_scenes(steps: List[str], commands: List[Dict] = None, scenes: Dict = None) -> List[Dict]:
+    """Szene je Schritt (wie scene_for) plus Repo-Zustand nach dem Schritt unter "repos"."""
+    commands = commands if commands is not None else r.load_json(r.COMMANDS)
+    scenes = scenes if scenes is not None else r.load_json(r.SCENES)
+    state, out = initial_state(), []
+    for i, cid in enumerate(steps):
+        state = apply_effect(state, scenes.get(cid, {}).get("effect", {}), i)
+        scene = r.scene_for(cid, commands, scenes)
+        scene["repos"] = {repo: {"commits": commits} for repo, commits in state.items()}
+        out.append(scene)
+    return out
+
+# ---------- Frames ----------
+class _ElementSink(list):
+    """Senke für SvgWriter: jedes Element/Rohmarkup als eigener Eintrag (ohne Trenner)."""
+
+    def write(self, s: str):
+        self.append(s[1:] if s[:1] == "\n" else s)
+
+class FrameBuilder:
+    """Misst und zeichnet Frames; Markup je (Knoten, Position, Messung) wird wiederverwendet.
+    layouts() liefert die gepinnten Layouts einer Schrittfolge, frame() die Elemente je Layout."""
+
+    def __init__(self, fonts: Dict, ast: Dict = None):
+        self.fonts = fonts
+        self.ast = ast or r.load_ast()
+        self.eng = r.layout_engine(fonts)
+        self._markup: Dict[tuple, Tuple[Dict, Tuple[str, ...]]] = {}
+        self.reused = self.drawn = 0
+
+    def layouts(self, cfg: Dict, scenes: List[Dict]) -> List[Dict]:
+        """Zwei Durchläufe: freie Layouts -> Maxima (Header-Höhe, Lückenbreiten) -> gepinnte Layouts.
+        Der zweite Durchlauf misst fast nur aus dem Cache."""
+        nodes = [r.bind_ast(self.ast, cfg, sc) for sc in scenes]
+        target_w = cfg.get("TargetWidth")
+        free = [r.layout_diagram(self.eng, n, target_w=target_w) for n in nodes]
+        gap_w: List[int] = []
+        for lay in free:
+            for i, gw in enumerate(lay.row.gap_w):
+                if i < len(gap_w):
+                    gap_w[i] = max(gap_w[i], gw)
+                else:
+                    gap_w.append(gw)
+        pins = {"gap_w": gap_w, "head_h": max(lay.head_h for lay in free)}
+        return [r.layout_diagram(self.eng, n, pins, target_w) for n in nodes]
+
+    def frame(self, lay: Dict) -> Tuple[int, int, Tuple[str, ...]]:
+        """(Breite, Höhe, Elemente) eines Frames ohne <svg>/<defs>."""
+        elements: List[str] = []
+        for node, x, y, m, kw in r.placed_nodes(lay):
+            key = (node.kind, x, y, tuple(sorted(kw.items())), id(m))
+            cached = self._markup.get(key)
+            if cached is None or cached[0] is not m:   # gleiche Messung (Objekt) = gleiche Eingaben
+                sink = _ElementSink()
+                node.draw(self.eng, x, y, m, SvgWriter(sink), **kw)
+                cached = self._markup[key] = (m, tuple(sink))
+                self.drawn += 1
+            else:
+                self.reused += 1
+            elements.extend(cached[1])
+        return int(lay.w), int(lay.h), tuple(elements)
+
+def write_frame_svg(sink, w: int, h: int, elements) -> None:
+    """Einzelner Frame (wie draw_diagram mit dem gepinnten Layout)."""
+    out = SvgWriter(sink)
+    out.open("svg", r.svg_root_attrs(w, h))
+    r.draw_defs(out)
+    for e in elements:
+        out.raw(e)
+    out.close("svg")
+
+# ---------- Frame-Diff + Animation ----------
+def merge_frames(frames: List[Tuple[str, ...]]) -> List[Tuple[str, int]]:
+    """Gemeinsame Elementfolge aller Frames: [(Markup, Bitmaske der Frames)].
+    Die Reihenfolge jedes einzelnen Frames (Zeichenreihenfolge) bleibt erhalten."""
+    merged: List[Tuple[str, int]] = []
+    for fi, elems in enumerate(frames):
+        bit = 1 << fi
+        sm = difflib.SequenceMatcher(None, [e for e, _ in merged], elems, autojunk=False)
+        out: List[Tuple[str, int]] = []
+        for op, i1, i2, j1, j2 in sm.get_opcodes():
+            if op == "equal":
+                out.extend((e, mask | bit) for e, mask in merged[i1:i2])
+            else:
+                out.extend(merged[i1:i2])            # nur in früheren Frames
+                out.extend((e, bit) for e in elems[j1:j2])
+        merged = out
+    return merged
+
+def visibility_css(masks, n: int, step_seconds: float) -> str:
+    """Je Sichtbarkeitsmaske eine Klasse mit @keyframes (visibility wechselt an Frame-Grenzen)."""
+    rules = []
+    for mask in sorted(masks):
+        frames, prev = [], None
+        for i in range(n):
+            vis = "visible" if mask >> i & 1 else "hidden"
+            if vis != prev:
+                frames.append(f"{i*100/n:g}%{{visibility:{vis}}}")
+                prev = vis
+        rules.append(f".v{mask:x}{{animation:v{mask:x} {n*step_seconds:g}s step-end infinite}} "
+                     f"@keyframes v{mask:x}{{{''.join(frames)}}}")
+    return "\n".join(rules)
+
+def write_animated_svg(sink, frames: List[Tuple[int, int, Tuple[str, ...]]], step_seconds: float) -> Dict:
+    """Ein SVG für alle Frames: gemeinsame Elemente einmal, der Rest in <g class="vMASKE">."""
+    n = len(frames)
+    full = (1 << n) - 1
+    merged = merge_frames([f[2] for f in frames])
+    w, h = max(f[0] for f in frames), max(f[1] for f in frames)
+    out = SvgWriter(sink)
+    out.open("svg", r.svg_root_attrs(w, h))
+    r.draw_defs(out)
+    masks = {mask for _, mask in merged if mask != full}
+    if masks:
+        out.raw(f"<style>\n{visibility_css(masks, n, step_seconds)}\n</style>")
+    cur = full
+    for e, mask in merged:
+        if mask != cur:
+            if cur != full:
+                out.close("g")
+            if mask != full:
+                out.open("g", (("class", f"v{mask:x}"),))
+            cur = mask
+        out.raw(e)
+    if cur != full:
+        out.close("g")
+    out.close("svg")
+    return {"frames": n, "elements": len(merged), "shared": sum(1 for _, m in merged if m == full),
+            "frame_elements": sum(len(f[2]) for f in frames)}
+
+# ---------- Ablauf ----------
+def build_sequence(steps: List[str], cfg: Dict, fonts: Dict, builder: FrameBuilder = None):
+    """(Layouts, Frames) einer Schrittfolge."""
+    builder = builder or FrameBuilder(fonts)
+    lays = builder.layouts(cfg, sequence_scenes(steps))
+    return lays, [builder.frame(lay) for lay in lays]
+
+def sequence_name(steps: List[str]) -> str:
+    return "_".join(steps)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Schrittfolge als animiertes SVG und/oder Einzelbilder")
+    ap.add_argument("steps", nargs="+", help="Befehls-IDs in Reihenfolge, z.B. clone commit push fetch")
+    ap.add_argument("--config", default=r.CFG, help="Config-Datei")
+    ap.add_argument("--out", help="animiertes SVG (Standard: out/git_seq_<schritte>.svg)")
+    ap.add_argument("--frames", metavar="DIR", help="zusätzlich Einzelbilder je Schritt in DIR")
+    ap.add_argument("--no-animation", action="store_true", help="nur Einzelbilder (mit --frames)")
+    ap.add_argument("--step-seconds", type=float, default=DEFAULT_STEP_SECONDS, help="Dauer je Schritt")
+    ap.add_argument("--metrics", choices=["pillow", "ttf", "table"], help="Metrik-Backend")
+    ap.add_argument("--width", type=int, help="Zielbreite in px (Config \"TargetWidth\")")
+    r.add_output_args(ap)
+    args = ap.parse_args(argv)
+    if args.metrics:
+        set_backend(args.metrics)
+
+    cfg = r.with_target_width(r.load_json(args.config), args.width)
+    r.load_metrics_cache()
+    fonts = r.load_fonts()
+    builder = FrameBuilder(fonts)
+    t0 = time.perf_counter()
+    try:
+        lays, frames = build_sequence(args.steps, cfg, fonts, builder)
+    except KeyError as e:   # unbekannter Befehl (scene_for)
+        raise SystemExit(e.args[0])
+    t1 = time.perf_counter()
+    print(f"{len(frames)} Frames in {(t1-t0)*1000:.1f} ms "
+          f"(Knoten gezeichnet {builder.drawn}, wiederverwendet {builder.reused}; "
+          f"Messungen {builder.eng.misses}, aus Cache {builder.eng.hits})")
+
+    if not args.no_animation:
+        path = args.out or os.path.join(r.OUT_DIR, f"git_seq_{sequence_name(args.steps)}.svg")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            stats = write_animated_svg(f, frames, args.step_seconds)
+        os.replace(path + ".tmp", path)
+        print(f"Wrote {path}  ({stats['elements']} Elemente, davon {stats['shared']} in allen Frames; "
+              f"Einzelbilder zusammen {stats['frame_elements']})")
+
+    if args.frames:
+        os.makedirs(args.frames, exist_ok=True)
+        for i, (cid, lay, (w, h, elements)) in enumerate(zip(args.steps, lays, frames), 1):
+            def draw(writer, lay=lay, size=(w, h)):
+                r.draw_diagram(builder.eng, lay, writer)
+                return size
+            for output in r.output_variants(args):
+                fmt = output.get("format", "svg")
+                path = os.path.join(args.frames, f"git_seq_{i:02d}_{cid}.{fmt}")
+                if fmt != "svg":   # Raster über den Raster-Cache
+                    r.raster_file(path, draw, output)
+                else:
+                    with open(path, "w", encoding="utf-8") as f:
+                        if output:
+                            draw(r.svg_writer(f, output))
+                        else:
+                            write_frame_svg(f, w, h, elements)
+                print(f"Wrote {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+# git_diagram_server.py
+# - lokaler Render-Dienst (nur Standardbibliothek): HTTP/1.1 mit Keep-Alive über localhost oder Unix-Socket
+# - Fonts, Metrik-Cache, Layout-Cache und Katalog/Szenen/AST bleiben im Speicher
+# - asyncio nimmt beliebig viele Verbindungen an, das Rendern läuft in einem Worker-Pool
+#     -j N  : N Prozesse (je Worker Fonts + Caches, einmal beim Start geladen)
+#     -j 0  : ein Render-Thread im Serverprozess (kein IPC, geringste Latenz bei 1 CPU)
+# - fertige SVGs im LRU-Cache je Eingabe-Hash; gleichzeitige gleiche Anfragen rendern nur einmal
+#
+# Endpunkte:
+#   POST /render          {"command": "push", "config": {Overrides...}, "scene": {...},
+#                          "optimize": true, "precision": 2} -> image/svg+xml
+#   GET  /render/<cmd>    Standard-Config -> image/svg+xml (?optimize=1&precision=2)
+#   GET  /health          Zähler, Cache-Größen, Backend (JSON)
+# "scene" ersetzt die Katalog-Szene (header/arrow/arrows wie git_diagram_scenes_phase1.json);
+# ohne "scene" wird "command" (Standard: clone) aus Katalog + Szenen aufgelöst.
+
+import argparse, asyncio, json, os, sys, time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import render_clone_svg as r
+from git_diagram_manifest import STYLE_LIBRARY, canonical_hash
+from git_diagram_metrics import METRICS_CACHE, get_backend, set_backend
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY = 4 << 20
+SVG_CACHE_ENTRIES = 256
+BACKLOG = 1024       # viele gleichzeitige Verbindungen (Live-Reload mehrerer Seiten)
+
+class RequestError(Exception):
+    """Fehlerhafte Anfrage -> HTTP-Status mit Meldung."""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+# ---------- Worker ----------
+_FONTS: Optional[Dict] = None
+
+def _init_worker(backend: str):
+    """Einmal je Worker: Backend, Metrik-Cache, Fonts; danach ein Aufwärm-Render."""
+    global _FONTS
+    set_backend(backend)
+    r.load_metrics_cache()
+    _FONTS = r.load_fonts()
+    scene = r.scene_for("clone", r.load_json_cached(r.COMMANDS), r.load_json_cached(r.SCENES))
+    r.build_diagram(r.load_json_cached(r.CFG), scene, _FONTS)
+
+def render_svg(cfg: Dict, scene: Dict, ast: Dict, output: Dict = None) -> Tuple[str, int, int, float]:
+    """Im Worker: (SVG, Breite, Höhe, Renderzeit in ms)."""
+    if _FONTS is None:
+        _init_worker(get_backend().name)
+    t0 = time.perf_counter()
+    svg, w, h = r.build_diagram(cfg, scene, _FONTS, ast, output)
+    return svg, w, h, (time.perf_counter() - t0) * 1e3
+
+# ---------- Dienst ----------
+class RenderServer:
+    """Löst Anfragen zu (cfg, scene) auf, cached fertige SVGs und verteilt das Rendern auf den Pool."""
+
+    def __init__(self, workers: int = 0, cfg_path: str = r.CFG, log=sys.stderr):
+        self.workers = workers
+        self.cfg_path = cfg_path
+        self.log = log
+        self.pool: Optional[Executor] = None
+        self._svgs: "OrderedDict[str, Tuple[str, int, int]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.requests = self.renders = self.cache_hits = self.coalesced = self.errors = 0
+        self.started = time.time()
+
+    def start_pool(self):
+        backend = get_backend().name
+        if self.workers > 0:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(backend,))
+        else:
+            _init_worker(backend)
+            self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render")
+
+    async def warm_up(self):
+        """Startet alle Worker-Prozesse vorab, damit die erste Anfrage keine Fonts laden muss."""
+        if self.workers > 0:
+            loop = asyncio.get_running_loop()
+            scene = r.scene_for("clone", r.load_json_cached(r.COMMANDS), r.load_json_cached(r.SCENES))
+            jobs = [loop.run_in_executor(self.pool, render_svg, r.load_json_cached(self.cfg_path), scene, r.load_ast())
+                    for _ in range(self.workers)]
+            await asyncio.gather(*jobs)
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def resolve(self, req: Dict) -> Tuple[Dict, Dict, Dict]:
+        """(cfg, scene, output) einer Anfrage; Katalog, Szenen und Config sind mtime-gecacht."""
+        if not isinstance(req, dict):
+            raise RequestError(400, "Anfrage muss ein JSON-Objekt sein")
+        overrides = req.get("config") or {}
+        if not isinstance(overrides, dict):
+            raise RequestError(400, "'config' muss ein Objekt sein")
+        cfg = {**r.load_json_cached(self.cfg_path), **overrides}
+        scene = req.get("scene")
+        if scene is None:
+            try:
+                scene = r.scene_for(req.get("command", "clone"),
+                                    r.load_json_cached(r.COMMANDS), r.load_json_cached(r.SCENES))
+            except KeyError as e:
+                raise RequestError(404, str(e.args[0]))
+        elif not (isinstance(scene, dict) and isinstance(scene.get("header"), dict)
+                  and {"syntax", "cmdline", "desc"} <= scene["header"].keys()):
+            raise RequestError(400, "'scene' braucht header mit syntax, cmdline und desc")
+        try:
+            tv = r.template_vars(cfg)
+        except KeyError as e:
+            raise RequestError(400, f"Config-Wert fehlt: {e.args[0]}")
+        for field in ("cmdline", "desc"):
+            try:
+                str(scene["header"][field]).format_map(tv)
+            except KeyError as e:
+                raise RequestError(400, f"unbekannter Platzhalter {{{e.args[0]}}} in header.{field}")
+            except (ValueError, IndexError) as e:
+                raise RequestError(400, f"ungültige Vorlage in header.{field}: {e}")
+        output = {}
+        if req.get("optimize"):
+            precision = req.get("precision", r.DEFAULT_PRECISION)
+            if not isinstance(precision, int) or not 0 <= precision <= 6:
+                raise RequestError(400, "'precision' muss eine Ganzzahl 0..6 sein")
+            output = {"optimize": True, "precision": precision}
+        return cfg, scene, output
+
+    async def render(self, req: Dict) -> Tuple[str, int, int, float, bool]:
+        """(SVG, Breite, Höhe, Renderzeit ms, aus Cache)."""
+        cfg, scene, output = self.resolve(req)
+        ast = r.load_ast()
+        key = canonical_hash([cfg, scene, ast, output, r.load_json_cached(STYLE_LIBRARY) if output else None,
+                              r.git_state(cfg)])
+        hit = self._svgs.get(key)
+        if hit is not None:
+            self._svgs.move_to_end(key)
+            self.cache_hits += 1
+            return (*hit, 0.0, True)
+        fut = self._inflight.get(key)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = self._inflight[key] = asyncio.ensure_future(
+                loop.run_in_executor(self.pool, render_svg, cfg, scene, ast, output))
+            fut.add_done_callback(lambda f: self._finished(key, f))
+            self.renders += 1
+        else:
+            self.coalesced += 1
+        svg, w, h, ms = await asyncio.shield(fut)
+        return svg, w, h, ms, False
+
+    def _finished(self, key: str, fut: asyncio.Future):
+        """Ergebnis sofort in den Cache, bevor wartende Anfragen weiterlaufen."""
+        self._inflight.pop(key, None)
+        if fut.cancelled() or fut.exception() is not None:
+            return
+        svg, w, h, _ms = fut.result()
+        self._svgs[key] = (svg, w, h)
+        while len(self._svgs) > SVG_CACHE_ENTRIES:
+            self._svgs.popitem(last=False)
+
+    def health(self) -> Dict:
+        return {"status": "ok", "backend": get_backend().name, "workers": self.workers,
+                "uptime_s": round(time.time() - self.started, 1), "requests": self.requests,
+                "renders": self.renders, "cache_hits": self.cache_hits, "coalesced": self.coalesced, "errors": self.errors,
+                "svg_cache": len(self._svgs), "metrics_cache": len(METRICS_CACHE)}
+
+    # ---------- HTTP ----------
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, str, bytes, Dict[str, str]]:
+        url = urlsplit(target)
+        path = unquote(url.path)
+        if path == "/health" and method == "GET":
+            return 200, "application/json", json.dumps(self.health()).encode(), {}
+        if path == "/render" and method == "POST":
+            try:
+                req = json.loads(body or b"{}")
+            except ValueError as e:
+                raise RequestError(400, f"ungültiges JSON: {e}")
+        elif path.startswith("/render/") and method == "GET":
+            req = {"command": path[len("/render/"):]}
+            query = parse_qs(url.query)
+            if query.get("optimize", ["0"])[-1] not in ("", "0", "false"):
+                req["optimize"] = True
+            if "precision" in query:
+                try:
+                    req["precision"] = int(query["precision"][-1])
+                except ValueError:
+                    raise RequestError(400, "'precision' muss eine Ganzzahl 0..6 sein")
+        elif path in ("/render", "/health") or path.startswith("/render/"):
+            raise RequestError(405, f"{method} nicht erlaubt")
+        else:
+            raise RequestError(404, f"unbekannter Pfad {path}")
+        svg, w, h, ms, cached = await self.render(req)
+        return 200, "image/svg+xml; charset=utf-8", svg.encode("utf-8"), {
+            "X-Diagram-Size": f"{w}x{h}", "X-Cache": "hit" if cached else "miss",
+            "Server-Timing": f"render;dur={ms:.2f}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Eine Verbindung; mehrere Anfragen nacheinander (Keep-Alive)."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                t0 = time.perf_counter()
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    k, sep, v = line.partition(":")
+                    if sep:
+                        headers[k.strip().lower()] = v.strip()
+                keep = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                self.requests += 1
+                try:
+                    try:
+                        n = int(headers.get("content-length") or 0)
+                    except ValueError:
+                        n = -1
+                    if not 0 <= n <= MAX_BODY:
+                        keep = False   # Body-Länge unbekannt: Verbindung nicht weiterverwenden
+                        raise RequestError(413 if n > MAX_BODY else 400,
+                                           "Anfrage zu groß" if n > MAX_BODY else "ungültige Content-Length")
+                    body = await reader.readexactly(n) if n else b""
+                    status, ctype, payload, extra = await self.dispatch(method, target, body)
+                except RequestError as e:
+                    self.errors += 1
+                    status, ctype, payload, extra = e.status, "application/json", json.dumps({"error": str(e)}).encode(), {}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:   # Renderfehler: Dienst läuft weiter
+                    self.errors += 1
+                    status, ctype, payload, extra = 500, "application/json", json.dumps(
+                        {"error": f"{type(e).__name__}: {e}"}).encode(), {}
+                hdr = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}",
+                       f"Content-Type: {ctype}", f"Content-Length: {len(payload)}",
+                       f"Connection: {'keep-alive' if keep else 'close'}"]
+                hdr += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(hdr) + "\r\n\r\n").encode("latin-1") + payload)
+                await writer.drain()
+                if self.log:
+                    print(f"{method} {target} {status} {(time.perf_counter()-t0)*1e3:.2f} ms", file=self.log)
+                if not keep:
+                    break
+        finally:
+            writer.close()
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+async def serve(server: RenderServer, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix: str = None):
+    server.start_pool()
+    try:
+        await server.warm_up()
+        if unix:
+            if os.path.exists(unix):
+                os.remove(unix)
+            srv = await asyncio.start_unix_server(server.handle, path=unix, backlog=BACKLOG)
+            where = f"unix:{unix}"
+        else:
+            srv = await asyncio.start_server(server.handle, host, port, backlog=BACKLOG)
+            where = "http://" + ", ".join(f"{s.getsockname()[0]}:{s.getsockname()[1]}" for s in srv.sockets)
+        pool = f"{server.workers} Worker-Prozess(e)" if server.workers > 0 else "Render-Thread"
+        print(f"Render-Server auf {where} (Backend {get_backend().name}, {pool})", file=sys.stderr, flush=True)
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        server.close()
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Lokaler Render-Dienst mit warmen Fonts und Caches")
+    ap.add_argument("--host", default=DEFAULT_HOST)
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--unix", help="Unix-Socket statt TCP")
+    ap.add_argument("--jobs", "-j", type=int, default=0, help="Worker-Prozesse (0 = Render-Thread im Server)")
+    ap.add_argument("--config", default=r.CFG, help="Basis-Config (Overrides je Anfrage)")
+    ap.add_argument("--metrics", choices=["pillow", "ttf", "table"], help="Metrik-Backend")
+    ap.add_argument("--quiet", "-q", action="store_true", help="keine Zeile je Anfrage")
+    args = ap.parse_args(argv)
+    if args.metrics:
+        set_backend(args.metrics)
+    server = RenderServer(args.jobs, args.config, log=None if args.quiet else sys.stderr)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
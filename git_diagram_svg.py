@@ -0,0 +1,280 @@
+# git_diagram_svg.py
+# - Streaming-SVG-Writer: Elemente gehen direkt in eine Senke (Datei, io.TextIOBase, ...)
+# - Escaping für Textinhalt und Attributwerte an einer Stelle
+# - Zeichenprimitiven (rect/text/line/path/circle) mit denselben Defaults wie die svg_*-Helfer
+#   in render_clone_svg; andere Senken (z.B. Raster) implementieren dieselben Methoden
+# - Elemente durch '\n' getrennt, ohne abschließenden Umbruch (wie das frühere "\n".join)
+# - optimierte Ausgabe (OptimizedSvgWriter): CSS-Klassen statt Präsentationsattributen,
+#   wiederkehrende Teilbäume als <symbol> + <use>, gerundete Koordinaten
+# - kanonische Ausgabe (CanonicalSvgWriter): Attribute sortiert, Zahlen mit fester Genauigkeit
+#   (124.0 -> 124), Markup ohne Einrückung; Grundlage für Golden-Korpus und Struktur-Diff
+
+import io, re
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+SVG_FONT_FAMILY_BODY = "Segoe UI, Arial, sans-serif"
+SVG_FONT_FAMILY_MONO = "Consolas, Cascadia Mono, monospace"
+
+Attrs = Iterable[Tuple[str, object]]
+
+def esc(s: str) -> str:
+    return s.replace("&","&amp;").replace("<","&lt;").replace(">","&gt;")
+
+def esc_attr(s: str) -> str:
+    return esc(s).replace('"','&quot;').replace("'", "&apos;")
+
+def format_attrs(attrs: Attrs) -> str:
+    """' k="v"' je Attribut; None wird ausgelassen, Zahlen bleiben unescaped."""
+    out = []
+    for k, v in attrs:
+        if v is None:
+            continue
+        out.append(f' {k}="{v}"' if type(v) in (int, float) else f' {k}="{esc_attr(str(v))}"')
+    return "".join(out)
+
+def format_element(tag: str, attrs: Attrs, text: Optional[str] = None) -> str:
+    a = format_attrs(attrs)
+    if text is None:
+        return f"<{tag}{a}/>"
+    return f"<{tag}{a}>{esc(text)}</{tag}>"
+
+# ---------- Attribut-Reihenfolge der Primitiven ----------
+def rect_attrs(x,y,w,h,rx=None,ry=None,fill=None,stroke=None,sw=None,opacity=None):
+    return (("x",x),("y",y),("width",w),("height",h),("rx",rx),("ry",ry),
+            ("fill",fill),("stroke",stroke),("stroke-width",sw),("opacity",opacity))
+
+def text_attrs(x,y,fs=16,fw="normal",color="#111",anchor="start",font_family=SVG_FONT_FAMILY_BODY):
+    return (("x",x),("y",y),("font-size",fs),("font-weight",fw),("fill",color),
+            ("text-anchor",anchor),("font-family",font_family))
+
+def line_attrs(x1,y1,x2,y2,stroke="#111",sw=2,marker=None):
+    return (("x1",x1),("y1",y1),("x2",x2),("y2",y2),("stroke",stroke),("stroke-width",sw),
+            ("marker-end", f"url(#{marker})" if marker else None))
+
+def path_attrs(d, stroke="#111", sw=2, fill="none", marker_end=None, linecap="round", linejoin="round"):
+    return (("d",d),("fill",fill),("stroke",stroke),("stroke-width",sw),("stroke-linecap",linecap),
+            ("stroke-linejoin",linejoin),("marker-end", f"url(#{marker_end})" if marker_end else None))
+
+def circle_attrs(cx,cy,r,stroke="#111",fill="#fff",sw=3):
+    return (("cx",cx),("cy",cy),("r",r),("fill",fill),("stroke",stroke),("stroke-width",sw))
+
+class SvgWriter:
+    """Schreibt SVG-Elemente sofort in sink (alles mit .write(str)).
+    regions: True, wenn der Writer Trefferflächen (region) sammelt; die Zeichenfunktionen
+    rufen region() nur dann auf (SVG/Raster: kein Aufwand)."""
+    regions = False
+
+    def __init__(self, sink):
+        self._write = sink.write
+        self._sep = ""
+        self.count = 0   # geschriebene Elemente
+
+    def raw(self, markup: str):
+        """Fertiges Markup als eigene Zeile (Defs, Kommentare)."""
+        self._write(self._sep + markup)
+        self._sep = "\n"
+
+    def element(self, tag: str, attrs: Attrs, text: Optional[str] = None):
+        self._write(self._sep + format_element(tag, attrs, text))
+        self._sep = "\n"
+        self.count += 1
+
+    def open(self, tag: str, attrs: Attrs = ()):
+        self.raw(f"<{tag}{format_attrs(attrs)}>")
+
+    def close(self, tag: str):
+        self.raw(f"</{tag}>")
+
+    def region(self, kind: str, x, y, w, h, data=None):
+        """Trefferfläche eines Szenen-Objekts (repo, panel, file, ref, commit, arrow); hier ohne Wirkung."""
+
+    # ---------- Primitiven ----------
+    def rect(self, x,y,w,h,rx=None,ry=None,fill=None,stroke=None,sw=None,opacity=None):
+        self.element("rect", rect_attrs(x,y,w,h,rx,ry,fill,stroke,sw,opacity))
+
+    def text(self, x,y,s,fs=16,fw="normal",color="#111",anchor="start",font_family=SVG_FONT_FAMILY_BODY):
+        self.element("text", text_attrs(x,y,fs,fw,color,anchor,font_family), s)
+
+    def line(self, x1,y1,x2,y2,stroke="#111",sw=2,marker=None):
+        self.element("line", line_attrs(x1,y1,x2,y2,stroke,sw,marker))
+
+    def path(self, d, stroke="#111", sw=2, fill="none", marker_end=None, linecap="round", linejoin="round"):
+        self.element("path", path_attrs(d,stroke,sw,fill,marker_end,linecap,linejoin))
+
+    def circle(self, cx,cy,r,stroke="#111",fill="#fff",sw=3):
+        self.element("circle", circle_attrs(cx,cy,r,stroke,fill,sw))
+
+    def symbol(self, key: tuple, x, y, draw: Callable[["SvgWriter", float, float], None]):
+        """Wiederkehrender Teilbaum: draw(writer, x, y) zeichnet ihn an (x, y).
+        Hier direkt; OptimizedSvgWriter legt ihn je key einmal als <symbol> ab."""
+        draw(self, x, y)
+
+# ---------- Optimierte Ausgabe ----------
+PRESENTATION = frozenset(("font-size", "font-weight", "font-family", "text-anchor", "fill", "stroke",
+                          "stroke-width", "stroke-linecap", "stroke-linejoin", "opacity"))
+CSS_INITIAL = {"font-weight": "normal", "text-anchor": "start"}   # Anfangswerte entfallen ganz
+DEFAULT_PRECISION = 2
+
+Decls = Tuple[Tuple[str, str], ...]
+
+def css_decls(attrs: Attrs) -> Decls:
+    """Präsentationsattribute als sortierte CSS-Deklarationen (font-size mit px)."""
+    out = []
+    for k, v in attrs:
+        if v is None or k not in PRESENTATION:
+            continue
+        v = str(v)
+        if CSS_INITIAL.get(k) == v:
+            continue
+        if k == "font-size" and not v.endswith("px"):
+            v += "px"
+        out.append((k, v))
+    return tuple(sorted(out))
+
+def style_classes(library: Dict) -> Dict[Decls, str]:
+    """Klassen aus git_diagram_style_library.json: Einträge mit "css" -> {Deklarationen: Name}."""
+    return {css_decls(e["css"].items()): name for name, e in library.items()
+            if isinstance(e, dict) and isinstance(e.get("css"), dict)}
+
+class OptimizedSvgWriter(SvgWriter):
+    """Kompakte Ausgabe: Präsentationsattribute als CSS-Klassen (Namen aus der Style-Library,
+    sonst c0, c1, ...), Teilbäume aus symbol() als <symbol> + <use>, Zahlen auf precision
+    Nachkommastellen. <style> und Symbole folgen gestreamt am Ende (gelten dokumentweit)."""
+
+    def __init__(self, sink, precision: int = DEFAULT_PRECISION, classes: Dict[Decls, str] = None,
+                 _shared: Dict = None):
+        super().__init__(sink)
+        self.precision = precision
+        self._shared = _shared or {"library": dict(classes or {}), "names": {},
+                                   "rules": OrderedDict(), "auto": 0, "symbols": {}, "defs": []}
+        self._depth = 0
+
+    def num(self, v):
+        if type(v) is not float:
+            return v
+        s = f"{v:.{self.precision}f}".rstrip("0").rstrip(".") if self.precision > 0 else str(round(v))
+        return "0" if s in ("", "-0") else s
+
+    def _round_path(self, d: str) -> str:
+        return re.sub(r"-?\d+\.\d+", lambda m: str(self.num(float(m.group()))), d)
+
+    def class_for(self, decls: Decls) -> str:
+        sh = self._shared
+        name = sh["names"].get(decls)
+        if name is None:
+            name = sh["library"].get(decls)
+            if name is None:
+                name, sh["auto"] = f"c{sh['auto']}", sh["auto"] + 1
+            sh["names"][decls] = name
+            sh["rules"][name] = decls
+        return name
+
+    def element(self, tag: str, attrs: Attrs, text: Optional[str] = None):
+        geo = []
+        for k, v in attrs:
+            if v is None or k in PRESENTATION:
+                continue
+            geo.append((k, self._round_path(v) if k == "d" else self.num(v)))
+        decls = css_decls(attrs)
+        if decls:
+            geo.append(("class", self.class_for(decls)))
+        super().element(tag, geo, text)
+
+    def symbol(self, key: tuple, x, y, draw):
+        sh = self._shared
+        sid = sh["symbols"].get(key)
+        if sid is None:
+            buf = io.StringIO()
+            draw(OptimizedSvgWriter(buf, self.precision, _shared=sh), 0, 0)
+            sid = sh["symbols"][key] = f"s{len(sh['symbols'])}"
+            sh["defs"].append(f'<symbol id="{sid}" overflow="visible">\n{buf.getvalue()}\n</symbol>')
+        self.element("use", (("href", f"#{sid}"), ("x", x), ("y", y)))
+
+    def open(self, tag: str, attrs: Attrs = ()):
+        self._depth += 1
+        super().open(tag, attrs)
+
+    def close(self, tag: str):
+        self._depth -= 1
+        if self._depth == 0:
+            self._write_defs()
+        super().close(tag)
+
+    def _write_defs(self):
+        sh = self._shared
+        if not sh["rules"] and not sh["defs"]:
+            return
+        self.raw("<defs>")
+        if sh["rules"]:
+            self.raw("<style>" + " ".join(f".{n}{{{';'.join(f'{k}:{v}' for k, v in d)}}}"
+                                          for n, d in sh["rules"].items()) + "</style>")
+        for markup in sh["defs"]:
+            self.raw(markup)
+        self.raw("</defs>")
+
+# ---------- Kanonische Ausgabe ----------
+CANONICAL_PRECISION = 3
+_TAG = re.compile(r'<([A-Za-z][\w:-]*)((?:\s+[\w:-]+="[^"]*")*)\s*(/?)>')
+_ATTR = re.compile(r'([\w:-]+)="([^"]*)"')
+_DECIMAL = re.compile(r"-?\d+\.\d+")
+
+def canonical_num(v, precision: int = CANONICAL_PRECISION):
+    """float mit fester Genauigkeit ohne überflüssige Nullen ("12.5", "124", nie "-0"); sonst unverändert."""
+    if type(v) is not float:
+        return v
+    s = f"{v:.{precision}f}".rstrip("0").rstrip(".")
+    return "0" if s in ("", "-0") else s
+
+def canonical_decimals(s: str, precision: int = CANONICAL_PRECISION) -> str:
+    """Dezimalzahlen in einem Attributwert (Pfad-Daten, viewBox, ...) kanonisch formatieren."""
+    return _DECIMAL.sub(lambda m: canonical_num(float(m.group()), precision), s)
+
+def _canonical_tag(m, precision: int) -> str:
+    attrs = sorted(_ATTR.findall(m.group(2)))
+    return f"<{m.group(1)}" + "".join(f' {k}="{canonical_decimals(v, precision)}"' for k, v in attrs) + f"{m.group(3)}>"
+
+class CanonicalSvgWriter(SvgWriter):
+    """Byte-stabile Ausgabe: Attribute nach Namen sortiert, Zahlen mit fester Genauigkeit
+    (int und ganzzahliger float gleich), auch in fertigem Markup aus raw(); ohne Einrückung.
+    Präsentationsattribute bleiben Attribute (kein CSS wie bei OptimizedSvgWriter)."""
+
+    def __init__(self, sink, precision: int = CANONICAL_PRECISION):
+        super().__init__(sink)
+        self.precision = precision
+
+    def _attrs(self, attrs: Attrs):
+        out = []
+        for k, v in attrs:
+            if v is None:
+                continue
+            if type(v) is str:
+                v = canonical_decimals(v, self.precision)
+            out.append((k, canonical_num(v, self.precision)))
+        out.sort(key=lambda kv: kv[0])
+        return out
+
+    def raw(self, markup: str):
+        super().raw(_TAG.sub(lambda m: _canonical_tag(m, self.precision), markup.strip()))
+
+    def element(self, tag: str, attrs: Attrs, text: Optional[str] = None):
+        super().element(tag, self._attrs(attrs), text)
+
+    def open(self, tag: str, attrs: Attrs = ()):
+        SvgWriter.raw(self, f"<{tag}{format_attrs(self._attrs(attrs))}>")
+
+def make_writer(sink, optimize: bool = False, precision: int = DEFAULT_PRECISION,
+                classes: Dict[Decls, str] = None, canonical: bool = False) -> SvgWriter:
+    """Writer für eine Ausgabe: Standard (unverändertes Markup), kanonisch oder optimiert."""
+    if canonical:
+        return CanonicalSvgWriter(sink)
+    if optimize:
+        return OptimizedSvgWriter(sink, precision, classes)
+    return SvgWriter(sink)
+
+def writer_for(out=None) -> Tuple[SvgWriter, Callable[[], Optional[str]]]:
+    """(writer, done): ohne out ein eigener Puffer, done() liefert dann das Markup als String."""
+    if out is not None:
+        return out, lambda: None
+    buf = io.StringIO()
+    return SvgWriter(buf), buf.getvalue
@@ -0,0 +1,103 @@
+# git_diagram_svgdiff.py
+# - Struktur-Diff zweier SVGs: Elemente in Dokumentreihenfolge (Pfad wie svg/g[2]/text[5]),
+#   ausgerichtet über (Tag, Text), danach Attribut für Attribut verglichen; gemeinsamer Anfang und
+#   gemeinsames Ende ohne Ausrichtung (typisch: nur Attribute geändert -> linear)
+# - gleiche Bytes: sofort fertig, ohne zu parsen
+# - Zahlen in Attributwerten (auch Pfad-Daten, viewBox) optional mit Toleranz (--tol): trennt echte
+#   Layout-Änderungen von reinen Formatierungs-/Rundungsunterschieden
+# - python git_diagram_svgdiff.py alt.svg neu.svg   (Exit 1 bei Unterschieden)
+
+import argparse, difflib, re, sys
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Tuple
+
+DEFAULT_LIMIT = 20
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+Element = Tuple[str, str, Dict[str, str], str]   # (Pfad, Tag, Attribute, Text)
+
+def elements(svg: str) -> List[Element]:
+    """Alle Elemente in Dokumentreihenfolge; Namespace aus Tags entfernt, Index je Tag unter Geschwistern."""
+    out: List[Element] = []
+
+    def walk(e, path: str):
+        out.append((path, e.tag.rpartition("}")[2], dict(e.attrib), (e.text or "").strip()))
+        seen: Dict[str, int] = {}
+        for child in e:
+            tag = child.tag.rpartition("}")[2]
+            seen[tag] = seen.get(tag, 0) + 1
+            walk(child, f"{path}/{tag}[{seen[tag]}]")
+    root = ET.fromstring(svg)
+    walk(root, root.tag.rpartition("}")[2])
+    return out
+
+def same_value(a: str, b: str, tol: float = 0.0) -> bool:
+    """Gleich, oder bis auf Zahlen gleich und jede Zahl höchstens tol entfernt."""
+    if a == b:
+        return True
+    if tol <= 0 or _NUMBER.sub("#", a) != _NUMBER.sub("#", b):
+        return False
+    return all(abs(float(x) - float(y)) <= tol for x, y in zip(_NUMBER.findall(a), _NUMBER.findall(b)))
+
+def _short(e: Element) -> str:
+    attrs = " ".join(f'{k}="{v}"' for k, v in sorted(e[2].items()))
+    return f"<{e[1]}{' ' + attrs if attrs else ''}>{e[3][:40]}"
+
+def _compare(a: Element, b: Element, tol: float, out: List[str]):
+    if a[1] != b[1]:
+        out.append(f"~ {b[0]} Tag: {a[1]} -> {b[1]}")
+    if a[3] != b[3]:
+        out.append(f"~ {b[0]} Text: {a[3]!r} -> {b[3]!r}")
+    for k in sorted(a[2].keys() | b[2].keys()):
+        va, vb = a[2].get(k), b[2].get(k)
+        if va is None or vb is None or not same_value(va, vb, tol):
+            out.append(f"~ {b[0]} {k}: {va} -> {vb}")
+
+def structural_diff(old: str, new: str, tol: float = 0.0) -> List[str]:
+    """Unterschiede als Zeilen: "~ Pfad attr: alt -> neu", "- Pfad <...>" (entfallen), "+ Pfad <...>" (neu)."""
+    if old == new:
+        return []
+    a, b = elements(old), elements(new)
+    ka, kb = [(e[1], e[3]) for e in a], [(e[1], e[3]) for e in b]
+    # gemeinsamer Anfang/Ende direkt paarweise; SequenceMatcher (quadratisch) nur für den Rest
+    n = min(len(ka), len(kb))
+    lo = next((i for i in range(n) if ka[i] != kb[i]), n)
+    hi = next((i for i in range(n - lo) if ka[-1 - i] != kb[-1 - i]), n - lo)
+    sm = difflib.SequenceMatcher(None, ka[lo:len(ka) - hi], kb[lo:len(kb) - hi], autojunk=False)
+    ops = [("equal", 0, lo, 0, lo)]
+    ops += [(op, i1 + lo, i2 + lo, j1 + lo, j2 + lo) for op, i1, i2, j1, j2 in sm.get_opcodes()]
+    ops.append(("equal", len(ka) - hi, len(ka), len(kb) - hi, len(kb)))
+    out: List[str] = []
+    for op, i1, i2, j1, j2 in ops:
+        if op == "equal" or (op == "replace" and i2 - i1 == j2 - j1):
+            for ea, eb in zip(a[i1:i2], b[j1:j2]):
+                _compare(ea, eb, tol, out)
+            continue
+        out.extend(f"- {e[0]} {_short(e)}" for e in a[i1:i2])
+        out.extend(f"+ {e[0]} {_short(e)}" for e in b[j1:j2])
+    if not out:   # nur Formatierung (Reihenfolge der Attribute, Leerraum, Zahlen innerhalb tol)
+        out.append("= strukturell gleich, Bytes verschieden")
+    return out
+
+def format_diff(lines: List[str], limit: int = DEFAULT_LIMIT) -> str:
+    more = len(lines) - limit
+    return "\n".join(lines[:limit] + ([f"… {more} weitere Unterschiede"] if more > 0 else []))
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Struktur-Diff zweier SVG-Dateien")
+    ap.add_argument("old")
+    ap.add_argument("new")
+    ap.add_argument("--tol", type=float, default=0.0, help="Toleranz für Zahlen in Attributen")
+    ap.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="höchstens so viele Unterschiede ausgeben")
+    args = ap.parse_args(argv)
+    with open(args.old, encoding="utf-8") as f:
+        old = f.read()
+    with open(args.new, encoding="utf-8") as f:
+        new = f.read()
+    lines = structural_diff(old, new, args.tol)
+    if lines:
+        print(format_diff(lines, args.limit))
+    return 1 if lines and not lines[0].startswith("=") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
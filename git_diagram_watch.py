@@ -0,0 +1,152 @@
+# git_diagram_watch.py
+# - Watch-Modus (git_diagram_batch --watch): Eingabedateien (Config/Matrix, Katalog, Szenen, Style-Library,
+#   AST) per Polling beobachten – nur os.stat (mtime + Größe), keine externen Dienste
+# - nach einer Änderung: geänderte Schlüssel je Datei anzeigen (z.B. scenes: push.arrow.label), Jobs neu
+#   planen; welche Diagramme betroffen sind, entscheiden die Eingabe-Hashes je Diagramm (Build-Manifest):
+#   eine Szene betrifft nur ihren Befehl, ein Config-Key nur Varianten, die ihn nicht überschreiben
+# - betroffene Diagramme im selben Prozess neu rendern: Fonts, Metrik-Cache und Layout-Cache bleiben warm
+# - Latenz je Änderung: Edit (mtime der Datei) -> Ausgabe geschrieben, aufgeteilt in Erkennung/Planung/Rendern
+# - halb geschriebene Dateien (ungültiges JSON) werden gemeldet; der nächste Speichervorgang zählt
+
+import os, sys, time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import render_clone_svg as r
+from git_diagram_batch import filter_unchanged, record_results, render_job, worker_fonts
+from git_diagram_manifest import STYLE_LIBRARY
+from git_diagram_svg import SvgWriter
+
+DEFAULT_INTERVAL = 0.05   # Sekunden zwischen zwei Polls
+MAX_KEYS = 6              # angezeigte geänderte Schlüssel je Datei
+
+Stamp = Optional[Tuple[int, int]]
+
+def watched_files(config_paths: List[str] = None, matrix_path: str = None) -> List[str]:
+    """Alle JSON-Eingaben eines Batch-Laufs (Matrix inkl. ihrer Basis-Config)."""
+    files = list(config_paths or [])
+    if matrix_path:
+        files.append(matrix_path)
+        base = r.load_json(matrix_path).get("base", r.CFG)
+        files.append(os.path.join(os.path.dirname(matrix_path), base))
+    if not files:
+        files.append(r.CFG)
+    files += [r.COMMANDS, r.SCENES, STYLE_LIBRARY, r.AST]
+    return list(dict.fromkeys(os.path.normpath(p) for p in files))
+
+def stamp(path: str) -> Stamp:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def changed_keys(old, new, prefix: str = "") -> List[str]:
+    """Pfade der geänderten Schlüssel zweier JSON-Werte; Listen von Objekten mit "id" je id verglichen."""
+    if old == new:
+        return []
+    if isinstance(old, list) and isinstance(new, list) and all(isinstance(x, dict) and "id" in x for x in old + new):
+        old, new = {x["id"]: x for x in old}, {x["id"]: x for x in new}
+    if not (isinstance(old, dict) and isinstance(new, dict)):
+        return [prefix or "(gesamt)"]
+    out = []
+    for k in sorted(old.keys() | new.keys(), key=str):
+        out += changed_keys(old.get(k), new.get(k), f"{prefix}.{k}" if prefix else str(k))
+    return out
+
+class _NullSink:
+    def write(self, s: str):
+        pass
+
+class Watcher:
+    """Pollt files; plan() liefert die aktuellen Jobs (wie git_diagram_batch.plan_jobs)."""
+
+    def __init__(self, plan: Callable[[], List[Dict]], files: List[str], interval: float = DEFAULT_INTERVAL,
+                 out=None):
+        self.plan = plan
+        self.files = files
+        self.interval = interval
+        self.out = out or sys.stdout
+        self.stamps: Dict[str, Stamp] = {p: stamp(p) for p in files}
+        self.data: Dict[str, object] = {}
+        for p in files:
+            try:
+                self.data[p] = r.load_json(p)
+            except (OSError, ValueError):
+                self.data[p] = None
+
+    def log(self, msg: str):
+        print(msg, file=self.out, flush=True)
+
+    def warm_up(self):
+        """Fonts einmal laden und alle Diagramme einmal messen (ohne Ausgabe) -> erste Änderung schon warm."""
+        t0 = time.perf_counter()
+        fonts = worker_fonts()
+        for job in self.plan():
+            r.draw_to(SvgWriter(_NullSink()), job["cfg"], job["scene"], fonts)
+        self.log(f"Watch: {len(self.files)} Dateien, Caches warm in {(time.perf_counter() - t0)*1e3:.0f} ms "
+                 f"(Strg+C beendet)")
+
+    def poll(self) -> Dict[str, Stamp]:
+        """Geänderte Dateien seit dem letzten Poll -> neuer Stempel."""
+        changed = {}
+        for p in self.files:
+            s = stamp(p)
+            if s != self.stamps[p]:
+                changed[p] = self.stamps[p] = s
+        return changed
+
+    def rebuild(self, changed: Dict[str, Stamp]) -> Optional[Dict]:
+        """Neu planen, betroffene Diagramme rendern; Zeiten in ms oder None bei Fehler."""
+        t_detect = time.time_ns()
+        edit_ns = max((s[0] for s in changed.values() if s), default=t_detect)
+        for p in changed:
+            try:
+                new = r.load_json(p)
+            except (OSError, ValueError) as e:
+                self.log(f"{p}: nicht lesbar ({e}) – warte auf nächste Änderung")
+                return None
+            keys = changed_keys(self.data.get(p), new)
+            self.data[p] = new
+            more = f" (+{len(keys) - MAX_KEYS})" if len(keys) > MAX_KEYS else ""
+            self.log(f"{p}: {', '.join(keys[:MAX_KEYS]) or 'ohne inhaltliche Änderung'}{more}")
+        t0 = time.perf_counter()
+        try:
+            jobs = self.plan()
+        except (KeyError, ValueError, OSError) as e:
+            self.log(f"Planung fehlgeschlagen: {e!r}")
+            return None
+        todo, skipped, manifests = filter_unchanged(jobs)
+        t1 = time.perf_counter()
+        results = []
+        for job in todo:
+            try:
+                results.append(render_job(job))
+            except Exception as e:   # ein fehlerhaftes Diagramm hält den Watch nicht an
+                self.log(f"  {job['name']}: Fehler {e!r}")
+        done = {x["out"] for x in results}
+        record_results([j for j in todo if j["out"] in done], manifests)
+        t2 = time.perf_counter()
+        for x in results:
+            self.log(f"  {x['name']:<24} {x['seconds']*1e3:7.1f} ms  -> {x['out']}")
+        times = {"edit_ms": (time.time_ns() - edit_ns) / 1e6, "detect_ms": (t_detect - edit_ns) / 1e6,
+                 "plan_ms": (t1 - t0) * 1e3, "render_ms": (t2 - t1) * 1e3}
+        self.log(f"{len(results)} neu, {len(skipped)} unverändert; Edit -> Ausgabe {times['edit_ms']:.0f} ms "
+                 f"(Erkennung {times['detect_ms']:.0f}, Planung {times['plan_ms']:.0f}, "
+                 f"Rendern {times['render_ms']:.0f} ms)")
+        return times
+
+    def run(self, max_changes: int = None) -> int:
+        """Poll-Schleife; max_changes: nach so vielen Änderungen beenden (None = bis Strg+C)."""
+        self.warm_up()
+        n = 0
+        try:
+            while max_changes is None or n < max_changes:
+                changed = self.poll()
+                if changed:
+                    self.rebuild(changed)
+                    n += 1
+                else:
+                    time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+        return 0
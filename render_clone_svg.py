@@ -1,31 +1,83 @@
 # render_clone_svg_pillow.py
 # - Text-BBox via Pillow
 # - bottom-up sizing, top-down placement
+# - Layout entlang git_diagram_ast_template.json (ein Knoten je AST-Teil, Mess-Cache je Teilbaum)
 # - Cmd-Panel (unsichtbar) für Arrow+Label
 # - optional drittes Repo (0px wenn nicht genutzt)
 # - Messung mit rechtem Innenabstand: 'Z'
 # - Middle-Ellipsis für sehr lange Pfade
 # - schlanker, gebogener Cmd-Pfeil (eigener Marker)
+# - PNG/PDF direkt aus denselben Primitiven (git_diagram_raster), inhaltsadressiert gecacht
+# - Repo-Zustand optional aus einem echten Git-Repository (git_diagram_gitrepo, Spec "git")
+# - Messpunkte (git_diagram_instrument, --report): Zeiten je measure_*/draw_*, Cache-Treffer, Elemente
+# - Messungen/Layout als __slots__-Objekte (git_diagram_model), JSON-Eingaben beim Binden umgewandelt
+# - optional Zielbreite (Config "TargetWidth", --width): Titel-Umbruchbreite per Binärsuche ausgeglichen,
+#   Titel/Beschreibung/Kommandozeile mit minimaler Flatterigkeit (break_lines) umbrochen statt gekürzt
+# - HTML-Viewer (--format html, git_diagram_html): Trefferflächen je Repo/Panel/Datei/Ref/Commit aus
+#   den draw_*-Funktionen (SvgWriter.region), Raster-Index, nur sichtbare Elemente im DOM
+# - kanonische Ausgabe (--canonical): sortierte Attribute, feste Genauigkeit, Tabellen-Metriken;
+#   Beispiel-IDs aus eigenem Generator (SAMPLE_SEED) statt globalem random.seed
 
-import json, os, random, re
-from typing import List, Tuple, Dict
-from PIL import ImageFont, Image, ImageDraw
+from __future__ import annotations
 
-CFG = "git_diagram_config.json"
+import bisect, io, json, ntpath, os, posixpath, random, re, sys
+from collections import OrderedDict
+from typing import List, Optional, Tuple, Dict
+from git_diagram_dag import has_parents, layout_dag
+from git_diagram_instrument import record
+from git_diagram_model import (Box, Commit, DiagramLayout, HeaderMeasurement, HistoryPanel, Measurement, Panel,
+                                Repo, RepoMeasurement, RowLayout, TextMeasurement, as_commits, coord_array)
+from git_diagram_metrics import (BACKENDS, METRICS_CACHE, Font, cache_file_from_env, font_key, get_backend,
+                                 set_backend, load_font as registry_load_font)
+from git_diagram_manifest import STYLE_LIBRARY, Manifest, canonical_hash, combined_hash, input_hashes
+from git_diagram_raster import (DEFAULT_DPI, RASTER_FORMATS, HashSink, RasterCache, RasterWriter, copy_atomic,
+                                raster_key)
+from git_diagram_svg import (DEFAULT_PRECISION, SVG_FONT_FAMILY_BODY, SVG_FONT_FAMILY_MONO, SvgWriter, circle_attrs,
+                             format_element, line_attrs, make_writer, path_attrs, rect_attrs, style_classes,
+                             text_attrs, writer_for)
+
+RENDERER_VERSION = "1"  # erhöhen, wenn sich die Ausgabe bei gleichen Eingaben ändert
+
+CFG      = "git_diagram_config.json"
+COMMANDS = "git_diagram_commands_phase1.json"
+SCENES   = "git_diagram_scenes_phase1.json"
+AST      = "git_diagram_ast_template.json"
+OUT_DIR  = "out"
 
 # ---------- Fonts ----------
 FONT_CANDIDATES_BODY = [
     r"C:\Windows\Fonts\segoeui.ttf",
     r"C:\Windows\Fonts\arial.ttf",
+    "/Library/Fonts/Arial.ttf",
+    "/System/Library/Fonts/Supplemental/Arial.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
 ]
 FONT_CANDIDATES_MONO = [
     r"C:\Windows\Fonts\consola.ttf",
     r"C:\Windows\Fonts\CascadiaMono.ttf",
     r"C:\Windows\Fonts\CascadiaMonoPL.ttf",
+    "/System/Library/Fonts/Supplemental/Courier New.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSansMono.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationMono-Regular.ttf",
 ]
-
-SVG_FONT_FAMILY_BODY = "Segoe UI, Arial, sans-serif"
-SVG_FONT_FAMILY_MONO = "Consolas, Cascadia Mono, monospace"
+# nur fürs Rastern (PNG/PDF): fette Schnitte; gemessen wird weiter mit den normalen Schnitten
+FONT_CANDIDATES_BODY_BOLD = [
+    r"C:\Windows\Fonts\segoeuib.ttf",
+    r"C:\Windows\Fonts\arialbd.ttf",
+    "/Library/Fonts/Arial Bold.ttf",
+    "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+]
+RASTER_FONTS = {
+    (SVG_FONT_FAMILY_BODY, False): FONT_CANDIDATES_BODY,
+    (SVG_FONT_FAMILY_BODY, True):  FONT_CANDIDATES_BODY_BOLD,
+    (SVG_FONT_FAMILY_MONO, False): FONT_CANDIDATES_MONO,
+}
 
 # ---------- Farben/Abstände ----------
 SIDE_MARGIN = 24
@@ -38,27 +90,70 @@ PANEL_CORNER= 10
 STROKE_REPO = "#5B4B8A"
 COL_LOCAL   = "#1B9E77"
 COL_REMOTE  = "#111"
+DAG_ROW_STEP= 24    # Zeilenabstand im DAG-Modus (Commits mit "parents")
+DAG_LANE_W  = 18    # Spurbreite im DAG-Modus
+TABLE_TITLE_W = 600 # Umbruchbreite der Panel-Titel
+MIN_TITLE_W = 120   # kleinste Umbruchbreite beim Ausgleich auf eine Zielbreite (TargetWidth)
 
 # ---------- Mess-Infrastruktur ----------
-_MEASURE_IMG = Image.new("L", (8,8), 0)
-_MEASURE_DRAW = ImageDraw.Draw(_MEASURE_IMG)
-
-def load_font(candidates: List[str], size: int) -> ImageFont.FreeTypeFont:
-    for p in candidates:
-        if os.path.exists(p):
-            try:
-                return ImageFont.truetype(p, size)
-            except Exception:
-                pass
-    return ImageFont.load_default()
-
-def measure_text(text: str, font: ImageFont.FreeTypeFont, pad_right: bool = False) -> Tuple[int,int]:
-    """Misst Text mit Pillow. pad_right=True hängt temporär 'Z' an (rechter Innenabstand)."""
-    s = (text + "Z") if pad_right else text
-    bbox = _MEASURE_DRAW.textbbox((0,0), s, font=font)
+# Backend (pillow | ttf | table) siehe git_diagram_metrics; alle liefern Fonts mit getbbox/getlength.
+def load_font(candidates: List[str], size: int, backend=None) -> Font:
+    """Über die Font-Registry: gleiche Kandidaten + Größe werden nur einmal geladen."""
+    return registry_load_font(candidates, size, backend)
+
+def _measure_text_uncached(s: str, font) -> Tuple[int,int]:
+    bbox = font.getbbox(s)
     return (bbox[2]-bbox[0], bbox[3]-bbox[1])
 
-def wrap_text(text: str, max_width: int, font: ImageFont.FreeTypeFont) -> List[str]:
+def measure_text(text: str, font: Font, pad_right: bool = False) -> Tuple[int,int]:
+    """Misst Text über das aktive Metrik-Backend. pad_right=True hängt temporär 'Z' an (rechter Innenabstand).
+    Ergebnisse landen im LRU-Cache (git_diagram_metrics.METRICS_CACHE)."""
+    s = (text + "Z") if pad_right else text
+    return METRICS_CACHE.text_size(font, text, pad_right, lambda: _measure_text_uncached(s, font))
+
+def glyph_advance(ch: str, font: Font) -> float:
+    """Vorschubbreite eines Zeichens (gecacht), Basis für Präfixsummen."""
+    return METRICS_CACHE.advance(font, ch, lambda: font.getlength(ch))
+
+def _hard_wrap(tok: str, max_width: int, font: Font) -> List[str]:
+    """Zerlegt ein zu breites Token in Zeilen (mind. 1 Zeichen je Zeile).
+    Präfixsummen der Glyph-Advances liefern die Schätzung, exakte Messung nur an der Grenze."""
+    pref = [0.0]
+    for ch in tok:
+        pref.append(pref[-1] + glyph_advance(ch, font))
+    budget = max_width - glyph_advance("Z", font)
+    n = len(tok)
+    segs = []
+    start = 0
+    while start < n:
+        def fits(end):
+            return measure_text(tok[start:end], font, pad_right=True)[0] <= max_width
+        lo = start + 1
+        guess = min(n, max(lo, bisect.bisect_right(pref, pref[start] + budget, lo=start) - 1))
+        # Galloping um die Schätzung, dann Binärsuche: größtes end mit fits(end)
+        if guess == lo or fits(guess):
+            good, bad, step = guess, n + 1, 1
+            while good < n:
+                cand = min(n, good + step)
+                if not fits(cand):
+                    bad = cand; break
+                good = cand; step *= 2
+        else:
+            bad, step = guess, 1
+            while bad - step > lo and not fits(bad - step):
+                bad -= step; step *= 2
+            good = max(lo, bad - step)
+        while bad - good > 1:
+            mid = (good + bad) // 2
+            if fits(mid):
+                good = mid
+            else:
+                bad = mid
+        segs.append(tok[start:good])
+        start = good
+    return segs
+
+def wrap_text(text: str, max_width: int, font: Font) -> List[str]:
     """Greedy Wrap (mit Messung)."""
     if not text:
         return [""]
@@ -76,23 +171,57 @@ def wrap_text(text: str, max_width: int, font: ImageFont.FreeTypeFont) -> List[s
                 lines.append(cur.rstrip())
                 cur = tok
             else:
-                # Token alleine zu breit -> hard-wrap pro Zeichen
-                buf = ""
-                for ch in tok:
-                    cand2 = buf + ch
-                    w2,_ = measure_text(cand2, font, pad_right=True)
-                    if w2 <= max_width:
-                        buf = cand2
-                    else:
-                        if buf:
-                            lines.append(buf)
-                        buf = ch
-                cur = buf
+                # Token alleine zu breit -> hard-wrap per Präfixsumme
+                segs = _hard_wrap(tok, max_width, font)
+                lines.extend(segs[:-1])
+                cur = segs[-1]
     if cur.strip():
         lines.append(cur.rstrip())
     return lines or [""]
 
-def shorten_middle(text: str, max_width: int, font: ImageFont.FreeTypeFont) -> str:
+def break_lines(text: str, max_width: int, font: Font) -> List[str]:
+    """Umbruch mit minimaler Flatterigkeit (Knuth–Plass ohne Silbentrennung): Summe der quadrierten
+    Restbreiten aller Zeilen außer der letzten minimal. Trennstellen wie wrap_text (Leerraum, / und \\),
+    zu breite Token vorab per _hard_wrap zerlegt; Zeilenbreiten über den Metrik-Cache."""
+    if not text:
+        return [""]
+    if measure_text(text.strip(), font, pad_right=True)[0] <= max_width:
+        return [text.strip()]
+    tokens = []
+    for tok in re.split(r'(\s+|[\\/])', text):
+        if not tok:
+            continue
+        if not tok.isspace() and measure_text(tok, font, pad_right=True)[0] > max_width:
+            tokens.extend(_hard_wrap(tok, max_width, font))
+        else:
+            tokens.append(tok)
+    n = len(tokens)
+    # best[i]: (Kosten, Ende der ersten Zeile) für tokens[i:], von hinten nach vorn
+    best: List[Tuple[float, int]] = [(0.0, n)]*(n + 1)
+    for i in range(n - 1, -1, -1):
+        if tokens[i].isspace():
+            best[i] = best[i + 1]   # Zeilen beginnen nicht mit Leerraum
+            continue
+        cand = (float("inf"), i + 1)
+        for j in range(i + 1, n + 1):
+            w, _ = measure_text("".join(tokens[i:j]).rstrip(), font, pad_right=True)
+            if w > max_width and j > i + 1:
+                break
+            cost = best[j][0] + (0 if j == n else (max_width - w)**2)
+            if cost < cand[0]:
+                cand = (cost, j)
+        best[i] = cand
+    lines, i = [], 0
+    while i < n:
+        if tokens[i].isspace():
+            i += 1
+            continue
+        j = best[i][1]
+        lines.append("".join(tokens[i:j]).rstrip())
+        i = j
+    return lines or [""]
+
+def shorten_middle(text: str, max_width: int, font: Font) -> str:
     """Mittiges '…' einfügen, sodass der Text in max_width passt."""
     if not text:
         return ""
@@ -102,62 +231,103 @@ def shorten_middle(text: str, max_width: int, font: ImageFont.FreeTypeFont) -> s
     ell = "…"
     ew,_ = measure_text(ell, font, pad_right=True)
     # Start: etwa 60% links / 40% rechts behalten
-    left = int(len(text)*0.6)
-    right = len(text) - left
-    L = text[:left]
-    R = text[-right:] if right>0 else ""
-    def total_w(L,R):
+    n = len(text)
+    left = int(n*0.6)
+    right = n - left
+    # Kürzungsfolge (immer die längere Seite) ohne Messung vorab bestimmen ...
+    states = [(left, right)]
+    l, r = left, right
+    while l > 1 or r > 1:
+        if l >= r and l > 1:
+            l -= 1
+        elif r > 1:
+            r -= 1
+        else:
+            break
+        states.append((l, r))
+    def parts(i):
+        l, r = states[i]
+        return text[:l], (text[n-r:] if r > 0 else "")
+    def fits(i):
+        L, R = parts(i)
         lw,_ = measure_text(L, font, pad_right=True)
         rw,_ = measure_text(R, font, pad_right=True)
-        return lw + ew + rw
-    # Shrink bis passend
-    while total_w(L,R) > max_width and (len(L)>1 or len(R)>1):
-        if len(L) >= len(R) and len(L)>1:
-            L = L[:-1]
-        elif len(R)>1:
-            R = R[1:]
+        return lw + ew + rw <= max_width
+    # ... und per Binärsuche den ersten passenden Zustand finden
+    lo, hi = 0, len(states) - 1
+    if not fits(hi):
+        lo = hi
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if fits(mid):
+            hi = mid
         else:
-            break
+            lo = mid + 1
+    L, R = parts(lo)
     return L + ell + R
 
 # ---------- SVG helpers ----------
-def esc(s: str) -> str:
-    return s.replace("&","&amp;").replace("<","&lt;").replace(">","&gt;")
-
+# Markup-Primitiven kommen aus git_diagram_svg; die svg_*-Helfer liefern weiter einzelne Strings,
+# die draw_*-Funktionen schreiben über einen SvgWriter (out=None: eigener Puffer, Rückgabe als String).
 def svg_text(x,y,s,fs=16,fw="normal",color="#111",anchor="start",font_family=SVG_FONT_FAMILY_BODY):
-    ff = font_family.replace('"','&quot;').replace("'", "&apos;")
-    return f'<text x="{x}" y="{y}" font-size="{fs}" font-weight="{fw}" fill="{color}" text-anchor="{anchor}" font-family="{ff}">{esc(s)}</text>'
+    return format_element("text", text_attrs(x,y,fs,fw,color,anchor,font_family), s)
 
 def svg_rect(x,y,w,h,rx=10,ry=10,stroke="#5B4B8A",fill="#fff",sw=2):
-    return f'<rect x="{x}" y="{y}" width="{w}" height="{h}" rx="{rx}" ry="{ry}" fill="{fill}" stroke="{stroke}" stroke-width="{sw}"/>'
+    return format_element("rect", rect_attrs(x,y,w,h,rx,ry,fill,stroke,sw))
 
 def svg_line(x1,y1,x2,y2,stroke="#111",sw=2,marker=None):
-    m = f' marker-end="url(#{marker})"' if marker else ""
-    return f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{stroke}" stroke-width="{sw}"{m}/>'
+    return format_element("line", line_attrs(x1,y1,x2,y2,stroke,sw,marker))
 
 def svg_path(d, stroke="#111", sw=2, fill="none", marker_end=None, linecap="round", linejoin="round"):
-    m = f' marker-end="url(#{marker_end})"' if marker_end else ""
-    return f'<path d="{d}" fill="{fill}" stroke="{stroke}" stroke-width="{sw}" stroke-linecap="{linecap}" stroke-linejoin="{linejoin}"{m}/>'
+    return format_element("path", path_attrs(d,stroke,sw,fill,marker_end,linecap,linejoin))
 
 def svg_circle(cx,cy,r,stroke="#111",fill="#fff",sw=3):
-    return f'<circle cx="{cx}" cy="{cy}" r="{r}" fill="{fill}" stroke="{stroke}" stroke-width="{sw}"/>'
+    return format_element("circle", circle_attrs(cx,cy,r,stroke,fill,sw))
+
+def rounded_label(x,y,w,h,label,bg="#EEE",fg="#111",bold=False, out=None):
+    out, done = writer_for(out)
+    out.symbol(("pill", w, h, bg), x, y, lambda o, x, y: o.rect(x,y,w,h,6,6,fill=bg))
+    out.text(x+w/2, y+h*0.7, label, fs=13, fw=("bold" if bold else "normal"), color=fg, anchor="middle")
+    return done()
+
+def stack_icon(x,y,n=3,w=16,h=10,stroke="#111", out=None):
+    out, done = writer_for(out)
+    def draw(o, x, y):
+        for i in range(n):
+            dx=dy=i*2
+            o.rect(x+dx,y+dy,w,h,fill="#fff",stroke=stroke,sw=1)
+    out.symbol(("stack", n, w, h, stroke), x, y, draw)
+    return done()
 
-def rounded_label(x,y,w,h,label,bg="#EEE",fg="#111",bold=False):
-    return "\n".join([
-        f'<rect x="{x}" y="{y}" width="{w}" height="{h}" rx="6" ry="6" fill="{bg}"/>',
-        svg_text(x+w/2, y+h*0.7, label, fs=13, fw=("bold" if bold else "normal"), color=fg, anchor="middle")
-    ])
+_CHANGE_COLORS: Dict[str, str] = {}
+_CHANGE_LIB = [None]   # Style-Library, aus der _CHANGE_COLORS stammt (neu bei geänderter Datei, z.B. --watch)
 
-def stack_icon(x,y,n=3,w=16,h=10,stroke="#111"):
-    parts=[]
-    for i in range(n):
-        dx=dy=i*2
-        parts.append(f'<rect x="{x+dx}" y="{y+dy}" width="{w}" height="{h}" fill="#fff" stroke="{stroke}" stroke-width="1"/>')
-    return "\n".join(parts)
+def change_color(state: str, default: str) -> str:
+    """Farbe eines Änderungszustands (style library: change_new/_modified/_deleted/...)."""
+    lib = load_json_cached(STYLE_LIBRARY)
+    if lib is not _CHANGE_LIB[0]:
+        _CHANGE_COLORS.clear()
+        _CHANGE_COLORS.update({k[len("change_"):]: v["color"] for k, v in lib.items()
+                               if k.startswith("change_") and isinstance(v, dict) and "color" in v})
+        _CHANGE_LIB[0] = lib
+    return _CHANGE_COLORS.get(state, default)
+
+def commit_style(c: Commit, stroke: str) -> Tuple[str, str]:
+    """(Farbe, Füllung) eines Commits; mit state (Schrittfolgen) gefüllt in der Zustandsfarbe."""
+    state = c.state
+    if not state:
+        return stroke, "#fff"
+    col = change_color(state, stroke)
+    return col, col
+
+def commit_dot(out: SvgWriter, cx, cy, r, stroke="#111", fill="#fff", sw=3):
+    """Commit-Knoten; im optimierten Modus ein <use> je Knoten."""
+    out.symbol(("dot", r, stroke, fill, sw), cx, cy, lambda o, x, y: o.circle(x, y, r, stroke=stroke, fill=fill, sw=sw))
 
 # ---------- Panels: measure & draw ----------
-def measure_table(title:str, rows:List[Tuple[int,str,int]], font_title, font_row, color:str) -> Tuple[int,int,List[str]]:
-    title_lines = wrap_text(title, 600, font_title)
+def measure_table(title:str, rows:List[Tuple[int,str,int]], font_title, font_row, color:str,
+                  title_w:int = TABLE_TITLE_W, balanced:bool = False) -> Panel:
+    title_lines = (break_lines if balanced else wrap_text)(title, title_w, font_title)
     max_line_w = 0
     for line in title_lines:
         w,_ = measure_text(line, font_title, pad_right=True)
@@ -175,29 +345,43 @@ def measure_table(title:str, rows:List[Tuple[int,str,int]], font_title, font_row
     total_w = max(PANEL_PAD + max_line_w + PANEL_PAD, content_w)
     row_h = 20
     total_h = PANEL_PAD + header_h + 10 + len(rows)*row_h + PANEL_PAD
-    return total_w, total_h, title_lines
+    return Panel(total_w, total_h, title_lines)
 
-def draw_table(x,y,w,h,title_lines,rows,color:str, font_title, font_row):
-    parts = [svg_rect(x,y,w,h,PANEL_CORNER,PANEL_CORNER,stroke=color,fill=("#F8FFFB" if color==COL_LOCAL else "#fff"))]
+def draw_table(x,y,w,h,title_lines,rows,color:str, font_title, font_row, out=None):
+    out, done = writer_for(out)
+    out.rect(x,y,w,h,PANEL_CORNER,PANEL_CORNER,stroke=color,fill=("#F8FFFB" if color==COL_LOCAL else "#fff"),sw=2)
     ty = y + PANEL_PAD + 8
     for i,line in enumerate(title_lines):
-        parts.append(svg_text(x+PANEL_PAD, ty + i*16, line, fs=13, fw="bold", color=color))
+        out.text(x+PANEL_PAD, ty + i*16, line, fs=13, fw="bold", color=color)
     by = y + PANEL_PAD + 8 +  (18 + (len(title_lines)-1)*16) + 10
     row_h = 20
     indent_px = 14
+    if out.regions:
+        out.region("panel", x, y, w, h, {"title": " ".join(title_lines)})
+    path = []   # Pfad-Teile je Tiefe (Ordner enden mit "/")
     for i,(depth,label,versions) in enumerate(rows):
         ry = by + i*row_h
         indent = depth*indent_px
-        parts.append(svg_text(x+PANEL_PAD+indent, ry+12, label, fs=12, color=color))
+        if out.regions:
+            path[depth:] = [label]
+            out.region("file", x+PANEL_PAD+indent, ry, w-2*PANEL_PAD-indent, row_h,
+                       {"path": "".join(path), "versions": versions})
+        out.text(x+PANEL_PAD+indent, ry+12, label, fs=12, color=color)
         if versions>0:
-            parts.append(stack_icon(x + w - PANEL_PAD - (24+2), ry+4, n=min(versions,4), stroke=color))
+            stack_icon(x + w - PANEL_PAD - (24+2), ry+4, n=min(versions,4), stroke=color, out=out)
             if versions>4:
-                parts.append(svg_text(x + w - PANEL_PAD - (24+2) - 22, ry+12, f"x{versions}", fs=11, color=color))
-    return "\n".join(parts)
+                out.text(x + w - PANEL_PAD - (24+2) - 22, ry+12, f"x{versions}", fs=11, color=color)
+    return done()
 
 def measure_history(branches:List[str], commits, active_branch:str, is_local:bool,
-                    font_branch, font_hdr, font_hash):
+                    font_branch, font_hdr, font_hash, collapse_min:int = 0) -> HistoryPanel:
+    """Ohne parents: ein Strang, 48px je Commit. Mit parents: DAG mit Spuren
+    (git_diagram_dag), optional lineare Strecken ab collapse_min Commits zusammengefasst."""
     th = 22
+    commits = as_commits(commits)
+    dag = layout_dag(commits, collapse_min) if has_parents(commits) else None
+    if dag is not None:
+        commits = dag.nodes
     pill_w = 0
     for b in (branches or ["main"]):
         w,_ = measure_text(b, font_branch, pad_right=True)
@@ -205,302 +389,884 @@ def measure_history(branches:List[str], commits, active_branch:str, is_local:boo
     num = max(1, len(branches) if branches else 1)
     branch_area_w = PANEL_PAD + 10 + num*(pill_w+10) + PANEL_PAD
     branch_area_w = max(branch_area_w, 180)
+    if dag is not None:
+        branch_area_w = max(branch_area_w, PANEL_PAD + 10 + dag.num_lanes*DAG_LANE_W + PANEL_PAD)
 
     hash_header_w,_ = measure_text("Hash", font_hdr, pad_right=True)
     type_header_w,_ = measure_text("Type", font_hdr, pad_right=True)
     hash_col_w = hash_header_w
     type_col_w = type_header_w
     for c in commits:
-        hw,_ = measure_text(c.get("id",""), font_hash, pad_right=True)
-        tw,_ = measure_text(c.get("type","commit"), font_hdr, pad_right=True)
+        hw,_ = measure_text(c.id, font_hash, pad_right=True)
+        tw,_ = measure_text(c.type, font_hdr, pad_right=True)
         hash_col_w = max(hash_col_w, hw)
         type_col_w = max(type_col_w, tw)
     refs_w = PANEL_PAD + 10 + hash_col_w + 10 + type_col_w + PANEL_PAD
 
     total_w = branch_area_w + refs_w
     hdrH = th*2
-    min_step = 48
+    min_step = 48 if dag is None else DAG_ROW_STEP
     dag_h = max(1,len(commits)) * min_step
     total_h = PANEL_PAD + hdrH + 10 + dag_h + PANEL_PAD
-    return total_w, total_h, {"pill_w":pill_w, "hdrH":hdrH, "branch_area_w":branch_area_w,
-                              "hash_col_w":hash_col_w, "type_col_w":type_col_w}
+    return HistoryPanel(total_w, total_h, pill_w, hdrH, branch_area_w, hash_col_w, type_col_w, dag)
 
-def draw_history(x,y,w,h,branches,commits,active_branch,is_local, font_branch, font_hdr, font_hash, meta:Dict):
+def draw_history(x,y,w,h,branches,commits,active_branch,is_local, font_branch, font_hdr, font_hash, meta:HistoryPanel, out=None):
+    out, done = writer_for(out)
     stroke = COL_LOCAL if is_local else COL_REMOTE
     th = 22
-    parts = [svg_rect(x,y,w,h,PANEL_CORNER,PANEL_CORNER,stroke=stroke,fill=("#F8FFFB" if is_local else "#fff"))]
-    parts.append(f'<rect x="{x}" y="{y}" width="{w}" height="{th}" fill="#F0F0FF" opacity="0.7"/>')
-    parts.append(f'<rect x="{x}" y="{y+th}" width="{w}" height="{th}" fill="#F0F0FF" opacity="0.5"/>')
+    out.rect(x,y,w,h,PANEL_CORNER,PANEL_CORNER,stroke=stroke,fill=("#F8FFFB" if is_local else "#fff"),sw=2)
+    out.rect(x,y,w,th,fill="#F0F0FF",opacity="0.7")
+    out.rect(x,y+th,w,th,fill="#F0F0FF",opacity="0.5")
+    if out.regions:
+        out.region("panel", x, y, w, h, {"title": "History"})
 
-    branch_area_w = meta["branch_area_w"]
+    branch_area_w = meta.branch_area_w
     refs_x = x + branch_area_w
 
-    parts.append(svg_text(x+10, y+th-6, "Branch", fs=13, fw="bold"))
-    parts.append(svg_text(refs_x+10, y+th-6, "Refs", fs=13, fw="bold"))
-    parts.append(svg_text(refs_x+10, y+2*th-6, "Hash", fs=12, fw="bold"))
-    parts.append(svg_text(refs_x+10+meta["hash_col_w"]+10, y+2*th-6, "Type", fs=12, fw="bold"))
+    out.text(x+10, y+th-6, "Branch", fs=13, fw="bold")
+    out.text(refs_x+10, y+th-6, "Refs", fs=13, fw="bold")
+    out.text(refs_x+10, y+2*th-6, "Hash", fs=12, fw="bold")
+    out.text(refs_x+10+meta.hash_col_w+10, y+2*th-6, "Type", fs=12, fw="bold")
 
-    pill_w = meta["pill_w"]
+    pill_w = meta.pill_w
     bx = x+10; by = y+th+4
     for b in (branches or ["main"]):
-        parts.append(rounded_label(bx, by, pill_w, th-8, b, bg=("#E3F2FD" if b==(branches or ["main"])[0] else "#EEE"),
-                                   fg="#111", bold=(b==active_branch)))
+        if out.regions:
+            out.region("ref", bx, by, pill_w, th-8, {"branch": b, "active": b==active_branch})
+        rounded_label(bx, by, pill_w, th-8, b, bg=("#E3F2FD" if b==(branches or ["main"])[0] else "#EEE"),
+                      fg="#111", bold=(b==active_branch), out=out)
         bx += pill_w + 10
 
-    hdrH = meta["hdrH"]
+    hdrH = meta.hdr_h
     dag_y = y + hdrH + 10
     dag_h = h - (PANEL_PAD + hdrH + 10 + PANEL_PAD)
+    if meta.dag is not None:
+        draw_dag(out, meta.dag, x, dag_y, dag_h, refs_x + 10, refs_x + 10 + meta.hash_col_w + 10, stroke, w)
+        return done()
     min_step = 48
     step = max(min_step, dag_h / max(1,len(commits)))
     sx = x + 10 + (branch_area_w - (PANEL_PAD+10+PANEL_PAD))/2
     hash_x = refs_x + 10
-    type_x = hash_x + meta["hash_col_w"] + 10
-
-    for i,c in enumerate(commits):
-        cy = dag_y + dag_h - (i+1)*step + 10
-        if i>0:
-            prev = dag_y + dag_h - (i)*step + 10
-            parts.append(svg_line(sx, prev, sx, cy, stroke=stroke, sw=3))
-        parts.append(svg_circle(sx, cy, 8, stroke=stroke))
-        parts.append(svg_text(hash_x, cy+4, c.get("id",""),   fs=12, color=stroke, font_family=SVG_FONT_FAMILY_MONO))
-        parts.append(svg_text(type_x, cy+4, c.get("type","commit"), fs=12, color=stroke))
-    return "\n".join(parts)
+    type_x = hash_x + meta.hash_col_w + 10
+    # ys[i] = Mitte von Commit i, ys[0] = Oberkante des ersten Verbindungsstücks
+    ys = coord_array((dag_y + dag_h - i*step + 10 for i in range(len(commits) + 1)), dag_y + dag_h + step)
+
+    for i,c in enumerate(as_commits(commits), 1):
+        cy = ys[i]
+        if out.regions:
+            out.region("commit", x, cy-step/2, w, step, c)
+        if i>1:
+            out.line(sx, ys[i-1], sx, cy, stroke=stroke, sw=3)
+        col, fill = commit_style(c, stroke)
+        commit_dot(out, sx, cy, 8, stroke=col, fill=fill)
+        out.text(hash_x, cy+4, c.id,   fs=12, color=col, font_family=SVG_FONT_FAMILY_MONO)
+        out.text(type_x, cy+4, c.type, fs=12, color=col)
+    return done()
+
+def draw_dag(out: SvgWriter, dag, x, dag_y, dag_h, hash_x, type_x, stroke, w=0):
+    """Commit-DAG: Kanten (in ihrer Spur) unter den Knoten, Zeile i von unten gezählt.
+    w: Panel-Breite (Trefferflächen je Commit-Zeile, nur bei out.regions)."""
+    step = max(DAG_ROW_STEP, dag_h / max(1, len(dag.nodes)))
+    lane0 = x + PANEL_PAD + 10 + DAG_LANE_W/2
+    # Pixel-Koordinaten je Knoten einmal als array (Kanten und Knoten lesen sie mehrfach)
+    xs = coord_array((lane0 + l*DAG_LANE_W for l in dag.lane), lane0)
+    ys = coord_array((dag_y + dag_h - (r+1)*step + 10 for r in dag.row), dag_y + dag_h + step)
+    for i, j, l in dag.edges:
+        x1, y1 = xs[i], ys[i]
+        xl, y2 = lane0 + l*DAG_LANE_W, ys[j]
+        if x1 == xl:
+            out.line(x1, y1, xl, y2, stroke=stroke, sw=2)
+        else:
+            out.path(f"M{x1},{y1} L{xl},{y1+step} L{xl},{y2}", stroke=stroke, sw=2)
+    regions = out.regions
+    for i, c in enumerate(dag.nodes):
+        cx, y0 = xs[i], ys[i]
+        if regions:
+            out.region("commit", x, y0-step/2, w, step, c)
+        col, fill = commit_style(c, stroke)
+        if c.collapsed:
+            commit_dot(out, cx, y0, 4, stroke=col, fill="#EEE", sw=2)
+        else:
+            commit_dot(out, cx, y0, 6, stroke=col, fill=fill, sw=2)
+        out.text(hash_x, y0+4, c.id,   fs=12, color=col, font_family=SVG_FONT_FAMILY_MONO)
+        out.text(type_x, y0+4, c.type, fs=12, color=col)
 
 # ---------- Repo-Block ----------
-def measure_repo_block(title:str, repo_name:str, is_local:bool, branches, commits,
-                       font_title_repo, font_table_title, font_row, font_branch, font_hdr, font_hash):
-    rows = [
+def default_tree_rows(repo_name: str, versions: int) -> List[Tuple[int,str,int]]:
+    """Beispiel-Dateibaum (ohne echtes Repo): (Tiefe, Anzeige, Versionen)."""
+    return [
         (0, f"{repo_name}/", 0),
         (1, "src/", 0),
-        (2, "main.c", len(commits)),
-        (1, "README.md", len(commits)),
+        (2, "main.c", versions),
+        (1, "README.md", versions),
     ]
-    wt_w, wt_h, wt_title_lines   = measure_table(f"{repo_name} Working Tree", rows, font_table_title, font_row, COL_LOCAL if is_local else COL_REMOTE)
-    idx_w, idx_h, idx_title_lines= measure_table(".git (Index & Staging Area)", rows, font_table_title, font_row, COL_LOCAL if is_local else COL_REMOTE)
-    hist_w, hist_h, hist_meta    = measure_history(branches, commits, (branches or [""])[0] if branches else "", is_local, font_branch, font_hdr, font_hash)
 
-    panel_h = max(wt_h, idx_h, hist_h)
-    total_w = PANEL_PAD + wt_w + GAP_H + idx_w + GAP_H + hist_w + PANEL_PAD
-    _, t_h = measure_text(title, font_title_repo, pad_right=True)
+def measure_repo_block(title:str, repo_name:str, is_local:bool, branches, commits,
+                       font_title_repo, font_table_title, font_row, font_branch, font_hdr, font_hash,
+                       collapse_min:int = 0, tree_rows=None, title_w:int = None, hist:HistoryPanel = None) -> RepoMeasurement:
+    """title_w=None: Panel-Titel greedy auf TABLE_TITLE_W, Repo-Titel später per Middle-Ellipsis gekürzt.
+    title_w gesetzt (Ausgleich auf Zielbreite): Panel-Titel mit break_lines auf title_w, Repo-Titel
+    mehrzeilig auf die Blockbreite. hist: schon gemessenes History-Panel (hängt nicht von title_w ab)."""
+    rows = tree_rows or default_tree_rows(repo_name, len(commits))
+    balanced = title_w is not None
+    title_w = TABLE_TITLE_W if title_w is None else min(title_w, TABLE_TITLE_W)
+    wt   = measure_table(f"{repo_name} Working Tree", rows, font_table_title, font_row, COL_LOCAL if is_local else COL_REMOTE, title_w, balanced)
+    idx  = measure_table(".git (Index & Staging Area)", rows, font_table_title, font_row, COL_LOCAL if is_local else COL_REMOTE, title_w, balanced)
+    hist = hist or measure_history(branches, commits, (branches or [""])[0] if branches else "", is_local, font_branch, font_hdr, font_hash, collapse_min)
+
+    panel_h = max(wt.h, idx.h, hist.h)
+    total_w = PANEL_PAD + wt.w + GAP_H + idx.w + GAP_H + hist.w + PANEL_PAD
+    title_lines = title_heights = None
+    if balanced:
+        title_lines = break_lines(title, total_w - 2*PANEL_PAD, font_title_repo)
+        title_heights = [measure_text(line, font_title_repo, pad_right=True)[1] for line in title_lines]
+        t_h = sum(title_heights) + 4*(len(title_lines) - 1)
+    else:
+        _, t_h = measure_text(title, font_title_repo, pad_right=True)
     t_h = max(t_h, 20)
-    repo_w = total_w
     repo_h = PANEL_PAD + t_h + 8 + panel_h + PANEL_PAD
-    return {
-        "wt": (wt_w, wt_h, wt_title_lines),
-        "idx": (idx_w, idx_h, idx_title_lines),
-        "hist": (hist_w, hist_h, hist_meta),
-        "panel_h": panel_h,
-        "repo_w": repo_w,
-        "repo_h": repo_h,
-        "title_h": t_h
-    }
+    return RepoMeasurement(total_w, repo_h, wt, idx, hist, panel_h, t_h, title_lines, title_heights)
+
+def draw_repo_block(x,y,meas:RepoMeasurement,is_local,title,repo_name,branches,commits,
+                    font_table_title, font_row, font_branch, font_hdr, font_hash, out=None, tree_rows=None):
+    out, done = writer_for(out)
+    rows = tree_rows or default_tree_rows(repo_name, len(commits))
+    out.rect(x,y,meas.w,meas.h,REPO_CORNER,REPO_CORNER,stroke=STROKE_REPO,fill="#fff",sw=2)
+    if out.regions:
+        out.region("repo", x, y, meas.w, meas.h, {"title": title, "repo_name": repo_name, "local": bool(is_local),
+                                                  "branches": list(branches or []), "commits": len(commits)})
+    if meas.title_lines:   # mehrzeilig (Ausgleich auf Zielbreite)
+        ty = y + PANEL_PAD + 16
+        for line, lh in zip(meas.title_lines, meas.title_heights):
+            out.text(x+PANEL_PAD, ty, line, fs=16, fw="bold")
+            ty += lh + 4
+    else:
+        out.text(x+PANEL_PAD, y+PANEL_PAD+16, title, fs=16, fw="bold")
+    base_y = y + PANEL_PAD + meas.title_h + 8
+    panel_h = meas.panel_h
+
+    wt, idx, hist = meas.wt, meas.idx, meas.hist
+    draw_table(x+PANEL_PAD, base_y, wt.w, panel_h,
+               wt.title_lines, rows,
+               COL_LOCAL if is_local else COL_REMOTE,
+               font_table_title, font_row, out=out)
+
+    idx_x = x + PANEL_PAD + wt.w + GAP_H
+    draw_table(idx_x, base_y, idx.w, panel_h,
+               idx.title_lines, rows,
+               COL_LOCAL if is_local else COL_REMOTE,
+               font_table_title, font_row, out=out)
 
-def draw_repo_block(x,y,meas,is_local,title,repo_name,branches,commits,
-                    font_table_title, font_row, font_branch, font_hdr, font_hash):
-    parts=[]
-    repo_w = meas["repo_w"]; repo_h = meas["repo_h"]
-    parts.append(svg_rect(x,y,repo_w,repo_h,REPO_CORNER,REPO_CORNER,stroke=STROKE_REPO,fill="#fff"))
-    parts.append(svg_text(x+PANEL_PAD, y+PANEL_PAD+16, title, fs=16, fw="bold"))
-    base_y = y + PANEL_PAD + meas["title_h"] + 8
-    panel_h = meas["panel_h"]
-
-    wt_w, _, wt_title_lines = meas["wt"]
-    parts.append( draw_table(x+PANEL_PAD, base_y, wt_w, panel_h,
-                             wt_title_lines, [
-                                 (0, f"{repo_name}/", 0),
-                                 (1, "src/", 0),
-                                 (2, "main.c", len(commits)),
-                                 (1, "README.md", len(commits)),
-                             ],
-                             COL_LOCAL if is_local else COL_REMOTE,
-                             font_table_title, font_row) )
-
-    idx_w, _, idx_title_lines = meas["idx"]
-    idx_x = x + PANEL_PAD + wt_w + GAP_H
-    parts.append( draw_table(idx_x, base_y, idx_w, panel_h,
-                             idx_title_lines, [
-                                 (0, f"{repo_name}/", 0),
-                                 (1, "src/", 0),
-                                 (2, "main.c", len(commits)),
-                                 (1, "README.md", len(commits)),
-                             ],
-                             COL_LOCAL if is_local else COL_REMOTE,
-                             font_table_title, font_row) )
-
-    hist_w, _, hist_meta = meas["hist"]
-    hist_x = idx_x + idx_w + GAP_H
-    parts.append( draw_history(hist_x, base_y, hist_w, panel_h,
-                               branches, commits, (branches or [""])[0] if branches else "",
-                               is_local, font_branch, font_hdr, font_hash, hist_meta) )
-    return "\n".join(parts)
+    hist_x = idx_x + idx.w + GAP_H
+    draw_history(hist_x, base_y, hist.w, panel_h,
+                 branches, commits, (branches or [""])[0] if branches else "",
+                 is_local, font_branch, font_hdr, font_hash, hist, out=out)
+    return done()
 
 # ---------- Cmd-Panel (unsichtbar, aber mit Kurve & schlanker Spitze) ----------
-def measure_cmd_panel(label:str, font_cmd) -> Dict:
+def measure_cmd_panel(label:str, font_cmd) -> Measurement:
     w_text,_ = measure_text(label, font_cmd, pad_right=True)
     arrow_head = 12
     inner_pad  = 16
     w = max(80, w_text + arrow_head*2 + inner_pad*2)
     _, h_text = measure_text(label, font_cmd, pad_right=True)
     h = max(28, h_text + 14)
-    return {"w": w, "h": h}
+    return Measurement(w, h)
 
-def draw_cmd_panel(x,y,meas_cmd, label:str, font_cmd):
-    parts=[]
-    w = meas_cmd["w"]; h = meas_cmd["h"]
+def draw_cmd_panel(x,y,meas_cmd:Measurement, label:str, font_cmd, reverse:bool=False, out=None):
+    out, done = writer_for(out)
+    w = meas_cmd.w; h = meas_cmd.h
     cy = y + h/2
-    # Gerade Linie, schlanke Spitze:
-    parts.append(svg_line(x, cy, x+w, cy, stroke="#111", sw=2, marker="arrowThinOpen"))
-    parts.append(svg_text(x + w/2, cy - 8, label, fs=13, anchor="middle"))
-    return "\n".join(parts)
+    if out.regions:
+        out.region("arrow", x, y, w, h, {"label": label, "reverse": reverse})
+    # Gerade Linie, schlanke Spitze (reverse: Pfeil zeigt nach links, z.B. push)
+    if reverse:
+        out.line(x+w, cy, x, cy, stroke="#111", sw=2, marker="arrowThinOpen")
+    else:
+        out.line(x, cy, x+w, cy, stroke="#111", sw=2, marker="arrowThinOpen")
+    out.text(x + w/2, cy - 8, label, fs=13, anchor="middle")
+    return done()
 
-# ---------- Diagram ----------
-def render():
-    with open(CFG, "r", encoding="utf-8") as f:
-        cfg = json.load(f)
-
-    third = cfg.get("ThirdRepo")  # optionales drittes Repo
-
-    # Fonts
-    font_repo_title = load_font(FONT_CANDIDATES_BODY, 16)
-    font_table_title= load_font(FONT_CANDIDATES_BODY, 13)
-    font_row        = load_font(FONT_CANDIDATES_BODY, 12)
-    font_branch     = load_font(FONT_CANDIDATES_BODY, 13)
-    font_hdr        = load_font(FONT_CANDIDATES_BODY, 12)
-    font_hash       = load_font(FONT_CANDIDATES_MONO, 12)
-    font_cmd        = load_font(FONT_CANDIDATES_MONO, 14)
-    font_desc       = load_font(FONT_CANDIDATES_BODY, 14)
-    font_syntax     = load_font(FONT_CANDIDATES_BODY, 20)
-
-    # Beispiel-Daten
-    random.seed(42)
-    commits = [{"id":"".join(random.choice("0123456789abcdef") for _ in range(7)), "type":"commit"} for _ in range(3)]
+# ---------- Eingaben: Config, Befehlskatalog, Szenen ----------
+def load_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+_JSON_CACHE: Dict[str, tuple] = {}
+
+def load_json_cached(path: str):
+    """Wie load_json, aber neu gelesen nur, wenn sich die Datei geändert hat (Ergebnis nicht verändern)."""
+    mtime = os.stat(path).st_mtime_ns
+    cached = _JSON_CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _JSON_CACHE[path] = (mtime, load_json(path))
+    return cached[1]
+
+def load_ast(path: str = AST) -> Dict:
+    """AST-Template (neu gelesen nur, wenn sich die Datei geändert hat)."""
+    return load_json_cached(path)
+
+def load_fonts(backend=None) -> Dict[str, Font]:
+    """Alle Fonts eines Diagramms (einmal je Prozess laden und wiederverwenden); backend: None = aktives."""
+    return {
+        "repo_title":  load_font(FONT_CANDIDATES_BODY, 16, backend),
+        "table_title": load_font(FONT_CANDIDATES_BODY, 13, backend),
+        "row":         load_font(FONT_CANDIDATES_BODY, 12, backend),
+        "branch":      load_font(FONT_CANDIDATES_BODY, 13, backend),
+        "hdr":         load_font(FONT_CANDIDATES_BODY, 12, backend),
+        "hash":        load_font(FONT_CANDIDATES_MONO, 12, backend),
+        "cmd":         load_font(FONT_CANDIDATES_MONO, 14, backend),
+        "desc":        load_font(FONT_CANDIDATES_BODY, 14, backend),
+        "syntax":      load_font(FONT_CANDIDATES_BODY, 20, backend),
+    }
+
+_TABLE_BACKEND = None
+_CANONICAL_FONTS: Optional[Dict[str, Font]] = None
+
+def output_backend(output: Dict = None):
+    """Mess-Backend einer Ausgabe: kanonisch immer das Tabellen-Backend (gleiche Maße auf jeder Maschine,
+    auch über render()/build_diagram, nicht nur mit --canonical), sonst das aktive."""
+    global _TABLE_BACKEND
+    backend = get_backend()
+    if not (output or {}).get("canonical") or backend.name == "table":
+        return backend
+    if _TABLE_BACKEND is None:
+        _TABLE_BACKEND = BACKENDS["table"]()
+    return _TABLE_BACKEND
+
+def fonts_for(fonts: Dict[str, Font], output: Dict = None) -> Dict[str, Font]:
+    """fonts, bei kanonischer Ausgabe mit anderem Backend stattdessen die Tabellen-Fonts
+    (ein Dict je Prozess, damit der Layout-Cache warm bleibt)."""
+    global _CANONICAL_FONTS
+    if not (output or {}).get("canonical") or all(getattr(f, "backend", "") == "table" for f in fonts.values()):
+        return fonts
+    if _CANONICAL_FONTS is None:
+        _CANONICAL_FONTS = load_fonts(output_backend(output))
+    return _CANONICAL_FONTS
+
+_METRICS_LOADED = set()
+
+def load_metrics_cache() -> str:
+    """Persistenten Metrik-Cache (GIT_DIAGRAM_METRICS_CACHE) einmal je Prozess laden."""
+    metrics_file = cache_file_from_env()
+    if metrics_file and metrics_file not in _METRICS_LOADED:
+        METRICS_CACHE.load(metrics_file)
+        _METRICS_LOADED.add(metrics_file)
+    return metrics_file
+
+def scene_for(command_id: str, commands: List[Dict], scenes: Dict) -> Dict:
+    """Szene eines Befehls: Katalog-Eintrag + (optionale) Szene aus git_diagram_scenes_phase1.json."""
+    entry = next((c for c in commands if c["id"] == command_id), None)
+    if entry is None and command_id not in scenes:
+        raise KeyError(f"Unbekannter Befehl '{command_id}'")
+    entry = entry or {"id": command_id}
+    scene = scenes.get(command_id, {})
+    header = dict(scene.get("header", {}))
+    header.setdefault("syntax", entry.get("syntax", f"git {command_id}"))
+    header.setdefault("title", command_id)
+    header.setdefault("cmdline", "{LocalRepo}>git " + command_id)
+    header.setdefault("desc", entry.get("goal", ""))
+    arrow = dict(scene.get("arrow", {}))
+    arrow.setdefault("label", command_id)
+    arrow.setdefault("from", "remote")
+    arrow.setdefault("to", "local")
+    return {"id": command_id, "header": header, "arrow": arrow}
+
+def template_vars(cfg: Dict) -> Dict[str, str]:
+    """Platzhalter für cmdline/desc-Vorlagen: alle Config-Keys + abgeleitete Werte."""
+    v = {k: val for k, val in cfg.items() if isinstance(val, str)}
+    v["RemoteUrl"] = f"git@{cfg['RemoteServer']}:{cfg['RemoteUser']}/{cfg['RemoteRepoName']}.git"
+    v["LocalRepo"] = join_local_path(cfg["LocalBaseDir"], cfg["LocalRepoName"])
+    return v
+
+def join_local_path(base: str, name: str) -> str:
+    """Pfad mit dem Trenner des Basisordners (Backslash darin -> Windows-Stil), nicht dem des
+    Render-Rechners: gleiche Diagramme (und kanonische SVGs) unter Windows und Linux."""
+    return (ntpath if "\\" in base else posixpath).join(base, name)
+
+def out_path_for(command_id: str, out_dir: str = OUT_DIR, fmt: str = "svg") -> str:
+    return os.path.join(out_dir, f"git_{command_id}_diagram.{fmt}")
+
+def diagram_inputs(manifest: Manifest, cfg: Dict, scene: Dict, output: Dict = None) -> Dict[str, str]:
+    """Eingabe-Hashes eines Diagramms (ohne Fonts zu laden)."""
+    backend = output_backend(output)
+    fonts = [backend.font_file(FONT_CANDIDATES_BODY), backend.font_file(FONT_CANDIDATES_MONO)]
+    inputs = input_hashes(manifest, cfg, scene, RENDERER_VERSION, backend.name, [p for p in fonts if p], output)
+    git = git_state(cfg)
+    if git:
+        inputs["git"] = git
+    return inputs
+
+def git_state(cfg: Dict) -> Optional[str]:
+    """Hash über den Stand der gelesenen Git-Repositories (Ref -> OID) statt ihres Inhalts: ändert sich
+    mit jedem neuen Commit/Branch; None ohne Git-Repos in der Config."""
+    specs = git_repo_specs(cfg)
+    if not specs:
+        return None
+    from git_diagram_gitrepo import repo_fingerprint
+    return canonical_hash([repo_fingerprint(s["git"], s.get("ref", "HEAD")) for s in specs])
+
+def with_target_width(cfg: Dict, width: int = None) -> Dict:
+    """Config mit "TargetWidth" (Teil der Config, damit Build-Manifest und Caches ihn sehen)."""
+    return {**cfg, "TargetWidth": width} if width else cfg
+
+def svg_writer(sink, output: Dict = None) -> SvgWriter:
+    """Writer je Ausgabe-Optionen: {"optimize": bool, "precision": int} oder {"canonical": True};
+    optimiert mit Klassen aus der Style-Library."""
+    output = output or {}
+    if output.get("canonical"):
+        return make_writer(sink, canonical=True)
+    if not output.get("optimize"):
+        return SvgWriter(sink)
+    return make_writer(sink, True, output.get("precision", DEFAULT_PRECISION),
+                       style_classes(load_json_cached(STYLE_LIBRARY)))
+
+# ---------- AST-Layout: measure (bottom-up) / place (top-down) ----------
+# Jeder AST-Teil wird zu einem Knoten mit key() (alle Eingaben der Messung),
+# measure() (Größe, gecacht je key) und draw(x, y, m) (Platzierung von oben nach unten).
+# Ändert sich nur ein Teil (z.B. das Pfeil-Label), wird nur dieser Teilbaum neu gemessen.
+HEADER_BOTTOM_PAD = 6   # Reserve unter Header/Beschreibung (wie bisherige Höhenrechnung)
+SAMPLE_SEED = 42        # Beispiel-Commits (fake_commits) je Render aus random.Random(SAMPLE_SEED)
+
+def fake_commits(n: int, rng: random.Random = None) -> List[Dict]:
+    """Beispiel-Commits mit zufälligen IDs; rng: eigener Generator (deterministisch, unabhängig vom
+    globalen Zustand von random), ohne rng das Modul random."""
+    choice = (rng or random).choice
+    return [{"id":"".join(choice("0123456789abcdef") for _ in range(7)), "type":"commit"} for _ in range(n)]
+
+class LayoutNode:
+    kind = ""
+
+    def __init__(self, part: Dict):
+        self.part = part
+        self.id = part.get("id", self.kind)
+
+    def key(self, *constraints) -> tuple:
+        raise NotImplementedError
+
+    def measure(self, eng: "LayoutEngine", *constraints) -> Measurement:
+        raise NotImplementedError
+
+    def draw(self, eng: "LayoutEngine", x, y, m: Measurement, out: SvgWriter, **kw):
+        raise NotImplementedError
+
+    def natural_w(self, eng: "LayoutEngine") -> int:
+        """Breite ohne Umbruch/Kürzung (Obergrenze beim Ausgleich auf eine Zielbreite)."""
+        return 0
+
+class HeaderNode(LayoutNode):
+    """Syntaxzeile + Kommandozeile (einzeilig, Middle-Ellipsis auf max_w;
+    balanced: an Pfadtrennern umbrochen statt gekürzt)."""
+    kind = "header"
+
+    def __init__(self, part, syntax: str, cmdline: str):
+        super().__init__(part)
+        self.syntax, self.cmdline = syntax, cmdline
+
+    def key(self, max_w, balanced=False):
+        return (self.syntax, self.cmdline, max_w, balanced)
+
+    def measure(self, eng, max_w, balanced=False):
+        f = eng.fonts
+        if balanced:
+            cmd_lines = break_lines(self.cmdline, max_w, f["cmd"])
+        else:
+            cmd_lines = [shorten_middle(self.cmdline, max_w, f["cmd"])]
+        syntax_h = measure_text(self.syntax, f["syntax"], pad_right=True)[1]
+        cmd_heights = [measure_text(line, f["cmd"], pad_right=True)[1] for line in cmd_lines]
+        return HeaderMeasurement(max_w, 8 + syntax_h + 4 + sum(cmd_heights) + 4*len(cmd_lines), syntax_h,
+                                 cmd_lines, cmd_heights)
+
+    def draw(self, eng, x, y, m, out, **kw):
+        y += 8
+        out.text(x, y, self.syntax, fs=20, fw="bold")
+        y += m.syntax_h + 4
+        for line, lh in zip(m.cmd_lines, m.cmd_heights):
+            out.text(x, y, line, fs=14, color="#333", font_family=SVG_FONT_FAMILY_MONO)
+            y += lh + 4
+
+    def natural_w(self, eng):
+        f = eng.fonts
+        return max(measure_text(self.syntax, f["syntax"], pad_right=True)[0],
+                   measure_text(self.cmdline, f["cmd"], pad_right=True)[0])
+
+class DescriptionNode(LayoutNode):
+    """Beschreibung, umbrochen auf max_w."""
+    kind = "description"
+
+    def __init__(self, part, text: str):
+        super().__init__(part)
+        self.text = text
+
+    def key(self, max_w, balanced=False):
+        return (self.text, max_w, balanced)
+
+    def measure(self, eng, max_w, balanced=False):
+        font = eng.fonts["desc"]
+        lines = (break_lines if balanced else wrap_text)(self.text, max_w, font)
+        heights = [measure_text(line, font, pad_right=True)[1] for line in lines]
+        return TextMeasurement(max_w, sum(heights) + 4*len(lines), lines, heights)
+
+    def draw(self, eng, x, y, m, out, **kw):
+        for line, lh in zip(m.lines, m.heights):
+            out.text(x, y, line, fs=14, color="#333")
+            y += lh + 4
+
+    def natural_w(self, eng):
+        return measure_text(self.text, eng.fonts["desc"], pad_right=True)[0]
+
+class ArrowNode(LayoutNode):
+    """Operations-Pfeil (Cmd-Panel) zwischen zwei Repos."""
+    kind = "op_arrow"
+
+    def __init__(self, part, arrow: Dict):
+        super().__init__(part)
+        self.label = arrow.get("label", "")
+        self.src = arrow.get("from", "remote")
+        self.dst = arrow.get("to", "local")
+
+    def key(self):
+        return (self.label,)
+
+    def measure(self, eng):
+        return measure_cmd_panel(self.label, eng.fonts["cmd"])
+
+    def draw(self, eng, x, y, m, out, reverse=False, **kw):
+        draw_cmd_panel(x, y, m, self.label, eng.fonts["cmd"], reverse=reverse, out=out)
+
+class RepoNode(LayoutNode):
+    """Repo-Block (Working Tree, Index, History); data=None -> leer (0px)."""
+    kind = "repo"
+
+    def __init__(self, part, data: Repo = None):
+        super().__init__(part)
+        self.data = data
+        self._hist = None   # History-Panel je Knoten nur einmal messen (unabhängig von title_w)
+
+    def key(self, title_w=None):
+        return (self.data.key(), title_w)
+
+    def measure(self, eng, title_w=None):
+        d, f = self.data, eng.fonts
+        m = measure_repo_block(
+            title=d.title, repo_name=d.repo_name, is_local=d.is_local,
+            branches=d.branches, commits=d.commits,
+            font_title_repo=f["repo_title"], font_table_title=f["table_title"], font_row=f["row"],
+            font_branch=f["branch"], font_hdr=f["hdr"], font_hash=f["hash"], collapse_min=d.collapse,
+            tree_rows=d.tree, title_w=title_w, hist=self._hist)
+        self._hist = m.hist
+        return m
+
+    def draw(self, eng, x, y, m, out, **kw):
+        d, f = self.data, eng.fonts
+        # Titel ggf. per Middle-Ellipsis kürzen, damit er sicher in die Box passt (umbrochen: m.title_lines)
+        title = d.title if m.title_lines else shorten_middle(d.title, m.w - 2*PANEL_PAD, f["repo_title"])
+        draw_repo_block(x, y, m, d.is_local, title, d.repo_name, d.branches, d.commits,
+                        f["table_title"], f["row"], f["branch"], f["hdr"], f["hash"], out=out, tree_rows=d.tree)
+
+class LayoutEngine:
+    """Misst Knoten mit LRU-Cache je (Art, key); eine Instanz je Font-Satz."""
+
+    def __init__(self, fonts: Dict, max_entries: int = 4096):
+        self.fonts = fonts
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[tuple, Measurement]" = OrderedDict()
+        self.hits = self.misses = 0
+
+    def measure(self, node: LayoutNode, *constraints) -> Measurement:
+        key = (node.kind, node.key(*constraints))
+        m = self._cache.get(key)
+        if m is None:
+            self.misses += 1
+            m = self._cache[key] = node.measure(self, *constraints)
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+        return m
+
+_ENGINES: Dict[tuple, LayoutEngine] = {}
+
+def layout_engine(fonts: Dict) -> LayoutEngine:
+    """Gemeinsame Engine je Font-Satz (Batch-Worker, Server, Watch behalten den Cache)."""
+    k = tuple((name, font_key(f)) for name, f in sorted(fonts.items()))
+    eng = _ENGINES.get(k)
+    if eng is None or eng.fonts is not fonts:
+        eng = _ENGINES[k] = LayoutEngine(fonts)
+    return eng
+
+def git_repo_data(spec: Dict, repo_name: str) -> Dict:
+    """Repo-Spec mit "git": <Pfad> -> commits/branches/tree aus dem echten Repository
+    (Optionen "ref", "commits" = letzte N, "depth", "max_rows"; gecacht je Ref-Stand)."""
+    from git_diagram_gitrepo import spec_state   # subprocess erst bei Bedarf
+    state = spec_state(spec)
+    return {"commits": state["commits"], "branches": state["branches"],
+            "tree": [(0, f"{repo_name}/", 0)] + [tuple(row) for row in state["tree"]]}
+
+def git_repo_specs(cfg: Dict) -> List[Dict]:
+    """Alle Repo-Specs der Config, die aus einem Git-Repository gelesen werden."""
+    specs = list(cfg.get("Repos", {}).values()) + ([cfg["ThirdRepo"]] if cfg.get("ThirdRepo") else [])
+    return [s for s in specs if isinstance(s, dict) and s.get("git")]
+
+def bind_ast(ast: Dict, cfg: Dict, scene: Dict) -> Dict[str, List[LayoutNode]]:
+    """AST-Teile mit Daten aus Config + Szene verbinden -> Knoten je Art (in AST-Reihenfolge)."""
+    tv = template_vars(cfg)
+    header = scene["header"]
+    rng = random.Random(SAMPLE_SEED)   # Beispiel-Daten: gleiche IDs bei jedem Render, in jedem Prozess
+    commits = fake_commits(3, rng)
     branches = [cfg.get("RemoteDefBranch","main")]
-    third_commits = [{"id":"".join(random.choice("0123456789abcdef") for _ in range(7)), "type":"commit"} for _ in range(third.get("commits",2))] if third else []
-
-    remote_url = f"git@{cfg['RemoteServer']}:{cfg['RemoteUser']}/{cfg['RemoteRepoName']}.git"
-    local_repo = os.path.join(cfg["LocalBaseDir"], cfg["LocalRepoName"])
-
-    # Header-Texte
-    syntax = "git clone <URL> [dir]"
-    cmd    = rf"{cfg['LocalBaseDir']}>git clone {remote_url}"
-    desc   = rf"Erstellt lokales Repo unter {local_repo}, richtet origin ein, holt Objekte/Refs, checkt Default-Branch {cfg['RemoteDefBranch']} aus."
-
-    # --- Repos messen ---
-    remote_meas = measure_repo_block(
-        title=f"Remote Repository {cfg['RemoteServer']}",
-        repo_name=cfg["RemoteRepoName"], is_local=False,
-        branches=branches, commits=commits,
-        font_title_repo=font_repo_title, font_table_title=font_table_title, font_row=font_row,
-        font_branch=font_branch, font_hdr=font_hdr, font_hash=font_hash
-    )
-    local_meas = measure_repo_block(
-        title=f"Lokal: {local_repo}",
-        repo_name=cfg["RemoteRepoName"], is_local=True,
-        branches=branches, commits=commits,
-        font_title_repo=font_repo_title, font_table_title=font_table_title, font_row=font_row,
-        font_branch=font_branch, font_hdr=font_hdr, font_hash=font_hash
-    )
-    if third:
-        third_meas = measure_repo_block(
-            title=third.get("title","Repo3"),
-            repo_name=third.get("repo_name", cfg["RemoteRepoName"]),
-            is_local=False,
-            branches=third.get("branches", branches),
-            commits=third_commits,
-            font_title_repo=font_repo_title, font_table_title=font_table_title, font_row=font_row,
-            font_branch=font_branch, font_hdr=font_hdr, font_hash=font_hash
-        )
+    extra = dict(cfg.get("Repos", {}))   # weitere Repos: {"<ast-id>": {title, repo_name, commits, branches}}, mit "git": <Pfad> auch remote/local
+    if cfg.get("ThirdRepo"):
+        extra.setdefault("repo3", cfg["ThirdRepo"])
+    arrows = dict(scene.get("arrows", {}))
+    first_arrow = True
+    states = scene.get("repos", {})   # Repo-Zustand je AST-ID (Schrittfolgen): {"local": {"commits": [...]}}
+
+    nodes = {"header": [], "description": [], "op_arrow": [], "repo": []}
+    for part in ast.get("parts", []):
+        t, pid = part.get("type"), part.get("id")
+        if t == "header":
+            nodes[t].append(HeaderNode(part, header["syntax"], header["cmdline"].format_map(tv)))
+        elif t == "description":
+            nodes[t].append(DescriptionNode(part, header["desc"].format_map(tv)))
+        elif t == "op_arrow":
+            arrow = arrows.get(pid) or (scene.get("arrow") if first_arrow else None)
+            first_arrow = False
+            if arrow:
+                nodes[t].append(ArrowNode(part, arrow))
+        elif t == "repo":
+            if pid == "remote":
+                data = {"title": f"Remote Repository {cfg['RemoteServer']}", "repo_name": cfg["RemoteRepoName"],
+                        "is_local": False, "branches": branches, "commits": commits}
+            elif pid == "local":
+                data = {"title": f"Lokal: {tv['LocalRepo']}", "repo_name": cfg["RemoteRepoName"],
+                        "is_local": True, "branches": branches, "commits": commits}
+            elif pid in extra:
+                spec = extra[pid]
+                data = {"title": spec.get("title", pid.capitalize()),
+                        "repo_name": spec.get("repo_name", cfg["RemoteRepoName"]),
+                        "is_local": bool(spec.get("is_local", False)),
+                        "branches": spec.get("branches", branches),
+                        "commits": spec["commits"] if isinstance(spec.get("commits"), list) else fake_commits(spec.get("commits", 2), rng),
+                        "collapse": spec.get("collapse", 0)}
+            else:
+                data = None   # display: empty -> 0px
+            spec = extra.get(pid)
+            if data is not None and isinstance(spec, dict) and spec.get("git"):
+                data = {**data, **git_repo_data(spec, data["repo_name"])}
+            if data is not None and pid in states:
+                data = {**data, **states[pid]}
+            nodes[t].append(RepoNode(part, data and Repo.from_dict(data)))
+    return nodes
+
+def layout_row(eng: LayoutEngine, repos: List[RepoNode], arrows: List[ArrowNode], min_gap_w: List[int] = None,
+               title_w: int = None) -> RowLayout:
+    """Layout 'repos-left-right': sichtbare Repos nebeneinander, Pfeile in den Lücken
+    (links vom rechten Endpunkt; mehrere Pfeile einer Lücke übereinander).
+    min_gap_w: Mindestbreite je Lücke (Schrittfolgen halten die Repos so an derselben Stelle).
+    title_w: Umbruchbreite der Titel (siehe balance_row); None = Standard-Layout."""
+    visible = [n for n in repos if n.data]
+    order = {n.id: i for i, n in enumerate(visible)}
+    # nur Pfeile zwischen zwei sichtbaren Repos; from == to (z.B. commit) ist eine rein lokale Operation
+    arrows = [a for a in arrows if a.src != a.dst and a.src in order and a.dst in order]
+    n_gaps = max(len(visible) - 1, 1 if arrows else 0)
+    gaps: List[List[Tuple[ArrowNode, bool]]] = [[] for _ in range(n_gaps)]
+    for a in arrows:
+        i, j = order[a.src], order[a.dst]
+        hi = max(i, j)
+        gaps[min(max(hi - 1, 0), n_gaps - 1)].append((a, j < i))
+
+    items, gap_w, w, h = [], [], 0, 0
+    for i, node in enumerate(visible):
+        m = eng.measure(node, title_w)
+        items.append(Box("repo", node, m, w))
+        w += m.w
+        h = max(h, m.h)
+        if i < len(gaps):
+            w += GAP_H
+            gw = min_gap_w[i] if min_gap_w and i < len(min_gap_w) else 0
+            if gaps[i]:
+                gy = PANEL_PAD + 16
+                for a, reverse in gaps[i]:
+                    am = eng.measure(a)
+                    items.append(Box("arrow", a, am, w, gy, reverse))
+                    gw = max(gw, am.w)
+                    gy += am.h + GAP_V
+                h = max(h, gy - GAP_V)
+            if gw:
+                w += gw + (GAP_H if i + 1 < len(visible) else 0)
+            gap_w.append(gw)
+    return RowLayout(w, h, items, gap_w)
+
+def balance_row(eng: LayoutEngine, repos: List[RepoNode], arrows: List[ArrowNode], max_w: int,
+                min_gap_w: List[int] = None) -> RowLayout:
+    """Repo-Zeile mit höchstens max_w Breite, soweit möglich: gemeinsame Umbruchbreite der Titel
+    (Panel-Titel, Repo-Titel) per Binärsuche so groß wie möglich. Breite Titel werden so zuerst
+    schmaler, Panels mit schmalem Inhalt behalten ihre Breite. Passt selbst MIN_TITLE_W nicht,
+    gilt die schmalste erreichbare Zeile als Ziel (Inhalte wie Dateibaum und History werden nie
+    gekürzt, Titel nicht enger umbrochen als nötig)."""
+    row = layout_row(eng, repos, arrows, min_gap_w, TABLE_TITLE_W)
+    if row.w <= max_w:
+        return row
+    lo, hi = MIN_TITLE_W, TABLE_TITLE_W
+    best = layout_row(eng, repos, arrows, min_gap_w, lo)
+    max_w = max(max_w, best.w)
+    while hi - lo > 4:
+        mid = (lo + hi) // 2
+        row = layout_row(eng, repos, arrows, min_gap_w, mid)
+        if row.w <= max_w:
+            lo, best = mid, row
+        else:
+            hi = mid
+    return best
+
+def layout_diagram(eng: LayoutEngine, nodes: Dict[str, List[LayoutNode]], pins: Dict = None,
+                   target_w: int = None) -> DiagramLayout:
+    """Bottom-up: Repo-Zeile -> Gesamtbreite -> Header/Beschreibung mit dieser Breite.
+    pins: Mindestmaße {"gap_w": [...], "head_h": n}, z.B. das Maximum über alle Frames einer Schrittfolge.
+    target_w: Zielbreite der Zeichenfläche (Config "TargetWidth"): Repo-Zeile per balance_row,
+    Header/Beschreibung bis zur Zielbreite und mit break_lines umbrochen statt gekürzt."""
+    pins = pins or {}
+    head_nodes = nodes["header"] + nodes["description"]
+    if target_w:
+        avail = target_w - 2*SIDE_MARGIN
+        row = balance_row(eng, nodes["repo"], nodes["op_arrow"], avail, pins.get("gap_w"))
+        content_w = max([row.w] + [min(avail, n.natural_w(eng)) for n in head_nodes])
+        constraints = (int(content_w), True)
     else:
-        third_meas = {"repo_w":0, "repo_h":0, "panel_h":0, "title_h":0,
-                      "wt":(0,0,[]), "idx":(0,0,[]), "hist":(0,0,{"branch_area_w":0,"hash_col_w":0,"type_col_w":0,"hdrH":0})}
-
-    # --- Cmd-Panel messen ---
-    cmd_meas = measure_cmd_panel("clone", font_cmd)
-
-    # Breite
-    total_width = SIDE_MARGIN + remote_meas["repo_w"] + GAP_H + cmd_meas["w"] + GAP_H + local_meas["repo_w"]
-    if third_meas["repo_w"] > 0:
-        total_width += GAP_H + third_meas["repo_w"]
-    total_width += SIDE_MARGIN
-
-    # Headerhöhen (jetzt: CMD einzeilig mit Middle-Ellipsis, desc wrap)
-    header_max_w = int(total_width - 2*SIDE_MARGIN)
-    short_cmd = shorten_middle(cmd, header_max_w, font_cmd)
-    _, syntax_h = measure_text(syntax, font_syntax, pad_right=True); syntax_h += 8
-    ch = measure_text(short_cmd, font_cmd, pad_right=True)[1]
-    cmd_h = ch
-    desc_lines = wrap_text(desc, header_max_w, font_desc)
-    desc_h = sum(measure_text(line, font_desc, pad_right=True)[1] for line in desc_lines) + (len(desc_lines)-1)*4
-    header_h = syntax_h + 4 + cmd_h + 4 + desc_h + 10
-
-    # Gesamthöhe
-    repos_h = max(remote_meas["repo_h"], local_meas["repo_h"], third_meas["repo_h"])
-    total_height = TOP_MARGIN + header_h + GAP_V + repos_h + TOP_MARGIN
-
-    # --- Zeichnen ---
-    parts=[]
-    parts.append(f'<svg xmlns="http://www.w3.org/2000/svg" width="{int(total_width)}" height="{int(total_height)}" viewBox="0 0 {int(total_width)} {int(total_height)}">')
-    parts.append('<defs>')
+        row = layout_row(eng, nodes["repo"], nodes["op_arrow"], pins.get("gap_w"))
+        content_w = row.w
+        constraints = (int(content_w),)
+    total_width = SIDE_MARGIN + content_w + SIDE_MARGIN
+    head = [(n, eng.measure(n, *constraints)) for n in head_nodes]
+    head.sort(key=lambda nm: 0 if nm[0].kind == "header" else 1)
+    head_h = max(sum(m.h for _, m in head), pins.get("head_h", 0))
+    total_height = TOP_MARGIN + head_h + HEADER_BOTTOM_PAD + GAP_V + row.h + TOP_MARGIN
+    return DiagramLayout(total_width, total_height, head, head_h, row)
+
+def svg_root_attrs(w: int, h: int):
+    return (("xmlns", "http://www.w3.org/2000/svg"), ("width", w), ("height", h), ("viewBox", f"0 0 {w} {h}"))
+
+def draw_defs(out: SvgWriter):
+    out.raw('<defs>')
     # schlankere Pfeilspitze
-    parts.append('  <marker id="arrowThinOpen" markerUnits="userSpaceOnUse" markerWidth="12" markerHeight="10" refX="12" refY="5" orient="auto">')
-    parts.append('    <path d="M1,1 L11,5 L1,9" fill="none" stroke="#111" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>')
-    parts.append('  </marker>')
-    parts.append(f'  <style> .body{{font-family:{SVG_FONT_FAMILY_BODY}}} .mono{{font-family:{SVG_FONT_FAMILY_MONO}}} </style>')
-    parts.append('</defs>')
-
-    # Header
-    y = TOP_MARGIN + 8
-    parts.append(svg_text(SIDE_MARGIN, y, syntax, fs=20, fw="bold"))
-    y += measure_text(syntax, font_syntax, pad_right=True)[1] + 4
-    parts.append(svg_text(SIDE_MARGIN, y, short_cmd, fs=14, color="#333", font_family=SVG_FONT_FAMILY_MONO))
-    y += measure_text(short_cmd, font_cmd, pad_right=True)[1] + 4
-    for line in desc_lines:
-        parts.append(svg_text(SIDE_MARGIN, y, line, fs=14, color="#333"))
-        y += measure_text(line, font_desc, pad_right=True)[1] + 4
-
-    # Repos & Cmd-Panel
-    repos_y = y + GAP_V
-    x = SIDE_MARGIN
-
-    # Remote
-    # (Titel ggf. per Middle-Ellipsis kürzen, damit er sicher in die Box passt)
-    remote_title = shorten_middle(f"Remote Repository {cfg['RemoteServer']}", remote_meas["repo_w"] - 2*PANEL_PAD, font_repo_title)
-    parts.append( draw_repo_block(x, repos_y, remote_meas, False,
-                                  remote_title, cfg["RemoteRepoName"],
-                                  branches, commits,
-                                  font_table_title, font_row, font_branch, font_hdr, font_hash) )
-    x += remote_meas["repo_w"] + GAP_H
-
-    # Cmd-Panel
-    parts.append( draw_cmd_panel(x, repos_y + PANEL_PAD + 16, cmd_meas, "clone", font_cmd) )
-    x += cmd_meas["w"] + GAP_H
-
-    # Local (Titel per Middle-Ellipsis)
-    local_title_full = f"Lokal: {local_repo}"
-    local_title = shorten_middle(local_title_full, local_meas["repo_w"] - 2*PANEL_PAD, font_repo_title)
-    parts.append( draw_repo_block(x, repos_y, local_meas, True,
-                                  local_title, cfg["RemoteRepoName"],
-                                  branches, commits,
-                                  font_table_title, font_row, font_branch, font_hdr, font_hash) )
-    x += local_meas["repo_w"]
-
-    # Optional drittes Repo
-    if third_meas["repo_w"] > 0:
-        x += GAP_H
-        third_title_full = third.get("title","Repo3")
-        third_title = shorten_middle(third_title_full, third_meas["repo_w"] - 2*PANEL_PAD, font_repo_title)
-        parts.append( draw_repo_block(x, repos_y, third_meas, False,
-                                      third_title, third.get("repo_name", cfg["RemoteRepoName"]),
-                                      third.get("branches", branches), third_commits,
-                                      font_table_title, font_row, font_branch, font_hdr, font_hash) )
-
-    parts.append('</svg>')
-
-    os.makedirs("out", exist_ok=True)
-    out = os.path.join("out", "git_clone_diagram.svg")
-    with open(out, "w", encoding="utf-8") as f:
-        f.write("\n".join(parts))
-    print(f"Wrote {out}  ({int(total_width)}x{int(total_height)} px)")
+    out.raw('  <marker id="arrowThinOpen" markerUnits="userSpaceOnUse" markerWidth="12" markerHeight="10" refX="12" refY="5" orient="auto">')
+    out.raw('    <path d="M1,1 L11,5 L1,9" fill="none" stroke="#111" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>')
+    out.raw('  </marker>')
+    out.raw(f'  <style> .body{{font-family:{SVG_FONT_FAMILY_BODY}}} .mono{{font-family:{SVG_FONT_FAMILY_MONO}}} </style>')
+    out.raw('</defs>')
+
+def placed_nodes(lay: DiagramLayout):
+    """Top-down: (Knoten, x, y, Messung, draw-Optionen) in Zeichenreihenfolge."""
+    # Header + Beschreibung
+    y = TOP_MARGIN
+    for node, m in lay.head:
+        yield node, SIDE_MARGIN, y, m, {}
+        y += m.h
+
+    # Repos & Cmd-Panels
+    repos_y = TOP_MARGIN + lay.head_h + GAP_V
+    for box in lay.row.items:
+        if box.kind == "repo":
+            yield box.node, SIDE_MARGIN + box.x, repos_y, box.m, {}
+        else:
+            yield box.node, SIDE_MARGIN + box.x, repos_y + box.y, box.m, {"reverse": box.reverse}
+
+def draw_diagram(eng: LayoutEngine, lay: DiagramLayout, out: SvgWriter):
+    """Top-down: Positionen vergeben und direkt in out zeichnen."""
+    out.open("svg", svg_root_attrs(int(lay.w), int(lay.h)))
+    draw_defs(out)
+    for node, x, y, m, kw in placed_nodes(lay):
+        node.draw(eng, x, y, m, out, **kw)
+    out.close("svg")
+
+# ---------- Diagram ----------
+def draw_to(writer, cfg: Dict, scene: Dict, fonts: Dict, ast: Dict = None) -> Tuple[int, int]:
+    """Misst ein Diagramm entlang des AST und zeichnet es in writer (SvgWriter, RasterWriter, ...);
+    liefert (Breite, Höhe)."""
+    eng = layout_engine(fonts)
+    nodes = bind_ast(ast or load_ast(), cfg, scene)
+    lay = layout_diagram(eng, nodes, target_w=cfg.get("TargetWidth"))
+    draw_diagram(eng, lay, writer)
+    return int(lay.w), int(lay.h)
+
+def write_diagram(cfg: Dict, scene: Dict, fonts: Dict, sink, ast: Dict = None, output: Dict = None) -> Tuple[int, int]:
+    """Schreibt das SVG direkt in sink (.write(str)); liefert (Breite, Höhe).
+    Nur die Messergebnisse liegen im Speicher, kein Markup."""
+    return draw_to(svg_writer(sink, output), cfg, scene, fonts_for(fonts, output), ast)
+
+def build_diagram(cfg: Dict, scene: Dict, fonts: Dict, ast: Dict = None, output: Dict = None) -> Tuple[str, int, int]:
+    """Wie write_diagram, aber als String; liefert (SVG, Breite, Höhe)."""
+    buf = io.StringIO()
+    w, h = write_diagram(cfg, scene, fonts, buf, ast, output)
+    return buf.getvalue(), w, h
+
+def write_svg_file(path: str, cfg: Dict, scene: Dict, fonts: Dict, output: Dict = None) -> Tuple[int, int]:
+    """Streamt das SVG in eine temporäre Datei daneben und ersetzt path erst bei Erfolg."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            size = write_diagram(cfg, scene, fonts, f, output=output)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return size
+
+def write_raster_file(path: str, cfg: Dict, scene: Dict, fonts: Dict, output: Dict) -> Tuple[int, int]:
+    """PNG/PDF über RasterWriter (gleiche Primitiven wie das SVG, kein SVG-Parse)."""
+    return raster_file(path, lambda writer: draw_to(writer, cfg, scene, fonts), output)
+
+def raster_file(path: str, draw, output: Dict) -> Tuple[int, int]:
+    """draw(writer) -> (Breite, Höhe) zeichnet einmal in einen SvgWriter (nur Hash) und bei Cache-Fehlschlag
+    in einen RasterWriter. Der Hash des Standard-SVG-Stroms adressiert den Raster-Cache."""
+    fmt = output["format"]
+    sink = HashSink()
+    size = draw(SvgWriter(sink))
+    font_files = sorted({next((p for p in c if os.path.exists(p)), "") for c in RASTER_FONTS.values()})
+    key = raster_key(sink.hexdigest(), output, font_files)
+    cache = RasterCache.for_output(path)
+    cached = cache.get(key, fmt)
+    if cached is None:
+        wr = RasterWriter(output.get("dpi", DEFAULT_DPI), RASTER_FONTS, output.get("supersample", 1))
+        draw(wr)
+        cached = cache.put(key, fmt, lambda tmp: wr.save(tmp, fmt, output.get("background", "#fff")))
+    copy_atomic(cached, path)
+    return size
+
+def write_html_file(path: str, cfg: Dict, scene: Dict, fonts: Dict) -> Tuple[int, int]:
+    """Interaktiver HTML-Viewer (git_diagram_html): dieselben Primitiven plus Trefferflächen,
+    räumlicher Index über die Geometrie aus measure/place."""
+    from git_diagram_html import SceneWriter, write_html_file as write_viewer
+    writer = SceneWriter()
+    size = draw_to(writer, cfg, scene, fonts)
+    write_viewer(path, writer, scene["header"]["cmdline"].format_map(template_vars(cfg)))
+    return size
+
+def write_output_file(path: str, cfg: Dict, scene: Dict, fonts: Dict, output: Dict = None) -> Tuple[int, int]:
+    """SVG, HTML-Viewer oder – bei output["format"] png/pdf – Rasterbild schreiben."""
+    fmt = (output or {}).get("format", "svg")
+    if fmt == "html":
+        return write_html_file(path, cfg, scene, fonts)
+    if fmt != "svg":
+        return write_raster_file(path, cfg, scene, fonts, output)
+    return write_svg_file(path, cfg, scene, fonts, output)
+
+def render(command: str = "clone", cfg_path: str = CFG, out_path: str = None, fonts: Dict = None,
+           force: bool = False, output: Dict = None, width: int = None, reports: List[Dict] = None) -> str:
+    """Rendert ein Diagramm eines Befehls aus dem Katalog und schreibt die SVG-Datei.
+    Unveränderte Eingaben (Build-Manifest im Ausgabeordner) -> kein Neuzeichnen, außer force=True.
+    output: Ausgabe-Optionen, siehe svg_writer bzw. output_variants (format png/pdf/html).
+    width: Zielbreite (überschreibt "TargetWidth" der Config, siehe layout_diagram).
+    reports: Liste, an die der Messbericht dieses Renders angehängt wird (git_diagram_instrument)."""
+    cfg = with_target_width(load_json(cfg_path), width)
+    scene = scene_for(command, load_json(COMMANDS), load_json(SCENES))
+    fmt = (output or {}).get("format", "svg")
+    out = out_path or out_path_for(command, fmt=fmt)
+    manifest = Manifest.for_dir(os.path.dirname(out))
+    inputs = diagram_inputs(manifest, cfg, scene, output)
+    digest = combined_hash(inputs)
+    if not force and manifest.is_current(out, digest):
+        manifest.save()
+        print(f"Unchanged {out}  (skipped)")
+        return out
+
+    metrics_file = load_metrics_cache()
+    with record(out) as rep:
+        total_width, total_height = write_output_file(out, cfg, scene, fonts or load_fonts(), output)
+    if reports is not None:
+        reports.append(rep.to_dict())
+    manifest.record(out, digest, inputs)
+    manifest.save()
+    if metrics_file:
+        METRICS_CACHE.save(metrics_file)
+    print(f"Wrote {out}  ({total_width}x{total_height} px)")
+    return out
+
+def add_output_args(ap):
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--optimize", action="store_true",
+                      help="kompakte Ausgabe: CSS-Klassen, <symbol>/<use>, gerundete Koordinaten")
+    mode.add_argument("--canonical", action="store_true",
+                      help="kanonische Ausgabe: sortierte Attribute, feste Genauigkeit, Metriken aus der Tabelle")
+    ap.add_argument("--precision", type=int, default=DEFAULT_PRECISION, help="Nachkommastellen bei --optimize")
+    ap.add_argument("--format", nargs="+", choices=("svg",) + RASTER_FORMATS + ("html",), default=["svg"],
+                    help="Ausgabeformat(e); png/pdf werden direkt gerastert, html: interaktiver Viewer")
+    ap.add_argument("--dpi", type=int, default=DEFAULT_DPI, help="Auflösung für png/pdf (SVG-px = 96 dpi)")
+    ap.add_argument("--supersample", type=int, default=1, help="png/pdf: n-fach zeichnen und verkleinern (Glättung)")
+    ap.add_argument("--transparent", action="store_true", help="png ohne weißen Hintergrund")
+
+def output_options(args) -> Dict:
+    """SVG-Ausgabe-Optionen aus der Kommandozeile; {} = Standardausgabe (ändert keine Build-Hashes)."""
+    if getattr(args, "canonical", False):
+        return {"canonical": True}
+    return {"optimize": True, "precision": args.precision} if args.optimize else {}
+
+def metrics_backend(args) -> Optional[str]:
+    """Metrik-Backend aus --metrics/--canonical; kanonisch nur mit dem Tabellen-Backend
+    (gleiche Maße auf jeder Maschine, unabhängig von installierten Fonts und Pillow)."""
+    if getattr(args, "canonical", False):
+        if args.metrics not in (None, "table"):
+            raise SystemExit("--canonical braucht --metrics table")
+        return "table"
+    return args.metrics
+
+def output_variants(args) -> List[Dict]:
+    """Ausgabe-Optionen je angefordertem Format (--format svg png pdf)."""
+    variants = []
+    for fmt in dict.fromkeys(args.format):
+        if fmt == "svg":
+            variants.append(output_options(args))
+        elif fmt == "html":
+            variants.append({"format": fmt})
+        else:
+            opts = {"format": fmt, "dpi": args.dpi}
+            if args.supersample > 1:
+                opts["supersample"] = args.supersample
+            if args.transparent and fmt == "png":
+                opts["background"] = None
+            variants.append(opts)
+    return variants
+
+def main(argv=None) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="Git-Befehlsdiagramm als SVG/PNG/PDF rendern")
+    ap.add_argument("command", nargs="?", default="clone", help="Befehls-ID aus dem Katalog (Standard: clone)")
+    ap.add_argument("--config", default=CFG, help="Config-Datei")
+    ap.add_argument("--out", help="Zieldatei (Standard: out/git_<cmd>_diagram.<format>)")
+    ap.add_argument("--force", action="store_true", help="auch bei unveränderten Eingaben neu rendern")
+    ap.add_argument("--metrics", choices=["pillow", "ttf", "table"], help="Metrik-Backend")
+    ap.add_argument("--width", type=int, help="Zielbreite in px: Titel/Beschreibung umbrechen statt kürzen")
+    ap.add_argument("--report", metavar="JSON", help="Messbericht (Zeiten, Cache-Treffer, Elemente) schreiben")
+    add_output_args(ap)
+    args = ap.parse_args(argv)
+    try:
+        scene_for(args.command, load_json(COMMANDS), load_json(SCENES))
+    except KeyError as e:   # unbekannter Befehl: eine Zeile statt Traceback
+        raise SystemExit(e.args[0])
+    if metrics_backend(args):
+        set_backend(metrics_backend(args))
+    reports = None
+    if args.report:
+        import git_diagram_instrument as instrument
+        instrument.install(sys.modules[__name__])
+        reports = []
+    variants = output_variants(args)
+    for output in variants:
+        out = args.out
+        if out and len(variants) > 1:   # mehrere Formate: Endung je Format
+            out = os.path.splitext(out)[0] + "." + output.get("format", "svg")
+        render(args.command, args.config, out, force=args.force, output=output, width=args.width, reports=reports)
+    if args.report:
+        setup = instrument.take_setup()
+        reports = ([setup] if setup else []) + reports
+        instrument.write_report(args.report, reports)
+        print(instrument.summary(instrument.aggregate(reports)))
+        print(f"Wrote {args.report}")
+    return 0
 
 if __name__ == "__main__":
-    render()
+    raise SystemExit(main())
@@ -0,0 +1,37 @@
+# test_git_diagram_golden.py
+# - Golden-Prüfung als Test (wie "python git_diagram_golden.py"): SHA-256 aller Fälle gegen
+#   git_diagram_golden.json, kanonische SVGs gegen den Korpus git_diagram_golden/
+# - Tabellen-Backend, unabhängig von Pillow und installierten Fonts
+# - bewusste Ausgabeänderung: python git_diagram_golden.py --update
+
+import os
+
+import pytest
+
+import git_diagram_golden as golden
+import render_clone_svg as r
+from git_diagram_metrics import get_backend, set_backend
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+@pytest.fixture(scope="module")
+def fonts():
+    previous = get_backend().name
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(HERE)   # Config, Katalog, Szenen und Korpus liegen relativ zum Repo
+        set_backend("table")
+        yield r.load_fonts()
+    set_backend(previous)
+
+def test_golden_hashes(fonts):
+    expected = r.load_json(golden.GOLDEN)["cases"]
+    actual = {name: golden.digest(build()) for name, build in golden.cases(fonts).items()}
+    assert sorted(n for n in actual.keys() | expected.keys() if actual.get(n) != expected.get(n)) == []
+
+def test_golden_corpus(fonts):
+    assert golden.check_corpus(fonts) == []
+
+def test_local_path_independent_of_os(fonts):
+    # Korpus pinnt Windows-Pfade aus der Standard-Config: Trenner aus dem Basisordner, nicht aus os.path
+    assert r.template_vars(r.load_json(r.CFG))["LocalRepo"] == "c:\\a\\git\\libs\\datarecorder-lib"
+    assert r.join_local_path("/srv/git", "repo") == "/srv/git/repo"
@@ -0,0 +1,50 @@
+# test_git_diagram_manifest.py
+# - RENDERER_SOURCES muss jedes git_diagram_*-Modul enthalten, das der Render-Pfad importiert
+#   (transitiv, auch Importe innerhalb von Funktionen) – sonst gelten Ausgaben fälschlich als unverändert
+# - mit dem pillow-Backend ändert ein Pillow-Update die Eingabe-Hashes
+
+import ast, os
+
+import git_diagram_manifest as manifest
+from git_diagram_manifest import RENDERER_SOURCES, Manifest, combined_hash, input_hashes
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def imported_modules(path: str):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            yield from (a.name for a in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            yield node.module
+
+def render_path_sources():
+    seen, todo = set(), ["render_clone_svg.py"]
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        for mod in imported_modules(os.path.join(HERE, name)):
+            src = mod + ".py"
+            if mod.startswith("git_diagram_") and os.path.exists(os.path.join(HERE, src)):
+                todo.append(src)
+    return seen
+
+def test_renderer_sources_cover_render_path():
+    missing = render_path_sources() - set(RENDERER_SOURCES)
+    assert not missing, f"in RENDERER_SOURCES nachtragen: {sorted(missing)}"
+
+def test_renderer_sources_exist():
+    assert all(os.path.exists(os.path.join(HERE, p)) for p in RENDERER_SOURCES)
+
+def test_pillow_version_in_inputs(monkeypatch, tmp_path):
+    m = Manifest(str(tmp_path / "manifest.json"))
+    def digest(backend):
+        return combined_hash(input_hashes(m, {}, {}, "1", backend, []))
+    monkeypatch.setattr(manifest, "pillow_version", lambda: "11.0.0")
+    before = digest("pillow"), digest("table")
+    monkeypatch.setattr(manifest, "pillow_version", lambda: "12.0.0")
+    assert digest("pillow") != before[0]
+    assert digest("table") == before[1]
@@ -0,0 +1,41 @@
+# test_git_diagram_metrics.py
+# - ttf- und table-Backend gegen die Pillow-Referenz: maximale Breiten-/Höhenabweichung je Font und Größe
+#   innerhalb WIDTH_TOLERANCE / HEIGHT_TOLERANCE (wie "python git_diagram_metrics.py compare <backend>")
+# - Cache-Schlüssel: Pillow-Font nach der tatsächlich geladenen Datei, ttf/table-Einträge persistierbar
+# - ohne Pillow oder ohne DejaVu-Fonts übersprungen
+
+import os
+
+import pytest
+
+from git_diagram_metrics import (HEIGHT_TOLERANCE, WIDTH_TOLERANCE, LazyPillowFont, PillowBackend, TableBackend,
+                                 TextMetricsCache, TTFBackend, compare_backends, font_key, _font_specs,
+                                 pillow_available)
+
+SPECS = _font_specs()
+
+pytestmark = [
+    pytest.mark.skipif(not pillow_available(), reason="Referenz-Backend braucht Pillow"),
+    pytest.mark.skipif(not all(any(os.path.exists(p) for p in c) for c, _ in SPECS), reason="Fonts fehlen"),
+]
+
+@pytest.mark.parametrize("backend", [TTFBackend, TableBackend], ids=["ttf", "table"])
+def test_backend_matches_pillow(backend):
+    rows = compare_backends(backend(), PillowBackend(), SPECS)
+    assert [r for r in rows if r[2] > WIDTH_TOLERANCE] == []
+    assert [r for r in rows if r[3] > HEIGHT_TOLERANCE] == []
+
+def test_lazy_pillow_font_keyed_by_loaded_file(tmp_path):
+    broken = tmp_path / "broken.ttf"
+    broken.write_bytes(b"kein Font")
+    good = next(p for p in SPECS[0][0] if os.path.exists(p))
+    font = LazyPillowFont([str(broken), good], 12)
+    assert font_key(font) == (good, 12)
+
+@pytest.mark.parametrize("backend", [TTFBackend, TableBackend], ids=["ttf", "table"])
+def test_metrics_cache_persists_backend_entries(backend, tmp_path):
+    font = backend().load_font(*SPECS[0])
+    cache = TextMetricsCache()
+    cache.text_size(font, "abc", False, lambda: (10, 12))
+    cache.save(str(tmp_path / "metrics.json"))
+    assert TextMetricsCache().load(str(tmp_path / "metrics.json")) == 1
@@ -0,0 +1,39 @@
+# test_git_diagram_sequence.py
+# - copy-Effekt (fetch/push/clone) ergänzt nur fehlende Commits: ein lokaler Commit überlebt
+#   clone -> commit -> fetch, in den Szenen wie in den gezeichneten Frames
+
+import os
+
+import pytest
+
+import git_diagram_sequence as seq
+import render_clone_svg as r
+from git_diagram_metrics import get_backend, set_backend
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STEPS = ["clone", "commit", "fetch"]
+
+@pytest.fixture(scope="module")
+def fonts():
+    previous = get_backend().name
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(HERE)
+        set_backend("table")
+        yield r.load_fonts()
+    set_backend(previous)
+
+def test_fetch_keeps_local_commit(fonts):
+    scenes = seq.sequence_scenes(STEPS)
+    local = [[c["id"] for c in sc["repos"]["local"]["commits"]] for sc in scenes]
+    remote = [[c["id"] for c in sc["repos"]["remote"]["commits"]] for sc in scenes]
+    assert [len(a) + len(b) for a, b in zip(local, remote)] == [6, 7, 7]
+    committed = local[1][-1]
+    assert committed in local[2] and committed not in remote[2]
+    assert not any(c.get("state") for c in scenes[2]["repos"]["local"]["commits"])   # fetch bringt nichts Neues
+
+def test_frames_keep_local_commit(fonts):
+    _lays, frames = seq.build_sequence(STEPS, r.load_json(r.CFG), fonts)
+    circles = [sum(e.startswith("<circle") for e in elements) for _w, _h, elements in frames]
+    assert circles[1] == circles[2] == circles[0] + 1
+    committed = seq.sequence_scenes(STEPS)[1]["repos"]["local"]["commits"][-1]["id"]
+    assert any(committed in e for e in frames[-1][2])